@@ -0,0 +1 @@
+"""benchmarks of dbt-quicksight-lineage, run with `python -m benchmarks`"""
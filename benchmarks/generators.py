@@ -0,0 +1,226 @@
+"""generators of synthetic dbt manifests, schema.yml files and DescribeDataSet payloads"""
+import copy
+import datetime
+import json
+import os
+from typing import Any, Dict, List
+
+TEMPLATE_MANIFEST_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, 'tests', 'data', 'manifest.json',
+)
+TEMPLATE_MODEL_ID = 'model.test_project.my_first_dbt_model'
+
+PROJECT_NAME = 'bench'
+SCHEMA = 'bench'
+AWS_ACCOUNT_ID = '123456789012'
+DATA_SET_ID = 'bench-data-set'
+DATA_SOURCE_ARN = f'arn:aws:quicksight:ap-northeast-1:{AWS_ACCOUNT_ID}:datasource/bench-data-source'
+MODELS_PER_SCHEMA_FILE = 100
+UNLINKED_MODEL_COLUMNS = 10
+
+_COLUMN_TYPES = ['STRING', 'INTEGER', 'DECIMAL', 'DATETIME']
+_GEOGRAPHIC_ROLES = ['COUNTRY', 'STATE', 'CITY', 'POSTCODE']
+
+
+def model_name(i: int) -> str:
+    """name of i-th synthetic model"""
+    return f'model_{i:05d}'
+
+
+def column_name(j: int) -> str:
+    """name of j-th synthetic column"""
+    return f'col_{j:04d}'
+
+
+def schema_file_path(i: int) -> str:
+    """schema.yml path of i-th synthetic model, relative to project dir"""
+    return f'models/schema_{i // MODELS_PER_SCHEMA_FILE:04d}.yml'
+
+
+def _column_meta(j: int) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {}
+    if j % 2 == 0:
+        meta['field_name'] = column_name(j).upper()
+    if j % 5 == 0:
+        meta['folder'] = f'Folder{j % 3}/'
+    if j % 7 == 3:
+        meta['hidden'] = True
+    if j % 11 == 4:
+        meta['geographic_role'] = _GEOGRAPHIC_ROLES[j % len(_GEOGRAPHIC_ROLES)].lower()
+    if j % 3 == 1:
+        meta['data_type'] = 'string'
+    return meta
+
+
+def generate_manifest(
+    n_models: int,
+    n_columns: int = 20,
+    n_linked_models: int = 1,
+) -> Dict[str, Any]:
+    """
+    generate manifest.json dict with n_models SQL models.
+    first n_linked_models models have n_columns columns and are linked to DATA_SET_ID
+    by meta.quicksight, the others have UNLINKED_MODEL_COLUMNS columns
+    """
+    with open(TEMPLATE_MANIFEST_PATH, encoding='utf-8') as f:
+        manifest = json.load(f)
+    template = manifest['nodes'][TEMPLATE_MODEL_ID]
+    nodes = {}
+    for i in range(n_models):
+        if i < n_linked_models:
+            node = _generate_node(template, i, n_columns, linked=True)
+        else:
+            node = _generate_node(template, i, min(n_columns, UNLINKED_MODEL_COLUMNS), linked=False)
+        nodes[node['unique_id']] = node
+    manifest['nodes'] = nodes
+    manifest['parent_map'] = {unique_id: [] for unique_id in nodes}
+    manifest['child_map'] = {unique_id: [] for unique_id in nodes}
+    return manifest
+
+
+def _generate_node(
+    template: Dict[str, Any],
+    i: int,
+    n_columns: int,
+    linked: bool,
+) -> Dict[str, Any]:
+    node = copy.deepcopy(template)
+    name = model_name(i)
+    select_columns = ',\n'.join(f'    {column_name(j)}' for j in range(n_columns))
+    node.update({
+        'unique_id': f'model.{PROJECT_NAME}.{name}',
+        'name': name,
+        'alias': name,
+        'schema': SCHEMA,
+        'package_name': PROJECT_NAME,
+        'path': f'{name}.sql',
+        'original_file_path': f'models/{name}.sql',
+        'fqn': [PROJECT_NAME, name],
+        'patch_path': f'{PROJECT_NAME}://{schema_file_path(i)}',
+        'relation_name': f'"postgres"."{SCHEMA}"."{name}"',
+        'raw_code': f'select\n{select_columns}\nfrom source',
+    })
+    node['compiled_code'] = node['raw_code']
+    node['columns'] = {}
+    for j in range(n_columns):
+        column = copy.deepcopy(template['columns']['id'])
+        column.update({
+            'name': column_name(j),
+            'description': f'description of {column_name(j)}',
+            'meta': {},
+        })
+        meta = _column_meta(j)
+        if linked and meta:
+            column['meta'] = {'quicksight': meta}
+        node['columns'][column_name(j)] = column
+    meta = {}
+    if linked:
+        meta = {
+            'quicksight': {
+                'logical_table_name': f'Model {i}',
+                'data_sets': [{'id': DATA_SET_ID, 'data_source': DATA_SOURCE_ARN}],
+            },
+        }
+    node['meta'] = meta
+    node['config'] = dict(node['config'], meta=meta)
+    node['unrendered_config'] = dict(node['unrendered_config'], meta=meta)
+    return node
+
+
+def generate_describe_data_set_output(
+    n_physical_tables: int,
+    n_columns: int,
+    n_transforms: int = 0,
+) -> Dict[str, Any]:
+    """
+    generate DescribeDataSet output with n_physical_tables relational tables of n_columns columns,
+    i-th table is the relation of i-th synthetic model.
+    each logical table has about n_transforms existing Rename, Cast and Tag operations
+    """
+    physical_table_map = {}
+    logical_table_map = {}
+    field_folders: Dict[str, Dict[str, Any]] = {}
+    for i in range(n_physical_tables):
+        physical_table_id = f'physical-{i:03d}'
+        physical_table_map[physical_table_id] = {
+            'RelationalTable': {
+                'DataSourceArn': DATA_SOURCE_ARN,
+                'Schema': SCHEMA,
+                'Name': model_name(i),
+                'InputColumns': [
+                    {'Name': column_name(j), 'Type': _COLUMN_TYPES[j % len(_COLUMN_TYPES)]}
+                    for j in range(n_columns)
+                ],
+            },
+        }
+        transforms = _generate_transforms(n_columns, n_transforms)
+        projected = transforms[-1]['ProjectOperation']['ProjectedColumns']
+        logical_table_map[f'logical-{i:03d}'] = {
+            'Alias': model_name(i),
+            'DataTransforms': transforms,
+            'Source': {'PhysicalTableId': physical_table_id},
+        }
+        folder = field_folders.setdefault(f'Table{i % 5}', {'columns': []})
+        folder['columns'].extend(projected[:10])
+    updated_at = datetime.datetime(2023, 7, 1, tzinfo=datetime.timezone.utc)
+    return {
+        'Status': 200,
+        'DataSet': {
+            'Arn': f'arn:aws:quicksight:ap-northeast-1:{AWS_ACCOUNT_ID}:dataset/{DATA_SET_ID}',
+            'DataSetId': DATA_SET_ID,
+            'Name': 'bench',
+            'CreatedTime': updated_at,
+            'LastUpdatedTime': updated_at,
+            'PhysicalTableMap': physical_table_map,
+            'LogicalTableMap': logical_table_map,
+            'ImportMode': 'SPICE',
+            'FieldFolders': field_folders,
+            'DataSetUsageConfiguration': {
+                'DisableUseAsDirectQuerySource': False,
+                'DisableUseAsImportedSource': False,
+            },
+        },
+    }
+
+
+def _generate_transforms(n_columns: int, n_transforms: int) -> List[Dict[str, Any]]:
+    """existing Rename, Cast and Tag operations followed by ProjectOperation"""
+    transforms: List[Dict[str, Any]] = []
+    for k in range(min(n_transforms, n_columns * 3)):
+        j, kind = k % n_columns, k // n_columns
+        name = column_name(j)
+        if kind == 0:
+            transforms.append({'RenameColumnOperation': {
+                'ColumnName': name, 'NewColumnName': f'{name} old'}})
+        elif kind == 1:
+            transforms.append({'CastColumnTypeOperation': {
+                'ColumnName': f'{name} old', 'NewColumnType': 'STRING'}})
+        else:
+            transforms.append({'TagColumnOperation': {
+                'ColumnName': f'{name} old',
+                'Tags': [{'ColumnDescription': {'Text': 'old'}}],
+            }})
+    renamed = min(n_transforms, n_columns)
+    projected = [
+        f'{column_name(j)} old' if j < renamed else column_name(j)
+        for j in range(n_columns)
+    ]
+    transforms.append({'ProjectOperation': {'ProjectedColumns': projected}})
+    return transforms
+
+
+def write_schema_files(project_dir: str, n_models: int, n_columns: int) -> None:
+    """write schema.yml files which declare the synthetic models into project_dir"""
+    for start in range(0, n_models, MODELS_PER_SCHEMA_FILE):
+        lines = ['version: 2', '', 'models:']
+        for i in range(start, min(n_models, start + MODELS_PER_SCHEMA_FILE)):
+            lines.append(f'  - name: {model_name(i)}')
+            lines.append('    description: "synthetic model"')
+            lines.append('    columns:')
+            for j in range(n_columns):
+                lines.append(f'      - name: {column_name(j)}')
+                lines.append(f'        description: "description of {column_name(j)}"')
+        path = os.path.join(project_dir, schema_file_path(start))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
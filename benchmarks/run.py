@@ -0,0 +1,315 @@
+"""
+run benchmarks of dbt-quicksight-lineage core logic on synthetic inputs
+
+    python -m benchmarks --preset medium --output benchmark-results.json
+    python -m benchmarks --preset medium --compare benchmark-results.json
+"""
+import argparse
+import copy
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import generators
+
+PRESETS: Dict[str, Dict[str, int]] = {
+    'tiny': {'models': 20, 'tables': 2, 'columns': 10, 'transforms': 10, 'data_sets': 5},
+    'small': {'models': 1000, 'tables': 1, 'columns': 50, 'transforms': 50, 'data_sets': 1000},
+    'medium': {'models': 10000, 'tables': 10, 'columns': 200, 'transforms': 300, 'data_sets': 100},
+    'large': {'models': 50000, 'tables': 50, 'columns': 2000, 'transforms': 3000, 'data_sets': 10},
+}
+
+
+@dataclass
+class BenchmarkResult:
+    """timings of one benchmark in seconds"""
+
+    name: str
+    times: List[float] = field(default_factory=list)
+    peak_memory: Optional[int] = None  # bytes, only for measure_peak_memory
+
+    @property
+    def min(self) -> float:
+        """fastest run"""
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        """median run"""
+        return statistics.median(self.times)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """machine readable form"""
+        return dict(
+            asdict(self),
+            min=self.min,
+            median=self.median,
+            mean=statistics.fmean(self.times),
+        )
+
+
+def measure(
+    name: str,
+    func: Callable[[Any], Any],
+    repeat: int,
+    setup: Callable[[], Any] = lambda: None,
+) -> BenchmarkResult:
+    """call setup and func repeat times, only func is timed. setup result is passed to func"""
+    result = BenchmarkResult(name)
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        result.times.append(time.perf_counter() - start)
+    print(f'{name:<48} min {result.min * 1000:10.2f} ms  median {result.median * 1000:10.2f} ms',
+          file=sys.stderr)
+    return result
+
+
+def measure_peak_memory(
+    name: str,
+    func: Callable[[Any], Any],
+    repeat: int,
+    setup: Callable[[], Any] = lambda: None,
+) -> BenchmarkResult:
+    """same as measure, and also trace peak memory allocated by func with tracemalloc"""
+    result = BenchmarkResult(name, peak_memory=0)
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            func(state)
+            result.times.append(time.perf_counter() - start)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result.peak_memory = max(result.peak_memory, peak)
+    print(
+        f'{name:<48} min {result.min * 1000:10.2f} ms  '
+        f'peak {result.peak_memory / 2 ** 20:10.2f} MiB',
+        file=sys.stderr,
+    )
+    return result
+
+
+class _FakeQuickSightClient:  # pylint: disable=too-few-public-methods
+    """
+    QuickSight client which returns a copy of the synthetic DescribeDataSet output.
+    dry runs call only DescribeDataSet
+    """
+
+    def __init__(self, output: Dict[str, Any]) -> None:
+        self._output = output
+
+    def describe_data_set(self, **_kwargs) -> Dict[str, Any]:
+        """return a copy of the synthetic output"""
+        return copy.deepcopy(self._output)
+
+
+def run_benchmarks(  # pylint: disable=too-many-locals,too-many-arguments
+    models: int,
+    tables: int,
+    columns: int,
+    transforms: int,
+    data_sets: int = 1,
+    repeat: int = 3,
+    work_dir: Optional[str] = None,
+) -> List[BenchmarkResult]:
+    """run all benchmarks, synthetic inputs are written into work_dir"""
+    # pylint: disable=import-outside-toplevel
+    from dbt_quicksight_lineage.core import App, ManifestLoader
+    from dbt_quicksight_lineage.core.dbt import ManifestCache
+    from dbt_quicksight_lineage.core.app import _write_schema_patches as write_schema_patches
+    from dbt_quicksight_lineage.core.quicksight import DataSet
+
+    if tables > models:
+        raise ValueError(f'tables ({tables}) must not exceed models ({models})')
+    if work_dir is None:
+        work_dir = tempfile.mkdtemp(prefix='dbt-quicksight-lineage-bench-')
+    manifest_path = os.path.join(work_dir, 'manifest.json')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(generators.generate_manifest(models, columns, n_linked_models=tables), f)
+    generators.write_schema_files(work_dir, tables, columns)
+    output = generators.generate_describe_data_set_output(tables, columns, transforms)
+    results = []
+
+    results.append(measure(
+        'import.cli',
+        lambda _: subprocess.run(
+            [sys.executable, '-c', 'import dbt_quicksight_lineage.cli.main'], check=True),
+        repeat,
+    ))
+    # the first load also imports dbt, keep it out of timings
+    app = App(
+        manifest=ManifestLoader(manifest_path=manifest_path).load_manifest(),
+        quicksight_client=object(),
+        aws_account_id=generators.AWS_ACCOUNT_ID,
+    )
+    results.append(measure(
+        'manifest_loader.load_manifest.json',
+        lambda _: ManifestLoader(manifest_path=manifest_path).load_manifest(),
+        repeat,
+    ))
+    results.append(measure(
+        'manifest_loader.load_manifest.slim',
+        lambda _: ManifestLoader(manifest_path=manifest_path, slim=True).load_manifest(),
+        repeat,
+    ))
+    cache_dir = os.path.join(work_dir, 'manifest-cache')
+    ManifestLoader(manifest_path=manifest_path, cache=ManifestCache(cache_dir)).load_manifest()
+    results.append(measure(
+        'manifest_loader.load_manifest.cached',
+        lambda _: ManifestLoader(
+            manifest_path=manifest_path, cache=ManifestCache(cache_dir)).load_manifest(),
+        repeat,
+    ))
+
+    def new_data_set() -> DataSet:
+        return DataSet(copy.deepcopy(output['DataSet']))
+
+    def modified_data_set() -> DataSet:
+        data_set = new_data_set()
+        for physical_table, node in list(app._detect_modify_target(data_set)):  # pylint: disable=protected-access
+            app._modify_logical_table(data_set, physical_table, node)  # pylint: disable=protected-access
+        return data_set
+
+    results.append(measure(
+        'app.detect_modify_target',
+        lambda data_set: list(app._detect_modify_target(data_set)),  # pylint: disable=protected-access
+        repeat,
+        setup=new_data_set,
+    ))
+    detected = list(app._detect_modify_target(new_data_set()))  # pylint: disable=protected-access
+    if len(detected) != tables:
+        raise ValueError(
+            f'synthetic inputs are inconsistent: {len(detected)} targets for {tables} tables')
+
+    def modify_logical_table(data_set: DataSet) -> None:
+        for physical_table, node in app._detect_modify_target(data_set):  # pylint: disable=protected-access
+            app._modify_logical_table(data_set, physical_table, node)  # pylint: disable=protected-access
+
+    results.append(measure(
+        'app.modify_logical_table', modify_logical_table, repeat, setup=new_data_set))
+    results.append(measure(
+        'data_set.to_dict', lambda data_set: data_set.to_dict(), repeat, setup=modified_data_set))
+    results.append(measure(
+        'data_set.generate_update_data_set_input',
+        lambda data_set: data_set.generate_update_data_set_input(generators.AWS_ACCOUNT_ID),
+        repeat,
+        setup=modified_data_set,
+    ))
+
+    def update_schema_yaml(data_set: DataSet) -> None:
+        # pylint: disable=protected-access
+        related_nodes = list(app._detect_related_nodes(data_set))
+        schema_patches = app._plan_schema_patches(data_set, related_nodes, work_dir)
+        for schema_file_path, patches in schema_patches.items():
+            write_schema_patches(schema_file_path, patches)
+
+    def schema_files_and_data_set() -> DataSet:
+        generators.write_schema_files(work_dir, tables, columns)
+        return modified_data_set()
+
+    results.append(measure(
+        'app.update_schema_yaml', update_schema_yaml, repeat, setup=schema_files_and_data_set))
+
+    def update_data_sets(_: Any) -> None:
+        # the loaded manifest is not referenced after App is built, as in the CLI
+        bulk_app = App(
+            manifest=ManifestLoader(manifest_path=manifest_path).load_manifest(),
+            quicksight_client=_FakeQuickSightClient(output),
+            aws_account_id=generators.AWS_ACCOUNT_ID,
+        )
+        # every data set is described as a fresh copy,
+        # the same id keeps models linked to all of them
+        data_set_ids = [generators.DATA_SET_ID] * data_sets
+        for result in bulk_app.update_data_sets(data_set_ids, dry_run=True, force=True):
+            if not result.succeeded:
+                raise result.error
+
+    results.append(measure_peak_memory('app.update_data_sets.dry_run', update_data_sets, repeat))
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """describe where benchmarks ran"""
+    from dbt_quicksight_lineage.__about__ import __version__  # pylint: disable=import-outside-toplevel
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'version': __version__,
+        'commit': commit,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """print median ratio current / baseline of each benchmark"""
+    baseline_results = {result['name']: result for result in baseline['results']}
+    for result in current['results']:
+        base = baseline_results.get(result['name'])
+        if base is None:
+            continue
+        ratio = result['median'] / base['median'] if base['median'] > 0 else float('inf')
+        print(f"{result['name']:<48} {base['median'] * 1000:10.2f} ms -> "
+              f"{result['median'] * 1000:10.2f} ms  x{ratio:.2f}", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--models', type=int, help='number of models in manifest')
+    parser.add_argument('--tables', type=int, help='number of physical tables in data set')
+    parser.add_argument('--columns', type=int, help='number of columns per table')
+    parser.add_argument(
+        '--transforms', type=int, help='number of existing DataTransforms per logical table')
+    parser.add_argument('--data-sets', type=int, help='number of data sets updated by bulk dry run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='path to write results JSON, default is stdout')
+    parser.add_argument('--compare', help='path to results JSON of a previous run')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    params = dict(PRESETS[args.preset])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    results = run_benchmarks(repeat=args.repeat, **params)
+    report = {
+        'environment': environment(),
+        'params': dict(params, preset=args.preset, repeat=args.repeat),
+        'results': [result.to_dict() for result in results],
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    return 0
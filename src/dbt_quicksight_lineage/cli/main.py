@@ -1,12 +1,25 @@
 """dbt-quicksight-lineage: DBT to QuickSight Lineage commandline definition"""
+import os
+import stat
 import sys
 import logging
-from typing import Optional
+from typing import List, Optional, Tuple
 import json
-import colorlog
 import click
 from dbt_quicksight_lineage.cli import requires
-from dbt_quicksight_lineage.core import App
+from dbt_quicksight_lineage.core import App, ManifestLoader, profiling, tracing
+from dbt_quicksight_lineage.core.app import (
+    DEFAULT_MAX_WORKERS,
+    UpdateDataSetResult,
+    UpdateSchemaFileResult,
+)
+from dbt_quicksight_lineage.core.watch import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_POLL_INTERVAL,
+    FileWatcher,
+    ManifestWatcher,
+    WatchBatch,
+)
 from dbt_quicksight_lineage.__about__ import __version__
 
 
@@ -24,10 +37,25 @@ from dbt_quicksight_lineage.__about__ import __version__
     help="Disable color in output",
     default=None,
 )
+@click.option(
+    "--profile",
+    "profile_path",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write cProfile stats to PATH and per-phase timings to PATH.phases.txt",
+)
+@click.option(
+    "--trace",
+    "trace_path",
+    type=click.Path(dir_okay=False, writable=True),
+    envvar="DBT_QUICKSIGHT_LINEAGE_TRACE",
+    help="Append trace spans to PATH as NDJSON",
+)
 def dbt_quicksight_lineage(
     ctx: click.Context,
     log_level: str,
     no_color: Optional[bool] = None,
+    profile_path: Optional[str] = None,
+    trace_path: Optional[str] = None,
 ):
     """dbt-quicksight-lineage: DBT to QuickSight Lineage command helper"""
     set_color = False
@@ -36,6 +64,7 @@ def dbt_quicksight_lineage(
     elif sys.stdout.isatty():
         set_color = True
     if set_color:
+        import colorlog  # pylint: disable=import-outside-toplevel
         formatter = colorlog.ColoredFormatter(
             '%(log_color)s%(levelname)s:%(name)s:%(message)s',
             log_colors={
@@ -56,18 +85,60 @@ def dbt_quicksight_lineage(
     logger.setLevel(log_level)
     if log_level == "DEBUG":
         logger.debug("Debug logging enabled")
+    if profile_path is not None:
+        _start_profile(ctx, profile_path)
+    if trace_path is not None:
+        _start_trace(ctx, trace_path)
     if ctx.invoked_subcommand is None:
         click.echo(ctx.get_help())
         return
 
 
+def _start_profile(ctx: click.Context, profile_path: str) -> None:
+    import cProfile  # pylint: disable=import-outside-toplevel
+    timer = profiling.PhaseTimer()
+    profiling.set_phase_timer(timer)
+    profiler = cProfile.Profile()
+
+    def finish() -> None:
+        profiler.disable()
+        profiling.set_phase_timer(None)
+        profiler.dump_stats(profile_path)
+        table = timer.format_table()
+        with open(f'{profile_path}.phases.txt', 'w', encoding='utf-8') as f:
+            f.write(table + '\n')
+        click.echo(table, err=True)
+
+    ctx.call_on_close(finish)
+    profiler.enable()
+
+
+def _start_trace(ctx: click.Context, trace_path: str) -> None:
+    stream = ctx.with_resource(open(trace_path, 'a', encoding='utf-8'))  # pylint: disable=consider-using-with
+    tracing.set_tracer(tracing.Tracer(stream))
+    ctx.call_on_close(lambda: tracing.set_tracer(None))
+    ctx.with_resource(tracing.span(f'cli.{ctx.invoked_subcommand}'))
+
+
 @dbt_quicksight_lineage.command()
 @click.pass_context
 @click.option(
     "--data-set-id",
     type=str,
     help="QuickSight DataSet ID",
-    required=True,
+)
+@click.option(
+    "--all",
+    "all_data_sets",
+    is_flag=True,
+    help="Initialize from all DataSets of the account",
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Number of DataSets described concurrently with --all",
 )
 @click.option(
     "--data-source-arn",
@@ -75,24 +146,59 @@ def dbt_quicksight_lineage(
     help="QuickSight DataSource ARN",
 )
 @requires.dbt_manifest
-def init(
+@requires.quicksight_client
+# click passes each option of the command as an argument
+def init(  # pylint: disable=too-many-arguments
     ctx: click.Context,
-    data_set_id: str,
+    data_set_id: Optional[str],
+    all_data_sets: bool,
+    max_workers: int,
     data_source_arn: Optional[str] = None,
     project_dir: Optional[str] = None,
     **_kwargs,
 ):
     """Modify schema.yml to add QuickSight metadata with Data Set"""
+    if (data_set_id is None) == (not all_data_sets):
+        raise click.UsageError("either --data-set-id or --all is required")
     app = App(
-        manifest=ctx.obj['manifest'],
+        manifest=ctx.obj.pop('manifest'),
+        quicksight_client=ctx.obj.get('quicksight_client'),
+        aws_account_id=ctx.obj.get('aws_account_id'),
     )
+    if all_data_sets:
+        click.echo(f"Describe all DataSets on {app.aws_account_id}")
+        result = app.init_all(
+            data_source_arn=data_source_arn,
+            project_dir=project_dir,
+            max_workers=max_workers,
+        )
+        for failed_data_set_id, error in result.errors.items():
+            click.echo(f"failed: {failed_data_set_id}: {error}", err=True)
+        click.echo(
+            f"{len(result.data_set_ids) - len(result.errors)} DataSets described, "
+            f"{len(result.errors)} failed")
+        _echo_schema_file_results(result.schema_files)
+        if result.errors:
+            ctx.exit(1)
+        return
     click.echo(
         f"Describe DataSet: {data_set_id} on {app.aws_account_id}")
-    app.init(
+    results = app.init(
         data_set_id=data_set_id,
         data_source_arn=data_source_arn,
         project_dir=project_dir,
     )
+    _echo_schema_file_results(results)
+
+
+def _echo_schema_file_results(results: List[UpdateSchemaFileResult]) -> None:
+    updated = [result for result in results if result.status == 'updated']
+    unchanged = [result for result in results if result.status == 'unchanged']
+    for result in updated:
+        click.echo(f"Updated: {result.path}")
+    for result in unchanged:
+        click.echo(f"Unchanged: {result.path}")
+    click.echo(f"{len(updated)} schema files updated, {len(unchanged)} unchanged")
 
 
 @dbt_quicksight_lineage.command()
@@ -101,32 +207,397 @@ def init(
     "--data-set-id",
     type=str,
     help="QuickSight DataSet ID",
-    required=True,
+)
+@click.option(
+    "--all",
+    "all_data_sets",
+    is_flag=True,
+    help="Update all DataSets referenced in DBT Manifest",
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Number of DataSets updated concurrently with --all",
 )
 @click.option(
     "--dry-run",
     is_flag=True,
     help="Dry run",
 )
-@requires.dbt_manifest
-def update_data_set(
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Update DataSet even if it is already up to date",
+)
+@click.option(
+    "--state",
+    type=click.Path(exists=True, dir_okay=False),
+    help=(
+        "Manifest of the previous run, "
+        "with --all only DataSets whose models changed since it are updated"
+    ),
+)
+@click.option(
+    "--pipeline",
+    is_flag=True,
+    help=(
+        "With --all, run describe, plan and update as overlapping asyncio stages, "
+        "each stage with --max-workers concurrent calls"
+    ),
+)
+@requires.dbt_manifest(quicksight_only=True)
+@requires.quicksight_client
+# click passes each option of the command as an argument
+def update_data_set(  # pylint: disable=too-many-arguments
     ctx: click.Context,
-    data_set_id: str,
+    data_set_id: Optional[str],
+    all_data_sets: bool,
+    max_workers: int,
     dry_run: bool,
+    force: bool,
+    state: Optional[str] = None,
+    pipeline: bool = False,
     **_kwargs,
 ):
     """Update QuickSight DataSet from DBT Manifest"""
+    if (data_set_id is None) == (not all_data_sets):
+        raise click.UsageError("either --data-set-id or --all is required")
+    if state is not None and not all_data_sets:
+        raise click.UsageError("--state requires --all")
+    if pipeline and not all_data_sets:
+        raise click.UsageError("--pipeline requires --all")
     app = App(
-        manifest=ctx.obj['manifest'],
+        manifest=ctx.obj.pop('manifest'),
+        quicksight_client=ctx.obj.get('quicksight_client'),
+        aws_account_id=ctx.obj.get('aws_account_id'),
     )
+    if all_data_sets:
+        data_set_ids = app.find_data_set_ids()
+        if state is not None:
+            data_set_ids = _changed_data_set_ids(app, data_set_ids, state)
+        click.echo(
+            f"Updating {len(data_set_ids)} QuickSight DataSets on {app.aws_account_id}")
+        if pipeline:
+            results = _run_pipeline(app, data_set_ids, dry_run, max_workers, force)
+        else:
+            results = app.update_data_sets(
+                data_set_ids=data_set_ids,
+                dry_run=dry_run,
+                max_workers=max_workers,
+                force=force,
+            )
+        if _echo_update_results(results) > 0:
+            ctx.exit(1)
+        return
     click.echo(
         f"Updating QuickSight DataSet: {data_set_id} on {app.aws_account_id}")
-    _, update_data_set_input = app.update_data_set(
+    result = app.run_update_data_set(
         data_set_id=data_set_id,
         dry_run=dry_run,
+        force=force,
     )
+    if result.status == 'unchanged':
+        click.echo(
+            f"DataSet: {data_set_id} on {app.aws_account_id} is up to date")
+        return
     if dry_run:
         click.echo(
             f"Update DataSet: {data_set_id} on {app.aws_account_id} (dry run)")
-        click.echo(json.dumps(update_data_set_input, indent=2, default=str, ensure_ascii=False))
+        click.echo(json.dumps(
+            result.update_data_set_input, indent=2, default=str, ensure_ascii=False))
         return
+
+
+def _changed_data_set_ids(app: App, data_set_ids: List[str], state: str) -> List[str]:
+    loader = ManifestLoader(manifest_path=state, slim=True, quicksight_only=True)
+    try:
+        with profiling.phase(profiling.PHASE_MANIFEST_LOAD):
+            previous_manifest = loader.load_manifest()
+    except ValueError as ex:
+        click.echo(f"cannot load manifest, check --state flag: {ex}", err=True)
+        raise click.Abort()
+    changed_data_set_ids = app.find_changed_data_set_ids(previous_manifest)
+    click.echo(
+        f"{len(changed_data_set_ids)} of {len(data_set_ids)} DataSets changed since {state}")
+    return changed_data_set_ids
+
+
+def _run_pipeline(
+    app: App,
+    data_set_ids: List[str],
+    dry_run: bool,
+    max_workers: int,
+    force: bool,
+) -> List[UpdateDataSetResult]:
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+    from dbt_quicksight_lineage.core.async_app import (
+        AsyncApp,
+        PipelineOptions,
+        ThreadedQuickSightClient,
+    )
+    # the client keeps the rate limiter, describe cache and snapshot set up by requires
+    async_app = AsyncApp(
+        manifest=app.manifest,
+        quicksight_client=ThreadedQuickSightClient(app.quicksight_client),
+        aws_account_id=app.aws_account_id,
+        options=PipelineOptions(describe_concurrency=max_workers, update_concurrency=max_workers),
+    )
+    return asyncio.run(async_app.update_data_sets(data_set_ids, dry_run=dry_run, force=force))
+
+
+def _echo_update_results(results: List[UpdateDataSetResult]) -> int:
+    for result in results:
+        if result.succeeded:
+            click.echo(f"{result.status}: {result.data_set_id}")
+            if result.status == 'dry_run':
+                click.echo(json.dumps(
+                    result.update_data_set_input, indent=2, default=str, ensure_ascii=False))
+        else:
+            click.echo(f"{result.status}: {result.data_set_id}: {result.error}", err=True)
+    failed = sum(1 for result in results if not result.succeeded)
+    unchanged = sum(1 for result in results if result.status == 'unchanged')
+    click.echo(
+        f"{len(results) - failed - unchanged} succeeded, {unchanged} unchanged, {failed} failed")
+    return failed
+
+
+@dbt_quicksight_lineage.command()
+@click.pass_context
+@click.option(
+    "--snapshot-dir",
+    type=click.Path(file_okay=False),
+    help="Directory to write the snapshot",
+    required=True,
+)
+@click.option(
+    "--data-set-id",
+    "data_set_ids",
+    type=str,
+    multiple=True,
+    help="QuickSight DataSet ID to export, all DataSets of the account if not given",
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Number of DataSets described concurrently",
+)
+@requires.quicksight_client(snapshot=False)
+def export(
+    ctx: click.Context,
+    snapshot_dir: str,
+    data_set_ids: Tuple[str, ...],
+    max_workers: int,
+    **_kwargs,
+):
+    """Export QuickSight DataSet definitions to a local snapshot directory"""
+    # pylint: disable=import-outside-toplevel
+    import boto3
+    from dbt_quicksight_lineage.core.snapshot import SnapshotStore, export_data_sets
+    with profiling.phase(profiling.PHASE_ACCOUNT_RESOLUTION):
+        aws_account_id = boto3.client('sts').get_caller_identity().get('Account')
+    click.echo(f"Export DataSets on {aws_account_id} to {snapshot_dir}")
+    result = export_data_sets(
+        ctx.obj['quicksight_client'],
+        aws_account_id,
+        SnapshotStore(snapshot_dir),
+        data_set_ids=list(data_set_ids) or None,
+        max_workers=max_workers,
+    )
+    for data_set_id, error in result.errors.items():
+        click.echo(f"failed: {data_set_id}: {error}", err=True)
+    click.echo(f"{len(result.digests)} DataSets exported, {len(result.errors)} failed")
+    if result.errors:
+        ctx.exit(1)
+
+
+@dbt_quicksight_lineage.command(name="import")
+@click.option(
+    "--snapshot-dir",
+    type=click.Path(file_okay=False),
+    help="Directory to write the snapshot",
+    required=True,
+)
+@click.argument(
+    "paths",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+)
+def import_(snapshot_dir: str, paths: Tuple[str, ...]):
+    """Import DescribeDataSet output JSON files to a snapshot directory
+
+    the files are outputs of e.g. `aws quicksight describe-data-set`
+    """
+    # pylint: disable=import-outside-toplevel
+    from dbt_quicksight_lineage.core.snapshot import SnapshotStore, import_describe_data_set_outputs
+    try:
+        digests = import_describe_data_set_outputs(SnapshotStore(snapshot_dir), list(paths))
+    except ValueError as ex:
+        raise click.UsageError(str(ex)) from ex
+    click.echo(f"{len(digests)} DataSets imported to {snapshot_dir}")
+
+
+@dbt_quicksight_lineage.command()
+@click.pass_context
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_POLL_INTERVAL,
+    show_default=True,
+    help="Seconds between polls of the manifest and project files",
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_DEBOUNCE,
+    show_default=True,
+    help="Seconds files must stay unchanged before a batch starts",
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Number of DataSets updated concurrently",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Dry run",
+)
+@requires.dbt_manifest(quicksight_only=True)
+@requires.quicksight_client
+def watch(
+    ctx: click.Context,
+    interval: float,
+    debounce: float,
+    max_workers: int,
+    dry_run: bool,
+    **_kwargs,
+):
+    """Watch DBT manifest or project, and update DataSets whose models changed"""
+    app = App(
+        manifest=ctx.obj.pop('manifest'),
+        quicksight_client=ctx.obj.get('quicksight_client'),
+        aws_account_id=ctx.obj.get('aws_account_id'),
+    )
+    loader = ctx.obj['manifest_loader']
+    file_watcher = FileWatcher(loader.input_paths, interval=interval, debounce=debounce)
+    watcher = ManifestWatcher(
+        app,
+        loader,
+        file_watcher=file_watcher,
+        dry_run=dry_run,
+        max_workers=max_workers,
+    )
+
+    def on_batch(batch: WatchBatch) -> None:
+        click.echo(f"{len(batch.changed_paths)} files changed")
+        if batch.error is not None:
+            click.echo(f"cannot reload manifest: {batch.error}", err=True)
+            return
+        if not batch.data_set_ids:
+            click.echo("no DataSets affected")
+            return
+        if batch.retried_data_set_ids:
+            click.echo(f"retry {len(batch.retried_data_set_ids)} DataSets failed in the last batch")
+        for result in batch.results:
+            if result.succeeded:
+                click.echo(f"{result.status}: {result.data_set_id}")
+            else:
+                click.echo(f"{result.status}: {result.data_set_id}: {result.error}", err=True)
+
+    click.echo(
+        f"Watching {len(loader.input_paths())} files for DataSets on {app.aws_account_id}, "
+        "Ctrl-C to stop"
+    )
+    try:
+        watcher.run(on_batch)
+    except KeyboardInterrupt:
+        click.echo("stopped")
+
+
+@dbt_quicksight_lineage.command()
+@click.pass_context
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    show_default=True,
+    help="Host to listen on",
+)
+@click.option(
+    "--port",
+    type=click.IntRange(min=0, max=65535),
+    default=8484,
+    show_default=True,
+    help="Port to listen on",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Listen on the Unix socket instead of TCP",
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Number of requests handled concurrently",
+)
+@click.option(
+    "--token",
+    type=str,
+    envvar="DBT_QUICKSIGHT_LINEAGE_TOKEN",
+    help="Token required as `Authorization: Bearer TOKEN`, generated and printed if not set",
+)
+@requires.dbt_manifest(quicksight_only=True)
+@requires.quicksight_client
+# click passes each option of the command as an argument
+def serve(  # pylint: disable=too-many-arguments
+    ctx: click.Context,
+    host: str,
+    port: int,
+    socket_path: Optional[str],
+    max_workers: int,
+    token: Optional[str],
+    **_kwargs,
+):
+    """Serve plan, dry-run and update of DataSets over local HTTP with the manifest loaded once"""
+    # pylint: disable=import-outside-toplevel
+    from dbt_quicksight_lineage.core.server import (
+        LineageHTTPServer,
+        LineageService,
+        LineageUnixServer,
+    )
+    app = App(
+        manifest=ctx.obj.pop('manifest'),
+        quicksight_client=ctx.obj.get('quicksight_client'),
+        aws_account_id=ctx.obj.get('aws_account_id'),
+    )
+    service = LineageService(app, ctx.obj['manifest_loader'], token=token)
+    if socket_path is not None:
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.remove(socket_path)
+        server = LineageUnixServer(socket_path, service, max_workers=max_workers)
+        address = f"unix:{socket_path}"
+    else:
+        server = LineageHTTPServer((host, port), service, max_workers=max_workers)
+        address = f"http://{host}:{server.server_address[1]}"
+    click.echo(f"Serving DataSets on {app.aws_account_id} at {address}, Ctrl-C to stop")
+    if token is None:
+        click.echo(f"Token: {service.token}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("stopped")
+    finally:
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -1,14 +1,39 @@
 """This module contains decorators for CLI commands that require wrappers"""
 from typing import Any, Dict, Optional
-from functools import update_wrapper
+from functools import partial, update_wrapper
 from pathlib import Path
 import click
-from ruamel import yaml
-from dbt_quicksight_lineage.core import ManifestLoader
+from dbt_quicksight_lineage.core import ManifestLoader, profiling
+from dbt_quicksight_lineage.core.dbt import DEFAULT_MANIFEST_CACHE_MAX_ENTRIES, ManifestCache
+from dbt_quicksight_lineage.core.cache import (
+    DEFAULT_DESCRIBE_CACHE_MAX_BYTES,
+    DEFAULT_DESCRIBE_CACHE_TTL,
+    CachingQuickSightClient,
+    DescribeDataSetCache,
+)
+from dbt_quicksight_lineage.core.ratelimit import (
+    DEFAULT_DESCRIBE_RATE,
+    DEFAULT_UPDATE_RATE,
+    RateLimitedQuickSightClient,
+)
+from dbt_quicksight_lineage.core.snapshot import SnapshotQuickSightClient, SnapshotStore
 
 
-def dbt_manifest(func):
-    """Decorator for CLI commands that require a dbt manifest"""
+def _update_command_wrapper(wrapper, func):
+    # update_wrapper copies __dict__ of func, keep options of both wrapper and func
+    params = getattr(wrapper, '__click_params__', [])
+    update_wrapper(wrapper, func)
+    wrapper.__click_params__ = getattr(func, '__click_params__', []) + params
+    return wrapper
+
+
+def dbt_manifest(func=None, *, quicksight_only: bool = False):
+    """
+    Decorator for CLI commands that require a dbt manifest
+    with quicksight_only, --slim-manifest keeps only models with meta.quicksight
+    """
+    if func is None:
+        return partial(dbt_manifest, quicksight_only=quicksight_only)
 
     @click.option(
         "--manifest-path",
@@ -43,6 +68,29 @@ def dbt_manifest(func):
         type=str,
         help="JSON string of variables to pass to dbt",
     )
+    @click.option(
+        "--slim-manifest",
+        is_flag=True,
+        help=(
+            "Read only models needed by QuickSight from manifest.json "
+            "without loading full dbt Manifest"
+        ),
+    )
+    @click.option(
+        "--manifest-cache-dir",
+        type=click.Path(file_okay=False),
+        help=(
+            "Directory to cache loaded dbt manifest, reused while inputs are unchanged. "
+            "Entries are Python pickles, use a directory only you can write to"
+        ),
+    )
+    @click.option(
+        "--manifest-cache-max-entries",
+        type=click.IntRange(min=1),
+        default=DEFAULT_MANIFEST_CACHE_MAX_ENTRIES,
+        show_default=True,
+        help="Number of most recently used manifests kept in --manifest-cache-dir",
+    )
     def wrapper(*args, **kwargs):
         ctx = args[0]
         assert isinstance(ctx, click.Context)
@@ -50,8 +98,18 @@ def dbt_manifest(func):
         cli_vars_str = kwargs.get('vars')
         cli_vars: Optional[Dict[str, Any]] = None
         if cli_vars_str is not None:
+            from ruamel import yaml  # pylint: disable=import-outside-toplevel
             cli_vars = yaml.safe_load(cli_vars_str)
 
+        manifest_cache: Optional[ManifestCache] = None
+        if kwargs.get('manifest_cache_dir') is not None:
+            manifest_cache = ManifestCache(
+                cache_dir=kwargs['manifest_cache_dir'],
+                max_entries=kwargs.get(
+                    'manifest_cache_max_entries',
+                    DEFAULT_MANIFEST_CACHE_MAX_ENTRIES,
+                ),
+            )
         loader = ManifestLoader(
             manifest_path=kwargs.get('manifest_path'),
             project_dir=kwargs.get('project_dir'),
@@ -59,9 +117,14 @@ def dbt_manifest(func):
             profile=kwargs.get('profile'),
             target=kwargs.get('target'),
             cli_vars=cli_vars,
+            cache=manifest_cache,
+            slim=kwargs.get('slim_manifest', False),
+            quicksight_only=quicksight_only,
         )
+        ctx.obj['manifest_loader'] = loader
         try:
-            ctx.obj['manifest'] = loader.load_manifest()
+            with profiling.phase(profiling.PHASE_MANIFEST_LOAD):
+                ctx.obj['manifest'] = loader.load_manifest()
         except ValueError as ex:
             click.echo(
                 f"cannot load manifest, check --manifest-path flag: {ex}",
@@ -69,4 +132,96 @@ def dbt_manifest(func):
             )
             raise click.Abort()
         return func(*args, **kwargs)
-    return update_wrapper(wrapper, func)
+    return _update_command_wrapper(wrapper, func)
+
+
+def quicksight_client(func=None, *, snapshot: bool = True):
+    """
+    Decorator for CLI commands that call QuickSight API
+    it sets up QuickSight client with rate limiter and describe cache
+    with snapshot, --snapshot-dir replaces QuickSight API with a local snapshot
+    """
+    if func is None:
+        return partial(quicksight_client, snapshot=snapshot)
+
+    @click.option(
+        "--describe-rate",
+        type=click.FloatRange(min=0, min_open=True),
+        default=DEFAULT_DESCRIBE_RATE,
+        show_default=True,
+        help=(
+            "Max DescribeDataSet and ListDataSets calls per second, "
+            "lowered automatically when throttled"
+        ),
+    )
+    @click.option(
+        "--update-rate",
+        type=click.FloatRange(min=0, min_open=True),
+        default=DEFAULT_UPDATE_RATE,
+        show_default=True,
+        help="Max UpdateDataSet calls per second, lowered automatically when throttled",
+    )
+    @click.option(
+        "--describe-cache-dir",
+        type=click.Path(file_okay=False),
+        help=(
+            "Directory to cache DescribeDataSet responses, "
+            "reused while LastUpdatedTime is unchanged"
+        ),
+    )
+    @click.option(
+        "--describe-cache-ttl",
+        type=click.IntRange(min=0),
+        default=DEFAULT_DESCRIBE_CACHE_TTL,
+        show_default=True,
+        help="Seconds to keep cached DescribeDataSet responses",
+    )
+    @click.option(
+        "--describe-cache-max-size",
+        type=click.IntRange(min=0),
+        default=DEFAULT_DESCRIBE_CACHE_MAX_BYTES // (1024 * 1024),
+        show_default=True,
+        help="Max total size of cached DescribeDataSet responses in MiB",
+    )
+    def wrapper(*args, **kwargs):
+        ctx = args[0]
+        assert isinstance(ctx, click.Context)
+        ctx.obj = ctx.obj or {}
+        snapshot_dir = kwargs.get('snapshot_dir')
+        if snapshot_dir is not None:
+            # commands which update DataSets take --dry-run, the snapshot is read only
+            if kwargs.get('dry_run') is False:
+                raise click.UsageError("--snapshot-dir is read only, use it with --dry-run")
+            store = SnapshotStore(snapshot_dir)
+            try:
+                ctx.obj['aws_account_id'] = store.default_aws_account_id()
+            except ValueError as ex:
+                raise click.UsageError(str(ex)) from ex
+            ctx.obj['quicksight_client'] = SnapshotQuickSightClient(store)
+            return func(*args, **kwargs)
+        client = RateLimitedQuickSightClient.from_boto3(
+            describe_rate=kwargs['describe_rate'],
+            update_rate=kwargs['update_rate'],
+        )
+        cache_dir = kwargs.get('describe_cache_dir')
+        if cache_dir is not None:
+            client = CachingQuickSightClient(
+                client,
+                DescribeDataSetCache(
+                    cache_dir,
+                    ttl=kwargs['describe_cache_ttl'],
+                    max_bytes=kwargs['describe_cache_max_size'] * 1024 * 1024,
+                ),
+            )
+        ctx.obj['quicksight_client'] = client
+        return func(*args, **kwargs)
+    if snapshot:
+        wrapper = click.option(
+            "--snapshot-dir",
+            type=click.Path(exists=True, file_okay=False),
+            help=(
+                "Read DataSets from the snapshot directory written by export or import, "
+                "instead of QuickSight API"
+            ),
+        )(wrapper)
+    return _update_command_wrapper(wrapper, func)
@@ -2,5 +2,18 @@
 # SPDX-FileCopyrightText: 2023-present mashiike <ikeda-masashi@kayac.com>
 #
 # SPDX-License-Identifier: MIT
+from typing import TYPE_CHECKING
 from .dbt import ManifestLoader
 from .app import App, DataSet
+if TYPE_CHECKING:
+    from .async_app import AsyncApp
+
+__all__ = ['ManifestLoader', 'App', 'DataSet', 'AsyncApp']
+
+
+def __getattr__(name: str):
+    # asyncio is not needed by CLI commands, import AsyncApp on first access
+    if name == 'AsyncApp':
+        from .async_app import AsyncApp  # pylint: disable=import-outside-toplevel
+        return AsyncApp
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,17 +1,27 @@
 """dbt_quicksight_lineage.core.app is application core logic"""
+import contextvars
+import copy
+import io
 import logging
 import json
 import os
-from typing import Iterator, Optional, Any, Dict, Tuple
-import boto3
-from ruamel import yaml
-from dbt.contracts.graph.manifest import Manifest, ManifestNode
-from dbt_quicksight_lineage.core.quicksight import DataSet, PhysicalTable
-from dbt_quicksight_lineage.core.dbt import ManifestNodeExplorer
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, Optional, Any, Dict, List, Tuple, Union
+from dbt_quicksight_lineage.core.quicksight import DataSet, PhysicalTable, list_data_set_ids
+from dbt_quicksight_lineage.core.reconcile import ColumnState
+from dbt_quicksight_lineage.core.dbt import ManifestNodeExplorer, ModelIndex, SlimManifest
+from dbt_quicksight_lineage.core import profiling, tracing
+from dbt_quicksight_lineage.core.fileutil import atomic_write
+if TYPE_CHECKING:
+    from dbt.contracts.graph.manifest import Manifest, ManifestNode
+    from ruamel.yaml import CommentedMap
 logger = logging.getLogger()
 
+DEFAULT_MAX_WORKERS = 8
 
-def _insert_meta(target: yaml.CommentedMap) -> None:
+
+def _insert_meta(target: 'CommentedMap') -> None:
     name_pos: Optional[int] = None
     description_pos: Optional[int] = None
     last_pos: int = 0
@@ -31,23 +41,213 @@ def _insert_meta(target: yaml.CommentedMap) -> None:
     target.insert(insert_pos, 'meta', {})
 
 
+def _schema_file_path(node: 'ManifestNode', project_dir: Optional[str] = None) -> str:
+    package_name, schema_file_path = node.patch_path.split("://")
+    if project_dir is not None:
+        schema_file_path = os.path.join(project_dir, schema_file_path)
+    logger.debug(
+        "target project: %s schema file path: %s",
+        package_name,
+        schema_file_path,
+    )
+    return schema_file_path
+
+
+def _index_by_name(items: List[Any]) -> Dict[Any, List[Any]]:
+    index: Dict[Any, List[Any]] = {}
+    for item in items:
+        index.setdefault(item.get('name'), []).append(item)
+    return index
+
+
+def _merge_meta(target: 'CommentedMap', meta_patch: Dict[str, Any]) -> None:
+    meta = target.get('meta')
+    if meta is None:
+        _insert_meta(target)
+        meta = {}
+    meta.update(meta_patch)
+    target['meta'] = meta
+
+
+def _merge_schema(schema: 'CommentedMap', patches: List[Dict[str, Any]]) -> None:
+    # yaml marge: same name in list, overwrite
+    models = _index_by_name(schema['models'])
+    for generated_schema in patches:
+        for schema_model in generated_schema['models']:
+            for model in models.get(schema_model['name'], []):
+                _merge_model(model, schema_model)
+
+
+def _merge_model(model: 'CommentedMap', schema_model: Dict[str, Any]) -> None:
+    # meta is merged, description is kept if the model already has one
+    _merge_meta(model, schema_model.get('meta', {}))
+    columns = _index_by_name(model.get('columns') or [])
+    for column in schema_model.get('columns', []):
+        for target_column in columns.get(column['name'], []):
+            _merge_meta(target_column, column.get('meta', {}))
+            if 'description' in column and 'description' not in target_column:
+                target_column['description'] = column['description']
+
+
+def _collect_schema_patches(
+        data_set_ids: List[str],
+        futures: List[Future],
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Exception]]:
+    """
+    group the schema patches planned for each data set by schema file,
+    failed data sets are returned as errors instead of raising
+    """
+    schema_patches: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, Exception] = {}
+    for data_set_id, future in zip(data_set_ids, futures):
+        try:
+            data_set_patches = future.result()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.error("init DataSet %s failed: %s", data_set_id, ex)
+            errors[data_set_id] = ex
+            continue
+        for schema_file_path, patches in data_set_patches.items():
+            schema_patches.setdefault(schema_file_path, []).extend(patches)
+    return schema_patches, errors
+
+
+def _share_data_set_references(schema_patches: Dict[str, List[Dict[str, Any]]]) -> None:
+    # a model used by many data sets gets a patch from each of them,
+    # let them share one data_sets list so that the merged meta refers all of them
+    for patches in schema_patches.values():
+        references: Dict[str, List[Dict[str, Any]]] = {}
+        for generated_schema in patches:
+            for model in generated_schema['models']:
+                quicksight = model.get('meta', {}).get('quicksight', {})
+                shared = references.setdefault(model['name'], [])
+                for reference in quicksight.get('data_sets', []):
+                    if reference not in shared:
+                        shared.append(reference)
+                quicksight['data_sets'] = shared
+
+
+def _write_schema_patches(
+    schema_file_path: str,
+    patches: List[Dict[str, Any]],
+) -> 'UpdateSchemaFileResult':
+    """
+    merge generated schema dicts into the schema file.
+    the merged schema is rendered in memory, and the file is replaced atomically
+    only when the content differs, so that mtime is kept for dbt partial parsing
+    """
+    from ruamel import yaml  # pylint: disable=import-outside-toplevel
+    yaml_handler = yaml.YAML()
+    yaml_handler.indent(mapping=2, sequence=4, offset=2)
+    yaml_handler.width = 800
+    yaml_handler.preserve_quotes = True
+    yaml_handler.default_flow_style = False
+
+    with open(schema_file_path, 'r', encoding='utf-8') as f:
+        current = f.read()
+    schema = yaml_handler.load(current)
+    _merge_schema(schema, patches)
+    stream = io.StringIO()
+    yaml_handler.dump(schema, stream)
+    rendered = stream.getvalue()
+    # a model used by many data sets has a patch from each of them
+    models = len({
+        schema_model['name']
+        for generated_schema in patches
+        for schema_model in generated_schema['models']
+    })
+    if rendered == current:
+        logger.info("schema yaml is up to date: %s", schema_file_path)
+        return UpdateSchemaFileResult(path=schema_file_path, status='unchanged', models=models)
+    atomic_write(schema_file_path, lambda f: f.write(rendered.encode('utf-8')), copy_mode=True)
+    logger.info("updated schema yaml: %s (%d models)", schema_file_path, models)
+    return UpdateSchemaFileResult(path=schema_file_path, status='updated', models=models)
+
+
+def parse_describe_data_set_output(output: Dict[str, Any]) -> DataSet:
+    """check DescribeDataSet output and return DataSet"""
+    if output.get('Status') != 200:
+        raise ValueError(
+            f'describe data set failed status: {output.get("Status")}')
+    data_set = DataSet(output.get('DataSet'))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(data_set.to_json())
+    logger.info("DataSet Name: %s", data_set.get('Name'))
+    return data_set
+
+
+def check_update_data_set_output(output: Dict[str, Any]) -> None:
+    """check UpdateDataSet output status"""
+    if output.get('Status') != 200:
+        raise ValueError(
+            f'update data set failed status: {output.get("Status")}')
+
+
+@dataclass
+class UpdateDataSetResult:
+    """UpdateDataSetResult is the result of update data set operation for one data set"""
+
+    data_set_id: str
+    status: str  # 'updated', 'dry_run', 'unchanged' or 'failed'
+    output: Optional[Any] = None
+    update_data_set_input: Optional[Dict[str, Any]] = None
+    error: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        """return True if update data set operation is succeeded"""
+        return self.error is None
+
+
+@dataclass
+class UpdateSchemaFileResult:
+    """UpdateSchemaFileResult is the result of init operation for one schema file"""
+
+    path: str
+    status: str  # 'updated' or 'unchanged'
+    models: int = 0  # distinct models merged into the file
+
+
+@dataclass
+class InitResult:
+    """InitResult is the result of init operation for many data sets"""
+
+    data_set_ids: List[str]
+    schema_files: List[UpdateSchemaFileResult]
+    errors: Dict[str, Exception]
+
+
+def _slim_manifest(manifest: Union['Manifest', SlimManifest]) -> SlimManifest:
+    """
+    keep only the model records App reads,
+    so the full dbt Manifest can be released once App is built
+    """
+    if isinstance(manifest, SlimManifest):
+        return manifest
+    return SlimManifest.from_manifest(manifest)
+
+
 class App:
     """App represents dbt_quicksight_lineage application"""
 
     def __init__(
         self,
-        manifest: Manifest,
+        manifest: Union['Manifest', SlimManifest],
         quicksight_client: Any = None,
         aws_account_id: Optional[str] = None,
     ) -> None:
-        self.manifest = manifest
+        self.manifest = _slim_manifest(manifest)
+        self.model_index = ModelIndex.from_manifest(self.manifest)
+        if quicksight_client is None or aws_account_id is None:
+            # boto3 takes long time to import, load it only when AWS client is needed
+            import boto3  # pylint: disable=import-outside-toplevel
         if quicksight_client is None:
             self.quicksight_client = boto3.client('quicksight')
         else:
             self.quicksight_client = quicksight_client
         if aws_account_id is None:
-            self.aws_account_id = boto3.client(
-                'sts').get_caller_identity().get('Account')
+            with profiling.phase(profiling.PHASE_ACCOUNT_RESOLUTION):
+                self.aws_account_id = boto3.client(
+                    'sts').get_caller_identity().get('Account')
         else:
             self.aws_account_id = aws_account_id
 
@@ -56,108 +256,288 @@ class App:
             data_set_id: str,
             data_source_arn: Optional[str] = None,
             project_dir: Optional[str] = None,
-    ) -> None:
+    ) -> List[UpdateSchemaFileResult]:
         """
             execute init operation
             download info from data set and write modify schema.yaml
+            schema files whose content is not changed are not written
         """
-        output = self.quicksight_client.describe_data_set(
-            AwsAccountId=self.aws_account_id,
-            DataSetId=data_set_id,
-        )
-        if output.get('Status') != 200:
-            raise ValueError(
-                f'describe data set failed status: {output.get("Status")}')
-        data_set = DataSet(output.get('DataSet'))
-        logger.debug(data_set.to_json())
-        logger.info("DataSet Name: %s", data_set.get('Name'))
-        for physical_table, node in self._detect_related_nodes(data_set, data_source_arn):
-            self._update_schema_yaml(
-                data_set,
-                physical_table.physical_table_id,
-                node,
-                project_dir,
-            )
+        schema_patches = self._plan_init(data_set_id, data_source_arn, project_dir)
+        with profiling.phase(profiling.PHASE_SCHEMA_UPDATE):
+            return [
+                _write_schema_patches(schema_file_path, patches)
+                for schema_file_path, patches in schema_patches.items()
+            ]
+
+    def init_all(
+            self,
+            data_source_arn: Optional[str] = None,
+            project_dir: Optional[str] = None,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> InitResult:
+        """
+            execute init operation for all data sets of the account.
+            data sets are described concurrently, and the schema dicts of all of them
+            are merged into each schema file at once.
+            failure of one data set does not abort the others
+        """
+        data_set_ids = self.list_data_set_ids()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                # each task runs in a copy of the context, so trace spans have their parent
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._plan_init,
+                    data_set_id,
+                    data_source_arn,
+                    project_dir,
+                )
+                for data_set_id in data_set_ids
+            ]
+        schema_patches, errors = _collect_schema_patches(data_set_ids, futures)
+        _share_data_set_references(schema_patches)
+        with profiling.phase(profiling.PHASE_SCHEMA_UPDATE):
+            schema_files = [
+                _write_schema_patches(schema_file_path, patches)
+                for schema_file_path, patches in schema_patches.items()
+            ]
+        return InitResult(data_set_ids=data_set_ids, schema_files=schema_files, errors=errors)
+
+    def list_data_set_ids(self) -> List[str]:
+        """page through ListDataSets and return all data set ids of the account"""
+        return list_data_set_ids(self.quicksight_client, self.aws_account_id)
+
+    def _plan_init(
+            self,
+            data_set_id: str,
+            data_source_arn: Optional[str] = None,
+            project_dir: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        data_set = self.describe_data_set(data_set_id)
+        with profiling.phase(profiling.PHASE_MODEL_MATCHING):
+            related_nodes = list(self._detect_related_nodes(data_set, data_source_arn))
+        with profiling.phase(profiling.PHASE_SCHEMA_UPDATE):
+            return self._plan_schema_patches(data_set, related_nodes, project_dir)
 
     def update_data_set(
             self,
             data_set_id: str,
             dry_run: bool = False,
+            force: bool = False,
     ) -> Tuple[Optional[Any], Dict[str, Any]]:
-        """execute update data set operation"""
-        output = self.quicksight_client.describe_data_set(
-            AwsAccountId=self.aws_account_id,
-            DataSetId=data_set_id,
+        """
+            execute update data set operation
+            UpdateDataSet API is skipped when the data set is already up to date,
+            unless force is True
+        """
+        result = self.run_update_data_set(data_set_id, dry_run, force)
+        return result.output, result.update_data_set_input
+
+    def run_update_data_set(
+            self,
+            data_set_id: str,
+            dry_run: bool = False,
+            force: bool = False,
+    ) -> UpdateDataSetResult:
+        """execute update data set operation and return UpdateDataSetResult"""
+        data_set = self.describe_data_set(data_set_id)
+        update_data_set_input, changed = self.plan_update_data_set_changes(data_set)
+        if not changed and not force:
+            logger.info("DataSet is up to date: %s", data_set_id)
+            return UpdateDataSetResult(
+                data_set_id=data_set_id,
+                status='unchanged',
+                update_data_set_input=update_data_set_input,
+            )
+        if dry_run:
+            return UpdateDataSetResult(
+                data_set_id=data_set_id,
+                status='dry_run',
+                update_data_set_input=update_data_set_input,
+            )
+        with tracing.span(
+                tracing.SPAN_UPDATE_DATA_SET, data_set_id=data_set_id, retries=0) as span, \
+                profiling.phase(profiling.PHASE_UPDATE):
+            span.set_payload_size(update_data_set_input)
+            output = self.quicksight_client.update_data_set(
+                **update_data_set_input
+            )
+        check_update_data_set_output(output)
+        logger.info("Update DataSet: %s", data_set_id)
+        logger.debug(json.dumps(output, indent=2, default=str))
+        return UpdateDataSetResult(
+            data_set_id=data_set_id,
+            status='updated',
+            output=output,
+            update_data_set_input=update_data_set_input,
         )
-        if output.get('Status') != 200:
-            raise ValueError(
-                f'describe data set failed status: {output.get("Status")}')
-        data_set = DataSet(output.get('DataSet'))
-        logger.debug(data_set.to_json())
-        logger.info("DataSet Name: %s", data_set.get('Name'))
 
-        for physical_table, node in self._detect_modify_target(data_set):
-            logger.debug(
-                "detect PhysicalTableId: %s, Node: %s",
-                physical_table.physical_table_id,
-                node.unique_id,
+    def describe_data_set(
+            self,
+            data_set_id: str,
+    ) -> DataSet:
+        """describe data set and return it as DataSet"""
+        with tracing.span(
+                tracing.SPAN_DESCRIBE_DATA_SET, data_set_id=data_set_id, retries=0) as span, \
+                profiling.phase(profiling.PHASE_DESCRIBE):
+            output = self.quicksight_client.describe_data_set(
+                AwsAccountId=self.aws_account_id,
+                DataSetId=data_set_id,
+            )
+            span.set_payload_size(output)
+        return parse_describe_data_set_output(output)
+
+    def plan_update_data_set(
+            self,
+            data_set: DataSet,
+    ) -> Dict[str, Any]:
+        """
+            modify data set from manifest and return UpdateDataSet input
+            this is local operation, QuickSight API is not called
+        """
+        with profiling.phase(profiling.PHASE_MODEL_MATCHING):
+            targets = list(self._detect_modify_target(data_set))
+        with profiling.phase(profiling.PHASE_LOGICAL_TABLE_MODIFICATION):
+            for physical_table, node in targets:
+                logger.debug(
+                    "detect PhysicalTableId: %s, Node: %s",
+                    physical_table.physical_table_id,
+                    node.unique_id,
+                )
+                with tracing.span(
+                    tracing.SPAN_MODIFY_LOGICAL_TABLE,
+                    data_set_id=data_set.data_set_id,
+                    physical_table_id=physical_table.physical_table_id,
+                    model_unique_id=node.unique_id,
+                ):
+                    self._modify_logical_table(
+                        data_set,
+                        physical_table,
+                        node,
+                    )
+        with profiling.phase(profiling.PHASE_INPUT_GENERATION):
+            update_data_set_input = data_set.generate_update_data_set_input(
+                self.aws_account_id
             )
-            self._modify_logical_table(
-                data_set,
-                physical_table,
-                node,
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(update_data_set_input,
+                         indent=2, default=str, ensure_ascii=False))
+        return update_data_set_input
+
+    def plan_update_data_set_changes(
+            self,
+            data_set: DataSet,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+            same as plan_update_data_set, and also return whether UpdateDataSet input
+            differs from the described data set normalized in the same way
+        """
+        with profiling.phase(profiling.PHASE_INPUT_GENERATION):
+            current_input = data_set.generate_update_data_set_input(self.aws_account_id)
+            # only logical tables are modified in place, the rest of the input is built fresh
+            current_input['LogicalTableMap'] = copy.deepcopy(current_input['LogicalTableMap'])
+        update_data_set_input = self.plan_update_data_set(data_set)
+        return update_data_set_input, update_data_set_input != current_input
+
+    def update_data_sets(
+            self,
+            data_set_ids: List[str],
+            dry_run: bool = False,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            force: bool = False,
+    ) -> List[UpdateDataSetResult]:
+        """
+            execute update data set operation for many data sets concurrently
+            failure of one data set does not abort the others.
+            results are returned in the same order as data_set_ids
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._try_update_data_set,
+                    data_set_id,
+                    dry_run,
+                    force,
+                )
+                for data_set_id in data_set_ids
+            ]
+            return [future.result() for future in futures]
+
+    def _try_update_data_set(
+            self,
+            data_set_id: str,
+            dry_run: bool = False,
+            force: bool = False,
+    ) -> UpdateDataSetResult:
+        try:
+            return self.run_update_data_set(data_set_id, dry_run, force)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.error("update data set %s failed: %s", data_set_id, ex)
+            return UpdateDataSetResult(
+                data_set_id=data_set_id,
+                status='failed',
+                error=ex,
             )
-        update_data_set_input = data_set.generate_update_data_set_input(
-            self.aws_account_id
+
+    def find_data_set_ids(self) -> List[str]:
+        """return data set ids referenced by meta.quicksight.data_sets of models"""
+        return self.model_index.data_set_ids
+
+    def with_manifest(
+            self,
+            manifest: Union['Manifest', SlimManifest],
+    ) -> 'App':
+        """return new App of the manifest which shares QuickSight client and AWS account id"""
+        return App(
+            manifest=manifest,
+            quicksight_client=self.quicksight_client,
+            aws_account_id=self.aws_account_id,
         )
-        logger.debug(json.dumps(update_data_set_input,
-                     indent=2, default=str, ensure_ascii=False))
-        if dry_run:
-            return None, update_data_set_input
-        output = self.quicksight_client.update_data_set(
-            **update_data_set_input
+
+    def reload_manifest(
+            self,
+            manifest: Union['Manifest', SlimManifest],
+    ) -> List[str]:
+        """
+            replace the manifest and return data set ids whose referring models changed,
+            QuickSight client and AWS account id are kept
+        """
+        manifest = _slim_manifest(manifest)
+        model_index = ModelIndex.from_manifest(manifest)
+        changed_data_set_ids = model_index.changed_data_set_ids(self.model_index)
+        self.manifest = manifest
+        self.model_index = model_index
+        return changed_data_set_ids
+
+    def find_changed_data_set_ids(
+            self,
+            previous_manifest: Union['Manifest', SlimManifest],
+    ) -> List[str]:
+        """
+            return data set ids whose referring models changed since previous_manifest,
+            the manifest of the previous run
+        """
+        return self.model_index.changed_data_set_ids(
+            ModelIndex.from_manifest(previous_manifest)
         )
-        if output.get('Status') != 200:
-            raise ValueError(
-                f'update data set failed status: {output.get("Status")}')
-        logger.info("Update DataSet: %s", data_set_id)
-        logger.debug(json.dumps(output, indent=2, default=str))
-        return output, update_data_set_input
 
     def _find_models(
             self,
-    ) -> Iterator[ManifestNode]:
-        for node in self.manifest.nodes.values():
-            if node.resource_type != 'model':
-                continue
-            if node.language != 'sql':
-                continue
-            yield node
+    ) -> Iterator['ManifestNode']:
+        return iter(self.model_index.models)
 
     def _find_models_by_data_set(
             self,
             data_set_id: str,
             data_source_arn: Optional[str] = None
-    ) -> Iterator[ManifestNode]:
-        for node in self._find_models():
-            data_sets = node.meta.get('quicksight', {}).get('data_sets', [])
-            for target in data_sets:
-                logger.debug(
-                    "model: %s data_set: %s",
-                    node.unique_id,
-                    target.get('id'),
-                )
-                if target.get('id') == data_set_id:
-                    if target.get('data_source') is not None:
-                        if target.get('data_source') != data_source_arn:
-                            continue
-                    yield node
-                    break
+    ) -> Iterator['ManifestNode']:
+        return self.model_index.find_by_data_set(data_set_id, data_source_arn)
 
     def _detect_modify_target(
         self,
         data_set: DataSet,
-    ) -> Iterator[Tuple[PhysicalTable, ManifestNode]]:
+    ) -> Iterator[Tuple[PhysicalTable, 'ManifestNode']]:
         data_set_id = data_set.data_set_id
         for physical_table in data_set.find_relational_table():
             data_source_arn = physical_table.data_source_arn
@@ -171,21 +551,28 @@ class App:
             )
             if data_source_arn is None or schema is None or identifier is None:
                 continue
-            for node in self._find_models_by_data_set(data_set_id, data_source_arn):
+            candidates = self.model_index.find_by_relation(schema, identifier)
+            if len(candidates) == 0:
+                continue
+            related = {
+                node.unique_id
+                for node in self._find_models_by_data_set(data_set_id, data_source_arn)
+            }
+            for node in candidates:
                 logger.debug(
                     "match check node=%s (table=%s.%s)",
                     node.unique_id,
                     schema,
                     identifier,
                 )
-                if node.schema == schema and node.alias == identifier:
+                if node.unique_id in related:
                     yield physical_table, node
 
     def _modify_logical_table(
         self,
         data_set: DataSet,
         physical_table: PhysicalTable,
-        node: ManifestNode,
+        node: 'ManifestNode',
     ) -> None:
         explorer = ManifestNodeExplorer(node)
         physical_table_id = physical_table.physical_table_id
@@ -200,73 +587,31 @@ class App:
                 field_folder['name'],
                 field_folder.get('description')
             )
+        columns: List[ColumnState] = []
         for column_name in explorer.column_names:
-            if not data_set.physical_column_contains(
-                physical_table_id,
-                column_name,
-            ):
+            if not physical_table.column_contains(column_name):
                 logger.warning(
                     "column %s defined in dbt schema. but not found in physical table %s",
                     column_name,
                     physical_table_id,
                 )
                 continue
-            field_name = explorer.get_field_name(column_name)
-            if field_name is not None:
-                data_set.set_rename_column_operation(
-                    physical_table_id,
-                    column_name,
-                    field_name,
-                )
-            else:
-                data_set.remove_rename_column_operation(
-                    physical_table_id,
-                    column_name,
-                )
-            description = explorer.get_description(column_name)
-            if description is not None:
-                data_set.set_tag_column_description_operation(
-                    physical_table_id,
-                    column_name,
-                    description,
-                )
-            geograpic_role = explorer.get_geographic_role(column_name)
-            if geograpic_role is not None:
-                data_set.set_tag_column_geographic_role_operation(
-                    physical_table_id,
-                    column_name,
-                    geograpic_role,
-                )
-            data_type = explorer.get_data_type(column_name)
-            if data_type is not None:
-                data_set.set_cast_column_type_operation(
-                    physical_table_id,
-                    column_name,
-                    data_type,
-                )
-            if explorer.is_hidden(column_name):
-                data_set.remove_from_projected_columns(
-                    physical_table_id,
-                    column_name,
-                )
-            else:
-                data_set.add_to_projected_columns(
-                    physical_table_id,
-                    column_name,
-                )
-            folder = explorer.get_folder(column_name)
-            if folder is not None:
-                data_set.add_to_field_folder(
-                    physical_table_id,
-                    column_name,
-                    folder,
-                )
+            columns.append(ColumnState(
+                physical_column_name=column_name,
+                field_name=explorer.get_field_name(column_name),
+                description=explorer.get_description(column_name),
+                geographic_role=explorer.get_geographic_role(column_name),
+                data_type=explorer.get_data_type(column_name),
+                hidden=explorer.is_hidden(column_name),
+                folder=explorer.get_folder(column_name),
+            ))
+        data_set.reconcile_columns(physical_table_id, columns)
 
     def _detect_related_nodes(
         self,
         data_set: DataSet,
         data_source_arn: Optional[str] = None,
-    ) -> Iterator[Tuple[PhysicalTable, ManifestNode]]:
+    ) -> Iterator[Tuple[PhysicalTable, 'ManifestNode']]:
         """
             detect related nodes from manifest
 
@@ -294,15 +639,14 @@ class App:
             identifier = physical_table.table_name
             if schema is None or identifier is None:
                 continue
-            for node in self._find_models():
+            for node in self.model_index.find_by_relation(schema, identifier):
                 logger.debug(
-                    "match check node=%s (table=%s.%s)",
+                    "match node=%s (table=%s.%s)",
                     node.unique_id,
                     schema,
                     identifier,
                 )
-                if node.schema == schema and node.alias == identifier:
-                    yield physical_table, node
+                yield physical_table, node
 
     def _generate_schema_dict(  # pylint: disable=too-many-locals
             self,
@@ -403,59 +747,32 @@ class App:
             return {'models': [model]}
         return {'models': []}
 
-    def _update_schema_yaml(  # pylint: disable=too-many-locals
+    def _update_schema_yaml(
             self,
             data_set: DataSet,
             physical_table_id: str,
-            node: ManifestNode,
+            node: 'ManifestNode',
             project_dir: Optional[str] = None,
-    ) -> None:
-        package_name, existing_file_path = node.patch_path.split("://")
-        if project_dir is not None:
-            existing_file_path = os.path.join(project_dir, existing_file_path)
-        logger.debug(
-            "target project: %s schema file path: %s",
-            package_name,
-            existing_file_path,
-        )
-        yaml_handler = yaml.YAML()
-        yaml_handler.indent(mapping=2, sequence=4, offset=2)
-        yaml_handler.width = 800
-        yaml_handler.preserve_quotes = True
-        yaml_handler.default_flow_style = False
-
-        with open(existing_file_path, 'r', encoding='utf-8') as f:
-            schema = yaml_handler.load(f)
-        generated_schema = self._generate_schema_dict(
-            node.name,
-            data_set,
-            physical_table_id,
+    ) -> UpdateSchemaFileResult:
+        return _write_schema_patches(
+            _schema_file_path(node, project_dir),
+            [self._generate_schema_dict(node.name, data_set, physical_table_id)],
         )
 
-        # yaml marge: same name in list, overwrite
-        for schema_model in generated_schema['models']:
-            for i, model in enumerate(schema['models']):
-                if model['name'] != schema_model['name']:
-                    continue
-                meta = schema['models'][i].get('meta')
-                if meta is None:
-                    _insert_meta(schema['models'][i])
-                    meta = {}
-                meta.update(schema_model.get('meta', {}))
-                schema['models'][i]['meta'] = meta
-                for column in schema_model.get('columns', []):
-                    for j, target_column in enumerate(schema['models'][i]['columns']):
-                        if target_column['name'] != column['name']:
-                            continue
-                        meta = schema['models'][i]['columns'][j].get('meta')
-                        if meta is None:
-                            _insert_meta(schema['models'][i]['columns'][j])
-                            meta = {}
-                        meta.update(column.get('meta', {}))
-                        schema['models'][i]['columns'][j]['meta'] = meta
-                        if 'description' in column and 'description' not in target_column:
-                            schema['models'][i]['columns'][j]['description'] = column['description']
-        with open(existing_file_path, 'w', encoding='utf-8') as stream:
-            yaml_str = yaml_handler.dump(schema, stream)
-            logger.debug("updated schema yaml: %s", yaml_str)
-            logger.info("updated schema yaml: %s", existing_file_path)
+    def _plan_schema_patches(
+            self,
+            data_set: DataSet,
+            related_nodes: List[Tuple[PhysicalTable, 'ManifestNode']],
+            project_dir: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """generate schema dict of each related node and group them by schema file path"""
+        schema_patches: Dict[str, List[Dict[str, Any]]] = {}
+        for physical_table, node in related_nodes:
+            schema_patches.setdefault(_schema_file_path(node, project_dir), []).append(
+                self._generate_schema_dict(
+                    node.name,
+                    data_set,
+                    physical_table.physical_table_id,
+                )
+            )
+        return schema_patches
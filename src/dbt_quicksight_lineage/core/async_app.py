@@ -0,0 +1,232 @@
+"""dbt_quicksight_lineage.core.async_app is asyncio execution engine of application core logic"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+from dbt_quicksight_lineage.core import profiling, tracing
+from dbt_quicksight_lineage.core.dbt import SlimManifest
+from dbt_quicksight_lineage.core.ratelimit import RateLimitedQuickSightClient
+from dbt_quicksight_lineage.core.app import (
+    App,
+    UpdateDataSetResult,
+    check_update_data_set_output,
+    parse_describe_data_set_output,
+)
+if TYPE_CHECKING:
+    from dbt.contracts.graph.manifest import Manifest
+logger = logging.getLogger()
+
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_DESCRIBE_CONCURRENCY = 4
+DEFAULT_UPDATE_CONCURRENCY = 4
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class PipelineOptions:
+    """sizes of the queues and the number of workers of the AsyncApp pipeline"""
+
+    queue_size: int = DEFAULT_QUEUE_SIZE
+    describe_concurrency: int = DEFAULT_DESCRIBE_CONCURRENCY
+    update_concurrency: int = DEFAULT_UPDATE_CONCURRENCY
+
+
+@dataclass
+class _Pipeline:
+    """queues and results shared by the stages of one update_data_sets call"""
+
+    dry_run: bool
+    force: bool
+    pending: asyncio.Queue = field(default_factory=asyncio.Queue)
+    described: asyncio.Queue = field(default_factory=asyncio.Queue)
+    planned: asyncio.Queue = field(default_factory=asyncio.Queue)
+    results: Dict[str, UpdateDataSetResult] = field(default_factory=dict)
+
+
+class ThreadedQuickSightClient:
+    """
+    ThreadedQuickSightClient adapts blocking boto3 QuickSight client to async client.
+    each API call is executed in default thread pool executor.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    async def describe_data_set(self, **kwargs) -> Dict[str, Any]:
+        """call DescribeDataSet in thread"""
+        return await asyncio.to_thread(self._client.describe_data_set, **kwargs)
+
+    async def update_data_set(self, **kwargs) -> Dict[str, Any]:
+        """call UpdateDataSet in thread"""
+        return await asyncio.to_thread(self._client.update_data_set, **kwargs)
+
+
+class AsyncApp:
+    """
+    AsyncApp is async variant of App.
+    describe, plan and update are executed as overlapping stages connected by bounded queues.
+    quicksight_client must provide async describe_data_set and update_data_set.
+    """
+
+    def __init__(
+        self,
+        manifest: Union['Manifest', SlimManifest],
+        quicksight_client: Any = None,
+        aws_account_id: Optional[str] = None,
+        options: Optional[PipelineOptions] = None,
+    ) -> None:
+        if quicksight_client is None:
+            quicksight_client = ThreadedQuickSightClient(RateLimitedQuickSightClient.from_boto3())
+        self.app = App(
+            manifest=manifest,
+            quicksight_client=quicksight_client,
+            aws_account_id=aws_account_id,
+        )
+        self.options = options if options is not None else PipelineOptions()
+
+    @property
+    def quicksight_client(self) -> Any:
+        """async QuickSight client"""
+        return self.app.quicksight_client
+
+    @property
+    def aws_account_id(self) -> str:
+        """AWS account id"""
+        return self.app.aws_account_id
+
+    async def update_data_sets(
+        self,
+        data_set_ids: List[str],
+        dry_run: bool = False,
+        force: bool = False,
+    ) -> List[UpdateDataSetResult]:
+        """
+            execute update data set operation for many data sets with pipeline.
+            failure of one data set does not abort the others.
+            data sets already up to date are not updated unless force is True.
+            results are returned in the same order as data_set_ids
+        """
+        pipeline = _Pipeline(
+            dry_run=dry_run,
+            force=force,
+            described=asyncio.Queue(maxsize=self.options.queue_size),
+            planned=asyncio.Queue(maxsize=self.options.queue_size),
+        )
+        for data_set_id in data_set_ids:
+            pipeline.pending.put_nowait(data_set_id)
+
+        describers = [
+            asyncio.create_task(self._describe_stage(pipeline))
+            for _ in range(self.options.describe_concurrency)
+        ]
+        planner = asyncio.create_task(self._plan_stage(pipeline))
+        updaters = [
+            asyncio.create_task(self._update_stage(pipeline))
+            for _ in range(self.options.update_concurrency)
+        ]
+        await asyncio.gather(*describers)
+        await pipeline.described.put(_DONE)
+        await planner
+        for _ in updaters:
+            await pipeline.planned.put(_DONE)
+        await asyncio.gather(*updaters)
+        return [pipeline.results[data_set_id] for data_set_id in data_set_ids]
+
+    async def _describe_stage(self, pipeline: _Pipeline) -> None:
+        while True:
+            try:
+                data_set_id = pipeline.pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                with tracing.span(
+                        tracing.SPAN_DESCRIBE_DATA_SET,
+                        data_set_id=data_set_id,
+                        retries=0,
+                ) as span, profiling.phase(profiling.PHASE_DESCRIBE):
+                    output = await self.quicksight_client.describe_data_set(
+                        AwsAccountId=self.aws_account_id,
+                        DataSetId=data_set_id,
+                    )
+                    span.set_payload_size(output)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                self._fail(pipeline.results, data_set_id, ex)
+                continue
+            await pipeline.described.put((data_set_id, output))
+
+    async def _plan_stage(self, pipeline: _Pipeline) -> None:
+        while True:
+            item = await pipeline.described.get()
+            if item is _DONE:
+                return
+            data_set_id, output = item
+            try:
+                # planning is CPU bound, run it in thread so that describes and updates go on
+                update_data_set_input, changed = await asyncio.to_thread(self._plan, output)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                self._fail(pipeline.results, data_set_id, ex)
+                continue
+            if not changed and not pipeline.force:
+                logger.info("DataSet is up to date: %s", data_set_id)
+                pipeline.results[data_set_id] = UpdateDataSetResult(
+                    data_set_id=data_set_id,
+                    status='unchanged',
+                    update_data_set_input=update_data_set_input,
+                )
+                continue
+            if pipeline.dry_run:
+                pipeline.results[data_set_id] = UpdateDataSetResult(
+                    data_set_id=data_set_id,
+                    status='dry_run',
+                    update_data_set_input=update_data_set_input,
+                )
+                continue
+            await pipeline.planned.put((data_set_id, update_data_set_input))
+
+    def _plan(self, output: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        data_set = parse_describe_data_set_output(output)
+        return self.app.plan_update_data_set_changes(data_set)
+
+    async def _update_stage(self, pipeline: _Pipeline) -> None:
+        while True:
+            item = await pipeline.planned.get()
+            if item is _DONE:
+                return
+            data_set_id, update_data_set_input = item
+            try:
+                with tracing.span(
+                        tracing.SPAN_UPDATE_DATA_SET,
+                        data_set_id=data_set_id,
+                        retries=0,
+                ) as span, profiling.phase(profiling.PHASE_UPDATE):
+                    span.set_payload_size(update_data_set_input)
+                    output = await self.quicksight_client.update_data_set(
+                        **update_data_set_input
+                    )
+                check_update_data_set_output(output)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                self._fail(pipeline.results, data_set_id, ex)
+                continue
+            logger.info("Update DataSet: %s", data_set_id)
+            logger.debug(json.dumps(output, indent=2, default=str))
+            pipeline.results[data_set_id] = UpdateDataSetResult(
+                data_set_id=data_set_id,
+                status='updated',
+                output=output,
+                update_data_set_input=update_data_set_input,
+            )
+
+    @staticmethod
+    def _fail(
+        results: Dict[str, UpdateDataSetResult],
+        data_set_id: str,
+        ex: Exception,
+    ) -> None:
+        logger.error("update data set %s failed: %s", data_set_id, ex)
+        results[data_set_id] = UpdateDataSetResult(
+            data_set_id=data_set_id,
+            status='failed',
+            error=ex,
+        )
@@ -0,0 +1,224 @@
+"""dbt_quicksight_lineage.core.cache provides local disk cache of QuickSight API responses"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from dbt_quicksight_lineage.core.fileutil import atomic_write
+logger = logging.getLogger()
+
+DEFAULT_DESCRIBE_CACHE_TTL = 24 * 60 * 60
+DEFAULT_DESCRIBE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+_ENTRY_SUFFIX = '.pickle'
+
+
+class DescribeDataSetCache:
+    """
+    DescribeDataSetCache stores raw DescribeDataSet outputs on local disk,
+    keyed by AWS account id and data set id.
+    entries older than ttl seconds are discarded, and least recently used entries
+    are evicted while the total size exceeds max_bytes
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl: float = DEFAULT_DESCRIBE_CACHE_TTL,
+        max_bytes: int = DEFAULT_DESCRIBE_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+
+    def _path(self, aws_account_id: str, data_set_id: str) -> str:
+        key = hashlib.sha256(f'{aws_account_id}/{data_set_id}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+
+    def get(self, aws_account_id: str, data_set_id: str) -> Optional[Dict[str, Any]]:
+        """return cached DescribeDataSet output, or None if not cached or expired"""
+        path = self._path(aws_account_id, data_set_id)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.warning("ignore broken describe cache %s: %s", path, ex)
+            self._remove(path)
+            return None
+        if self._clock() - entry['stored_at'] > self.ttl:
+            logger.debug("describe cache expired: %s", data_set_id)
+            self._remove(path)
+            return None
+        now = self._clock()
+        try:
+            os.utime(path, (now, now))
+        except FileNotFoundError:
+            pass
+        return entry['output']
+
+    def put(self, aws_account_id: str, data_set_id: str, output: Dict[str, Any]) -> None:
+        """store DescribeDataSet output, then evict entries over max_bytes"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = {
+            'aws_account_id': aws_account_id,
+            'data_set_id': data_set_id,
+            'stored_at': self._clock(),
+            'output': output,
+        }
+        path = self._path(aws_account_id, data_set_id)
+        atomic_write(path, lambda f: pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL))
+        now = self._clock()
+        os.utime(path, (now, now))
+        self._evict()
+
+    def invalidate(self, aws_account_id: str, data_set_id: str) -> None:
+        """remove cached DescribeDataSet output"""
+        self._remove(self._path(aws_account_id, data_set_id))
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(_ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            logger.debug("evict describe cache: %s", path)
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class _DataSetListing:
+    """
+    LastUpdatedTime of data sets in one AWS account, read from ListDataSets page by page.
+    pages are read outside the lock, so a data set found in the pages already read
+    does not wait for the page being read by another thread
+    """
+
+    def __init__(self, client: Any, aws_account_id: str) -> None:
+        self._client = client
+        self._aws_account_id = aws_account_id
+        self._condition = threading.Condition()
+        self._last_updated_times: Dict[str, Any] = {}
+        self._next_token: Optional[str] = None
+        self._reading = False
+        self._done = False
+
+    def find(self, data_set_id: str) -> Optional[Any]:
+        """return LastUpdatedTime of the data set, reading pages until it is found"""
+        while True:
+            with self._condition:
+                while self._reading and data_set_id not in self._last_updated_times:
+                    self._condition.wait()
+                if data_set_id in self._last_updated_times or self._done:
+                    return self._last_updated_times.get(data_set_id)
+                self._reading = True
+                next_token = self._next_token
+            self._read_page(next_token)
+
+    def forget(self, data_set_id: str) -> None:
+        """drop LastUpdatedTime of the data set, which is stale after UpdateDataSet"""
+        with self._condition:
+            self._last_updated_times.pop(data_set_id, None)
+
+    def _read_page(self, next_token: Optional[str]) -> None:
+        kwargs = {'AwsAccountId': self._aws_account_id}
+        if next_token is not None:
+            kwargs['NextToken'] = next_token
+        output = None
+        try:
+            output = self._client.list_data_sets(**kwargs)
+        finally:
+            with self._condition:
+                if output is not None:
+                    self._last_updated_times.update(
+                        (summary['DataSetId'], summary.get('LastUpdatedTime'))
+                        for summary in output.get('DataSetSummaries', [])
+                    )
+                    self._next_token = output.get('NextToken')
+                    self._done = not self._next_token
+                self._reading = False
+                self._condition.notify_all()
+
+
+class CachingQuickSightClient:
+    """
+    CachingQuickSightClient puts DescribeDataSetCache in front of QuickSight client.
+    a cached output is used only if its LastUpdatedTime equals the one in ListDataSets,
+    which is read lazily page by page until the data set is found.
+    UpdateDataSet invalidates the entry. other API calls are passed through
+    """
+
+    def __init__(self, client: Any, cache: DescribeDataSetCache) -> None:
+        self._client = client
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._listings: Dict[str, _DataSetListing] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def describe_data_set(self, **kwargs) -> Dict[str, Any]:
+        """call DescribeDataSet, or return cached output if it is up to date"""
+        aws_account_id = kwargs['AwsAccountId']
+        data_set_id = kwargs['DataSetId']
+        cached = self._cache.get(aws_account_id, data_set_id)
+        if cached is not None and self._is_fresh(aws_account_id, data_set_id, cached):
+            logger.debug("describe cache hit: %s", data_set_id)
+            return cached
+        output = self._client.describe_data_set(**kwargs)
+        if output.get('Status') == 200:
+            self._cache.put(aws_account_id, data_set_id, output)
+        return output
+
+    def update_data_set(self, **kwargs) -> Dict[str, Any]:
+        """call UpdateDataSet and invalidate cached output of the data set"""
+        aws_account_id = kwargs['AwsAccountId']
+        data_set_id = kwargs['DataSetId']
+        try:
+            return self._client.update_data_set(**kwargs)
+        finally:
+            self._cache.invalidate(aws_account_id, data_set_id)
+            with self._lock:
+                listing = self._listings.get(aws_account_id)
+            if listing is not None:
+                listing.forget(data_set_id)
+
+    def _is_fresh(
+        self,
+        aws_account_id: str,
+        data_set_id: str,
+        output: Dict[str, Any],
+    ) -> bool:
+        cached_last_updated_time = output.get('DataSet', {}).get('LastUpdatedTime')
+        if cached_last_updated_time is None:
+            return False
+        with self._lock:
+            listing = self._listings.get(aws_account_id)
+            if listing is None:
+                listing = _DataSetListing(self._client, aws_account_id)
+                self._listings[aws_account_id] = listing
+        last_updated_time = listing.find(data_set_id)
+        return last_updated_time is not None and last_updated_time == cached_last_updated_time
@@ -1,13 +1,36 @@
 """dbt_quicksight_lineage.core.dbt: provides dbt-core project parser."""
+import gc
+import hashlib
 import json
+import logging
 import os
-from typing import Optional, Dict, Any, Iterator
-from dataclasses import dataclass
-from dbt.config.runtime import RuntimeConfig
-from dbt.flags import set_from_args
-from dbt.adapters.factory import get_adapter_class_by_name, register_adapter, reset_adapters
-from dbt.contracts.graph.manifest import Manifest, ManifestNode
-from dbt.parser.manifest import ManifestLoader as DbtManifestLoader
+import pickle
+from typing import (
+    TYPE_CHECKING, Optional, Dict, Any, FrozenSet, IO, Iterable, Iterator, List, Tuple, Union,
+)
+from dataclasses import dataclass, field
+from dbt_quicksight_lineage.core import tracing
+from dbt_quicksight_lineage.core.fileutil import atomic_write
+if TYPE_CHECKING:
+    from dbt.contracts.graph.manifest import Manifest, ManifestNode
+logger = logging.getLogger()
+
+MANIFEST_CACHE_VERSION = 4
+DEFAULT_MANIFEST_CACHE_MAX_ENTRIES = 8
+DEFAULT_READ_CHUNK_SIZE = 1024 * 1024
+
+_CACHE_ENTRY_SUFFIX = '.pickle'
+_CACHE_HEADER_PREFIX = 'dbt-quicksight-lineage manifest cache'
+
+# directories of dbt project which are not inputs of parsing:
+# dbt_project.yml key, environment variable overriding it and default
+_PROJECT_OUTPUT_PATHS = (
+    ('target-path', 'DBT_TARGET_PATH', 'target'),
+    ('log-path', 'DBT_LOG_PATH', 'logs'),
+    ('packages-install-path', None, 'dbt_packages'),
+)
+# dbt_quicksight_lineage's own settings do not change the parsed manifest
+_ENV_IGNORE_PREFIX = 'DBT_QUICKSIGHT_LINEAGE_'
 
 
 @dataclass
@@ -27,9 +50,108 @@ class DbtArgs:
         return self.cli_vars or {}
 
 
+def _cache_header(cache_key: str) -> bytes:
+    return f'{_CACHE_HEADER_PREFIX} {MANIFEST_CACHE_VERSION} {cache_key}\n'.encode('utf-8')
+
+
+def _dbt_version() -> str:
+    # dbt is imported only when the full Manifest is used
+    from dbt.version import __version__  # pylint: disable=import-outside-toplevel
+    return __version__
+
+
 @dataclass
-class ManifestLoader:
-    """the ManifestLoader is responsible for loading DBT Manifests from the DBT"""
+class ManifestCache:
+    """
+    the ManifestCache keeps pickled manifests in cache_dir keyed by the hash of their inputs.
+    only the max_entries most recently used manifests are kept.
+    entries are unpickled, so cache_dir must be writable only by trusted users.
+    each entry starts with a header line of the cache version and key,
+    entries with another header are ignored without unpickling
+    """
+
+    cache_dir: str
+    max_entries: int = DEFAULT_MANIFEST_CACHE_MAX_ENTRIES
+
+    def load(
+        self,
+        cache_key: str,
+        manifest_type: type,
+    ) -> Union['Manifest', 'SlimManifest', None]:
+        """return the cached manifest, or None if it is missing or not a manifest_type"""
+        cache_path = self._path(cache_key)
+        if not os.path.isfile(cache_path):
+            logger.debug("manifest cache miss: %s", cache_path)
+            return None
+        # unpickling allocates millions of objects, cyclic gc passes would dominate
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        header = _cache_header(cache_key)
+        try:
+            with open(cache_path, 'rb') as f:
+                if f.readline(len(header) + 1) != header:
+                    logger.warning("ignore manifest cache with unknown header %s", cache_path)
+                    return None
+                manifest = pickle.load(f)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.warning("ignore broken manifest cache %s: %s", cache_path, ex)
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if not isinstance(manifest, manifest_type):
+            logger.warning("ignore broken manifest cache %s", cache_path)
+            return None
+        # mtime orders the entries for eviction
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        logger.debug("manifest cache hit: %s", cache_path)
+        return manifest
+
+    def save(self, cache_key: str, manifest: Union['Manifest', 'SlimManifest']) -> None:
+        """store the manifest, then evict entries over max_entries"""
+        cache_path = self._path(cache_key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        header = _cache_header(cache_key)
+
+        def write(f: IO[bytes]) -> None:
+            f.write(header)
+            pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        atomic_write(cache_path, write)
+        logger.debug("manifest cache saved: %s", cache_path)
+        self._evict()
+
+    def _path(self, cache_key: str) -> str:
+        return os.path.join(self.cache_dir, cache_key + _CACHE_ENTRY_SUFFIX)
+
+    def _evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(_CACHE_ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort(reverse=True)
+        for _, path in entries[max(self.max_entries, 1):]:
+            logger.debug("evict manifest cache: %s", path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+@dataclass
+class ManifestLoader:  # pylint: disable=too-many-instance-attributes
+    """
+    the ManifestLoader is responsible for loading DBT Manifests from the DBT.
+    its fields mirror the dbt CLI options and the slim reader flags given on the command line
+    """
 
     manifest_path: Optional[str] = None
     project_dir: Optional[str] = None
@@ -37,9 +159,117 @@ class ManifestLoader:
     profile: Optional[str] = None
     target: Optional[str] = None
     cli_vars: Optional[Dict[str, Any]] = None
+    cache: Optional[ManifestCache] = None
+    slim: bool = False
+    quicksight_only: bool = False
+
+    def load_manifest(self) -> Union['Manifest', 'SlimManifest']:
+        """
+        load the DBT manifest
+        if slim is set, return SlimManifest which has only SQL model records,
+        manifest.json is read incrementally without importing dbt.
+        if quicksight_only is also set, only models with meta.quicksight are kept.
+        if cache is set, the loaded manifest is stored in it keyed by the hash of its inputs,
+        and reused while the inputs are unchanged
+        """
+        with tracing.span(tracing.SPAN_MANIFEST_LOAD, slim=self.slim) as span:
+            if self.cache is None:
+                manifest = self._load_manifest()
+            else:
+                cache_key = self.cache_key()
+                manifest = self.cache.load(cache_key, self._manifest_type())
+                span.set(cache_hit=manifest is not None)
+                if manifest is None:
+                    manifest = self._load_manifest()
+                    self.cache.save(cache_key, manifest)
+            span.set(nodes=len(manifest.nodes))
+            return manifest
+
+    def cache_key(self) -> str:
+        """
+        return the hash of the inputs of load_manifest.
+        with manifest_path, it is the content of the file.
+        otherwise, it is the files of the project (except target-path, log-path
+        and packages-install-path), profiles.yml, profile, target, vars
+        and DBT_* environment variables
+        """
+        digest = hashlib.sha256()
+        if self.slim:
+            manifest_format = f'slim:{self.quicksight_only}'
+        else:
+            manifest_format = f'dbt:{_dbt_version()}'
+        digest.update(f'{MANIFEST_CACHE_VERSION}:{manifest_format}\0'.encode('utf-8'))
+        if self.manifest_path is not None:
+            digest.update(f'{self._get_extension()}\0'.encode('utf-8'))
+            _update_digest_with_file(digest, self.manifest_path)
+            return digest.hexdigest()
+        options = {
+            'profile': self.profile,
+            'target': self.target,
+            'vars': self.cli_vars or {},
+            'env': {
+                name: value for name, value in os.environ.items()
+                if name.startswith('DBT_') and not name.startswith(_ENV_IGNORE_PREFIX)
+            },
+        }
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+        profiles_path = self._profiles_path()
+        if profiles_path is not None:
+            digest.update(b'\0profiles.yml\0')
+            _update_digest_with_file(digest, profiles_path)
+        project_dir = self.project_dir or '.'
+        for path in _iter_project_files(project_dir):
+            digest.update(f'\0{os.path.relpath(path, project_dir)}\0'.encode('utf-8'))
+            _update_digest_with_file(digest, path)
+        return digest.hexdigest()
 
-    def load_manifest(self) -> Manifest:
-        """load the DBT manifest"""
+    def input_paths(self) -> List[str]:
+        """
+        return the files read by load_manifest.
+        with manifest_path, it is the file.
+        otherwise, it is profiles.yml and the files of the project
+        (except target-path, log-path and packages-install-path)
+        """
+        if self.manifest_path is not None:
+            return [self.manifest_path]
+        paths = list(_iter_project_files(self.project_dir or '.'))
+        profiles_path = self._profiles_path()
+        if profiles_path is not None:
+            paths.append(profiles_path)
+        return paths
+
+    def _profiles_path(self) -> Optional[str]:
+        if self.profiles_dir is None:
+            return None
+        profiles_path = os.path.join(self.profiles_dir, 'profiles.yml')
+        if not os.path.isfile(profiles_path):
+            return None
+        return profiles_path
+
+    def _manifest_type(self) -> type:
+        if self.slim:
+            return SlimManifest
+        # dbt is imported only when the full Manifest is used
+        from dbt.contracts.graph.manifest import Manifest  # pylint: disable=import-outside-toplevel
+        return Manifest
+
+    def _load_manifest(self) -> Union['Manifest', 'SlimManifest']:
+        if not self.slim:
+            return self._load_full_manifest()
+        if self.manifest_path is not None and self._get_extension() == '.json':
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return read_slim_manifest(f, quicksight_only=self.quicksight_only)
+        return SlimManifest.from_manifest(
+            self._load_full_manifest(),
+            quicksight_only=self.quicksight_only,
+        )
+
+    def _load_full_manifest(self) -> 'Manifest':
+        # pylint: disable=import-outside-toplevel
+        from dbt.config.runtime import RuntimeConfig
+        from dbt.flags import set_from_args
+        from dbt.adapters.factory import get_adapter_class_by_name, register_adapter, reset_adapters
+        from dbt.parser.manifest import ManifestLoader as DbtManifestLoader
         if self.manifest_path is not None:
             extension = self._get_extension()
             if extension == '.json':
@@ -73,23 +303,426 @@ class ManifestLoader:
         _, ext = os.path.splitext(self.manifest_path)
         return ext
 
-    def _load_from_json(self) -> Manifest:
+    def _load_from_json(self) -> 'Manifest':
+        from dbt.contracts.graph.manifest import Manifest  # pylint: disable=import-outside-toplevel
         with open(self.manifest_path, encoding="utf-8") as f:
             data = json.load(f)
         return Manifest.from_dict(data)
 
-    def _load_from_msgpack(self) -> Manifest:
+    def _load_from_msgpack(self) -> 'Manifest':
+        from dbt.contracts.graph.manifest import Manifest  # pylint: disable=import-outside-toplevel
         with open(self.manifest_path, 'rb') as f:
             data = f.read()
         return Manifest.from_msgpack(data)
 
+
+def _project_output_dirs(project_dir: str) -> FrozenSet[str]:
+    """return the paths of output directories of the project, relative to project_dir"""
+    project_config: Dict[str, Any] = {}
+    project_path = os.path.join(project_dir, 'dbt_project.yml')
+    if os.path.isfile(project_path):
+        from ruamel.yaml import YAML  # pylint: disable=import-outside-toplevel
+        try:
+            with open(project_path, encoding='utf-8') as f:
+                project_config = YAML(typ='safe', pure=True).load(f) or {}
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.debug("cannot read %s: %s", project_path, ex)
+        if not isinstance(project_config, dict):
+            project_config = {}
+    output_dirs = set()
+    for key, env_name, default in _PROJECT_OUTPUT_PATHS:
+        path = (env_name and os.environ.get(env_name)) or project_config.get(key) or default
+        output_dirs.add(os.path.normpath(os.path.relpath(
+            os.path.join(project_dir, str(path)),
+            project_dir,
+        )))
+    return frozenset(output_dirs)
+
+
+def _iter_project_files(project_dir: str) -> Iterator[str]:
+    output_dirs = _project_output_dirs(project_dir)
+    for root, dirs, files in os.walk(project_dir):
+        relative_root = os.path.relpath(root, project_dir)
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith('.')
+            and os.path.normpath(os.path.join(relative_root, d)) not in output_dirs
+        )
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+
+def _update_digest_with_file(digest: Any, path: str) -> None:
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+
+@dataclass(frozen=True, slots=True)
+class ColumnRecord:
+    """compact record of the column of DBT model, duck-typed as dbt ColumnInfo"""
+
+    name: str
+    description: str = ''
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ColumnRecord':
+        """build the ColumnRecord from the column of manifest.json"""
+        return cls(
+            name=data['name'],
+            description=data.get('description') or '',
+            meta=data.get('meta') or {},
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ModelRecord:  # pylint: disable=too-many-instance-attributes
+    """
+    compact record of the DBT model node, duck-typed as dbt ManifestNode.
+    it keeps only the attributes used by this application
+    """
+
+    unique_id: str
+    name: str
+    resource_type: str
+    language: Optional[str]
+    schema: str
+    alias: str
+    patch_path: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+    columns: Dict[str, ColumnRecord] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ModelRecord':
+        """build the ModelRecord from the node of manifest.json"""
+        return cls(
+            unique_id=data['unique_id'],
+            name=data['name'],
+            resource_type=data['resource_type'],
+            language=data.get('language'),
+            schema=data['schema'],
+            alias=data.get('alias') or data['name'],
+            patch_path=data.get('patch_path'),
+            meta=data.get('meta') or {},
+            columns={
+                name: ColumnRecord.from_dict(column)
+                for name, column in (data.get('columns') or {}).items()
+            },
+        )
+
+    @classmethod
+    def from_node(cls, node: 'ManifestNode') -> 'ModelRecord':
+        """build the ModelRecord from dbt ManifestNode, dbt enums are converted to plain str"""
+        language = getattr(node, 'language', None)
+        return cls(
+            unique_id=node.unique_id,
+            name=node.name,
+            resource_type=str(node.resource_type),
+            language=None if language is None else str(language),
+            schema=node.schema,
+            alias=node.alias,
+            patch_path=node.patch_path,
+            meta=node.meta,
+            columns={
+                name: ColumnRecord(
+                    name=column.name,
+                    description=column.description,
+                    meta=column.meta,
+                )
+                for name, column in node.columns.items()
+            },
+        )
+
+
+def _is_slim_target(data: Dict[str, Any], quicksight_only: bool) -> bool:
+    if data.get('resource_type') != 'model':
+        return False
+    if quicksight_only:
+        return 'quicksight' in (data.get('meta') or {})
+    return True
+
+
+@dataclass
+class SlimManifest:
+    """
+    SlimManifest has only the model records of DBT Manifest.
+    it can be used in place of dbt Manifest by App
+    """
+
+    nodes: Dict[str, ModelRecord] = field(default_factory=dict)
+
+    @classmethod
+    def from_manifest(
+        cls,
+        manifest: 'Manifest',
+        quicksight_only: bool = False,
+    ) -> 'SlimManifest':
+        """build the SlimManifest from dbt Manifest"""
+        nodes = {}
+        for unique_id, node in manifest.nodes.items():
+            if node.resource_type != 'model':
+                continue
+            if quicksight_only and 'quicksight' not in node.meta:
+                continue
+            nodes[unique_id] = ModelRecord.from_node(node)
+        return cls(nodes=nodes)
+
+
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+class _JsonStream:
+    """
+    _JsonStream decodes JSON text from file incrementally.
+    the buffer is refilled in chunks, doubled while a single value does not fit in it
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f: IO[str], chunk_size: int = DEFAULT_READ_CHUNK_SIZE) -> None:
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """skip white spaces and return the next character, or empty string at the end"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\n\r':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self._chunk_size):
+                return ''
+
+    def expect(self, char: str) -> None:
+        """consume the next character which must be char"""
+        actual = self.peek()
+        if actual != char:
+            raise ValueError(f'invalid manifest json: expected {char!r}, got {actual!r}')
+        self._pos += 1
+
+    def decode(self) -> Any:
+        """decode the next JSON value"""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(max(size, len(self._buffer) - self._pos)):
+                    raise
+                size *= 2
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                # a number may be continued in the next chunk
+                tail = end
+                while tail < len(self._buffer) and self._buffer[tail] in _NUMBER_CHARS:
+                    tail += 1
+                if tail == len(self._buffer) and self._fill(size):
+                    continue
+            self._pos = end
+            return value
+
+    def iter_object(self) -> Iterator[str]:
+        """
+        iterate the keys of the next JSON object.
+        the caller must consume the value by decode, skip or iter_object for each key
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.decode()
+            if not isinstance(key, str):
+                raise ValueError(f'invalid manifest json: object key must be string, got {key!r}')
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self._pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def skip(self) -> None:
+        """skip the next JSON value, objects are decoded member by member to bound memory usage"""
+        if self.peek() == '{':
+            for _ in self.iter_object():
+                self.skip()
+            return
+        self.decode()
+
+
+def read_slim_manifest(
+    f: IO[str],
+    quicksight_only: bool = False,
+    chunk_size: int = DEFAULT_READ_CHUNK_SIZE,
+) -> SlimManifest:
+    """
+    read manifest.json incrementally and return SlimManifest.
+    only one node is materialized at a time, other sections are skipped
+    """
+    stream = _JsonStream(f, chunk_size)
+    manifest = SlimManifest()
+    for key in stream.iter_object():
+        if key != 'nodes' or stream.peek() != '{':
+            stream.skip()
+            continue
+        for unique_id in stream.iter_object():
+            data = stream.decode()
+            if isinstance(data, dict) and _is_slim_target(data, quicksight_only):
+                manifest.nodes[unique_id] = ModelRecord.from_dict(data)
+    if stream.peek() != '':
+        raise ValueError('invalid manifest json: unexpected data after the end of manifest')
+    return manifest
+
+
+def model_fingerprint(node: 'ManifestNode') -> str:
+    """
+    return the hash of the model inputs used to update data sets:
+    name, schema, alias, meta.quicksight, and description and meta.quicksight of columns
+    """
+    inputs = {
+        'name': node.name,
+        'schema': node.schema,
+        'alias': node.alias,
+        'quicksight': node.meta.get('quicksight'),
+        'columns': [
+            [column.name, column.description, column.meta.get('quicksight')]
+            for column in node.columns.values()
+        ],
+    }
+    data = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class ModelIndex:
+    """
+    The ModelIndex is responsible for looking up SQL model nodes of the DBT Manifest.
+    build once per manifest, lookups by relation and by data set id are O(1)
+    """
+
+    def __init__(
+        self,
+        nodes: Iterable['ManifestNode'],
+    ) -> None:
+        self._models: List['ManifestNode'] = []
+        self._by_relation: Dict[Tuple[str, str], List['ManifestNode']] = {}
+        self._by_data_set: Dict[str, List[Tuple['ManifestNode', Optional[str]]]] = {}
+        self._fingerprints: Dict[str, str] = {}
+        for node in nodes:
+            if node.resource_type != 'model':
+                continue
+            if node.language != 'sql':
+                continue
+            self._models.append(node)
+            self._by_relation.setdefault((node.schema, node.alias), []).append(node)
+            data_sets = node.meta.get('quicksight', {}).get('data_sets', [])
+            for target in data_sets:
+                data_set_id = target.get('id')
+                if data_set_id is None:
+                    continue
+                self._by_data_set.setdefault(data_set_id, []).append(
+                    (node, target.get('data_source')),
+                )
+
+    @classmethod
+    def from_manifest(cls, manifest: Union['Manifest', 'SlimManifest']) -> 'ModelIndex':
+        """build the ModelIndex from the DBT Manifest"""
+        return cls(manifest.nodes.values())
+
+    @property
+    def models(self) -> List['ManifestNode']:
+        """return the SQL model nodes in manifest order"""
+        return self._models
+
+    @property
+    def data_set_ids(self) -> List[str]:
+        """return the data set ids referenced by meta.quicksight.data_sets"""
+        return list(self._by_data_set)
+
+    def find_by_relation(
+        self,
+        schema: str,
+        alias: str,
+    ) -> List['ManifestNode']:
+        """return the model nodes materialized as schema.alias"""
+        return self._by_relation.get((schema, alias), [])
+
+    def data_set_entries(
+        self,
+        data_set_id: str,
+    ) -> List[Tuple['ManifestNode', Optional[str]]]:
+        """return the (node, data_source_arn) entries which refer the data set"""
+        return self._by_data_set.get(data_set_id, [])
+
+    def find_by_data_set(
+        self,
+        data_set_id: str,
+        data_source_arn: Optional[str] = None,
+    ) -> Iterator['ManifestNode']:
+        """
+        return the model nodes which refer the data set.
+        entries with data source are matched only if same data_source_arn
+        """
+        found = set()
+        for node, data_source in self.data_set_entries(data_set_id):
+            if data_source is not None and data_source != data_source_arn:
+                continue
+            if node.unique_id in found:
+                continue
+            found.add(node.unique_id)
+            yield node
+
+    def changed_data_set_ids(self, previous: 'ModelIndex') -> List[str]:
+        """
+        return the data set ids whose referring models are added, removed or changed
+        since previous, compared by model_fingerprint
+        """
+        return [
+            data_set_id for data_set_id in self.data_set_ids
+            if self.data_set_state(data_set_id) != previous.data_set_state(data_set_id)
+        ]
+
+    def data_set_state(self, data_set_id: str) -> List[Tuple[str, str, str]]:
+        """
+        return sorted (unique_id, data source arn, model_fingerprint) of the models
+        referring the data set, equal states mean the data set needs no update
+        """
+        return sorted(
+            (node.unique_id, data_source or '', self._fingerprint(node))
+            for node, data_source in self.data_set_entries(data_set_id)
+        )
+
+    def _fingerprint(self, node: 'ManifestNode') -> str:
+        fingerprint = self._fingerprints.get(node.unique_id)
+        if fingerprint is None:
+            fingerprint = model_fingerprint(node)
+            self._fingerprints[node.unique_id] = fingerprint
+        return fingerprint
+
+
 class ManifestNodeExplorer:
     """
     The ManifestNodeExplorer is responsible for exploring the DBT Manifest node
     """
     def __init__(
         self,
-        node: ManifestNode,
+        node: 'ManifestNode',
     ) -> None:
         self._node = node
 
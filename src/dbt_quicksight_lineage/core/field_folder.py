@@ -0,0 +1,91 @@
+"""このモジュールはQuickSightのDataSetのフィールドフォルダに関するモジュールです。"""
+from typing import Any, Dict, Optional, Tuple
+
+
+class FieldFolder:
+    """
+    DataSetのフィールドフォルダを表現するクラスです。
+    カラムは挿入順を保持する集合として持ちます。
+    columnsは変更できないタプルです。カラムの変更はadd_column, remove_columnで行います。
+    column_indexを渡すと、カラム名からフォルダパスへの逆引きインデックスも更新します。
+    """
+
+    __slots__ = ('_field_folder_path', '_column_index', 'description', '_columns')
+
+    def __init__(
+        self,
+        field_folder_path: str,
+        field_folders: Optional[Dict[str, Any]],
+        column_index: Optional[Dict[str, Dict[str, None]]] = None,
+    ) -> None:
+        self._field_folder_path = field_folder_path
+        self._column_index = column_index
+        self.description = field_folders.get('description')
+        self._columns: Dict[str, None] = {}
+        for column_name in field_folders.get('columns', []):
+            self.add_column(column_name)
+
+    @property
+    def field_folder_path(self) -> str:
+        """フィールドフォルダパス"""
+        return self._field_folder_path
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """フィールドフォルダに含まれるカラム名"""
+        return tuple(self._columns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """属性を辞書に変換します"""
+        result = {}
+        if self.description is not None:
+            result['description'] = self.description
+        result['columns'] = list(self._columns)
+        return result
+
+    def contains_column(
+            self,
+            column_name: str
+    ) -> bool:
+        """指定したカラム名を含むかどうかを返します"""
+        return column_name in self._columns
+
+    def remove_column(
+            self,
+            column_name: str
+    ) -> None:
+        """指定したカラム名を削除します"""
+        if column_name not in self._columns:
+            raise ValueError(f'column_name: {column_name} is not in {self._field_folder_path}')
+        del self._columns[column_name]
+        if self._column_index is not None:
+            paths = self._column_index[column_name]
+            del paths[self._field_folder_path]
+            if not paths:
+                del self._column_index[column_name]
+
+    def rename_column(
+        self,
+        old_column_name: str,
+        new_column_name: str
+    ) -> None:
+        """指定したカラム名を変更します"""
+        if old_column_name in self._columns:
+            self.remove_column(old_column_name)
+            self.add_column(new_column_name)
+
+    def add_column(
+            self,
+            column_name: str
+    ) -> None:
+        """指定したカラム名を追加します"""
+        if column_name in self._columns:
+            return
+        self._columns[column_name] = None
+        if self._column_index is not None:
+            self._column_index.setdefault(column_name, {})[self._field_folder_path] = None
+
+    @property
+    def column_count(self) -> int:
+        """カラム数"""
+        return len(self._columns)
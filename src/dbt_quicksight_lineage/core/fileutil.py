@@ -0,0 +1,27 @@
+"""dbt_quicksight_lineage.core.fileutil provides file helpers shared by core modules"""
+import os
+import shutil
+import tempfile
+from typing import IO, Any, Callable
+
+
+def atomic_write(
+    path: str,
+    write: Callable[[IO[bytes]], Any],
+    copy_mode: bool = False,
+) -> None:
+    """
+    call write with a temporary file in the directory of path, then replace path with it.
+    readers see either the old or the new content, never a partially written file.
+    with copy_mode the permission bits of the existing path are kept
+    """
+    tmp_fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(tmp_fd, 'wb') as f:
+            write(f)
+        if copy_mode:
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,96 @@
+"""このモジュールはQuickSightのDataSetの物理テーブルに関するモジュールです。"""
+from typing import Any, Dict, Optional, Iterator
+
+
+class PhysicalTable:
+    """
+    DataSetの物理テーブルを表現するクラスです。
+    DataSetの物理テーブルのアクセスインタフェースを提供します
+    """
+
+    __slots__ = ('_physical_table_id', '_physical_table', '_column_types')
+
+    def __init__(self, physical_table_id: str, physical_table: Dict[str, Any]) -> None:
+        self._physical_table_id = physical_table_id
+        self._physical_table = physical_table
+        self._column_types: Optional[Dict[str, str]] = None
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        """属性を取得します"""
+        return self._physical_table.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._physical_table[key]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """DataSetの属性を辞書に変換します"""
+        return self._physical_table
+
+    @property
+    def physical_table_id(self) -> str:
+        """物理テーブルID"""
+        return self._physical_table_id
+
+    @property
+    def is_relational_table(self) -> bool:
+        """リレーショナルテーブルですか？"""
+        return self.relational_table is not None
+
+    @property
+    def relational_table(self) -> Optional[Dict[str, Any]]:
+        """リレーショナルテーブル"""
+        return self._physical_table.get('RelationalTable')
+
+    @property
+    def data_source_arn(self) -> Optional[str]:
+        """リレーショナルテーブルのデータソースARN"""
+        if self.is_relational_table:
+            return self.relational_table.get('DataSourceArn')
+        return None
+
+    @property
+    def schema_name(self) -> Optional[str]:
+        """リレーショナルテーブルのスキーマ名"""
+        if self.is_relational_table:
+            return self.relational_table.get('Schema')
+        return None
+
+    @property
+    def table_name(self) -> Optional[str]:
+        """リレーショナルテーブルのテーブル名"""
+        if self.is_relational_table:
+            return self.relational_table.get('Name')
+        return None
+
+    @property
+    def columns(self) -> Iterator[Dict[str, Any]]:
+        """リレーショナルテーブルのカラム"""
+        if self.is_relational_table:
+            return iter(self.relational_table.get('InputColumns', []))
+        return iter([])
+
+    @property
+    def column_types(self) -> Dict[str, str]:
+        """リレーショナルテーブルのカラム名からカラムの型へのマップ"""
+        if self._column_types is None:
+            self._column_types = {}
+            for column in self.columns:
+                self._column_types.setdefault(column['Name'], column['Type'])
+        return self._column_types
+
+    def column_contains(
+        self,
+        column_name: str,
+    ) -> bool:
+        """カラムが存在するか確認します"""
+        return column_name in self.column_types
+
+    def get_column_type(
+        self,
+        column_name: str,
+    ) -> str:
+        """カラムの型を取得します"""
+        column_type = self.column_types.get(column_name)
+        if column_type is None:
+            raise KeyError(f'column_name: {column_name} is not found')
+        return column_type
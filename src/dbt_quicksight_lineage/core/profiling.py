@@ -0,0 +1,72 @@
+"""dbt_quicksight_lineage.core.profiling provides per-phase wall clock timing"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PHASE_MANIFEST_LOAD = 'manifest load'
+PHASE_ACCOUNT_RESOLUTION = 'account resolution'
+PHASE_DESCRIBE = 'describe'
+PHASE_MODEL_MATCHING = 'model matching'
+PHASE_LOGICAL_TABLE_MODIFICATION = 'logical table modification'
+PHASE_INPUT_GENERATION = 'input generation'
+PHASE_UPDATE = 'update'
+PHASE_SCHEMA_UPDATE = 'schema update'
+
+
+class PhaseTimer:
+    """
+    PhaseTimer accumulates wall clock time and call count per phase.
+    it is thread safe, time of concurrent phases is summed up
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._phases: Dict[str, List[float]] = {}
+        self._started_at = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """measure the block as the phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._phases.setdefault(name, [0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+
+    def rows(self) -> List[Tuple[str, int, float]]:
+        """return (phase, calls, total seconds) in order of first appearance"""
+        with self._lock:
+            return [(name, int(calls), total) for name, (calls, total) in self._phases.items()]
+
+    def format_table(self) -> str:
+        """format phases as text table"""
+        lines = [f"{'phase':<28}{'calls':>8}{'total(s)':>12}{'mean(ms)':>12}"]
+        for name, calls, total in self.rows():
+            lines.append(f"{name:<28}{calls:>8}{total:>12.3f}{total / calls * 1000:>12.1f}")
+        lines.append(f"{'elapsed':<28}{'':>8}{time.perf_counter() - self._started_at:>12.3f}")
+        return '\n'.join(lines)
+
+
+_timer: Optional[PhaseTimer] = None
+
+
+def set_phase_timer(timer: Optional[PhaseTimer]) -> None:
+    """set the PhaseTimer used by phase, None disables timing"""
+    global _timer  # pylint: disable=global-statement
+    _timer = timer
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """measure the block as the phase if PhaseTimer is set, otherwise do nothing"""
+    timer = _timer
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
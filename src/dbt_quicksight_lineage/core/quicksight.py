@@ -1,100 +1,51 @@
 """このモジュールはQuickSightのDataSetの操作に関するモジュールです。"""
 import json
-from typing import Any, Dict, Optional, Iterator
+from typing import Any, Dict, List, Optional, Iterator, Tuple
+from dbt_quicksight_lineage.core.field_folder import FieldFolder
+from dbt_quicksight_lineage.core.physical_table import PhysicalTable
+from dbt_quicksight_lineage.core.reconcile import ColumnState, DataTransformsReconciler
+
+
+def _remove_entry(
+    index: Dict[str, List[Any]],
+    column_name: str,
+    operation: Dict[str, Any],
+    get_operation,
+) -> None:
+    """インデックスのエントリから指定された操作を除きます"""
+    entries = index.get(column_name)
+    if not entries:
+        return
+    entries[:] = [entry for entry in entries if get_operation(entry) is not operation]
+    if not entries:
+        del index[column_name]
 
 
-class PhysicalTable:
-    """
-    DataSetの物理テーブルを表現するクラスです。
-    DataSetの物理テーブルのアクセスインタフェースを提供します
-    """
-
-    def __init__(self, physical_table_id: str, physical_table: Dict[str, Any]) -> None:
-        self._physical_table_id = physical_table_id
-        self._physical_table = physical_table
-
-    def get(self, key: str, default: Optional[Any] = None) -> Any:
-        """属性を取得します"""
-        return self._physical_table.get(key, default)
-
-    def __getitem__(self, key: str) -> Any:
-        return self._physical_table[key]
-
-    def to_dict(self) -> Dict[str, Any]:
-        """DataSetの属性を辞書に変換します"""
-        return self._physical_table
-
-    @property
-    def physical_table_id(self) -> str:
-        """物理テーブルID"""
-        return self._physical_table_id
-
-    @property
-    def is_relational_table(self) -> bool:
-        """リレーショナルテーブルですか？"""
-        return self.relational_table is not None
-
-    @property
-    def relational_table(self) -> Optional[Dict[str, Any]]:
-        """リレーショナルテーブル"""
-        return self._physical_table.get('RelationalTable')
-
-    @property
-    def data_source_arn(self) -> Optional[str]:
-        """リレーショナルテーブルのデータソースARN"""
-        if self.is_relational_table:
-            return self.relational_table.get('DataSourceArn')
-        return None
-
-    @property
-    def schema_name(self) -> Optional[str]:
-        """リレーショナルテーブルのスキーマ名"""
-        if self.is_relational_table:
-            return self.relational_table.get('Schema')
-        return None
-
-    @property
-    def table_name(self) -> Optional[str]:
-        """リレーショナルテーブルのテーブル名"""
-        if self.is_relational_table:
-            return self.relational_table.get('Name')
-        return None
-
-    @property
-    def columns(self) -> Iterator[Dict[str, Any]]:
-        """リレーショナルテーブルのカラム"""
-        if self.is_relational_table:
-            return iter(self.relational_table.get('InputColumns', []))
-        return iter([])
-
-    def column_contains(
-        self,
-        column_name: str,
-    ) -> bool:
-        """カラムが存在するか確認します"""
-        for column in self.columns:
-            if column['Name'] == column_name:
-                return True
-        return False
-
-    def get_column_type(
-        self,
-        column_name: str,
-    ) -> str:
-        """カラムの型を取得します"""
-        for column in self.columns:
-            if column['Name'] == column_name:
-                return column['Type']
-        raise KeyError(f'column_name: {column_name} is not found')
-
 class LogicalTable:
     """
     DataSetの論理テーブルを表現するクラスです。
+    DataTransformsをカラム名で引けるようにインデックスを保持します。
     """
 
+    __slots__ = (
+        '_logical_table_id',
+        '_logical_table',
+        '_renames',
+        '_column_operations',
+        '_projected',
+        '_last_positions',
+        '_first_project_position',
+    )
+
     def __init__(self, logical_table_id: str, logical_table: Dict[str, Any]) -> None:
         self._logical_table_id = logical_table_id
         self._logical_table = logical_table
+        self._renames: Dict[str, List[Dict[str, Any]]] = {}
+        self._column_operations: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self._projected: Dict[str, List[Dict[str, Any]]] = {}
+        self._last_positions: Dict[str, int] = {}
+        self._first_project_position: Optional[int] = None
+        self._build_index()
 
     def get(self, key: str, default: Optional[Any] = None) -> Any:
         """属性を取得します"""
@@ -117,12 +68,164 @@ class LogicalTable:
         """関連する物理テーブルID"""
         return self._logical_table.get('Source', {}).get('PhysicalTableId')
 
+    def _build_index(self) -> None:
+        """
+        DataTransformsのインデックスを構築します
+        _renames: 物理カラム名 -> RenameColumnOperation
+        _column_operations: カラム名 -> (操作の種類, ColumnNameを持つ操作)
+        _projected: カラム名 -> そのカラムを含むProjectOperation
+        _last_positions: 操作の種類 -> 最後に現れる位置
+        _first_project_position: 最初のProjectOperationの位置
+        """
+        self._renames.clear()
+        self._column_operations.clear()
+        self._projected.clear()
+        self._last_positions.clear()
+        self._first_project_position = None
+        for position, operation in enumerate(self._logical_table.get('DataTransforms', [])):
+            self._index_operation(position, operation)
+
+    def _index_operation(self, position: int, operation: Dict[str, Any]) -> None:
+        """操作をインデックスに追加します"""
+        for key, value in operation.items():
+            if value is None:
+                continue
+            self._last_positions[key] = position
+            if key == 'RenameColumnOperation':
+                self._renames.setdefault(value['ColumnName'], []).append(operation)
+            elif key == 'ProjectOperation':
+                if self._first_project_position is None:
+                    self._first_project_position = position
+                for column_name in value['ProjectedColumns']:
+                    self._projected.setdefault(column_name, []).append(operation)
+            elif isinstance(value, dict) and value.get('ColumnName') is not None:
+                self._column_operations.setdefault(
+                    value['ColumnName'], [],
+                ).append((key, operation))
+
+    def _unindex_operation(self, operation: Dict[str, Any]) -> None:
+        """操作をインデックスから除きます。位置は変更しません"""
+        for key, value in operation.items():
+            if value is None:
+                continue
+            if key == 'RenameColumnOperation':
+                _remove_entry(self._renames, value['ColumnName'], operation, lambda entry: entry)
+            elif key == 'ProjectOperation':
+                for column_name in value['ProjectedColumns']:
+                    _remove_entry(self._projected, column_name, operation, lambda entry: entry)
+            elif isinstance(value, dict) and value.get('ColumnName') is not None:
+                _remove_entry(
+                    self._column_operations,
+                    value['ColumnName'],
+                    operation,
+                    lambda entry: entry[1],
+                )
+
+    def _insert_operation(self, position: int, operation: Dict[str, Any]) -> None:
+        """操作を挿入し、インデックスの位置をずらします"""
+        data_transforms = self._logical_table['DataTransforms']
+        position = min(position, len(data_transforms))
+        data_transforms.insert(position, operation)
+        for key, last_position in self._last_positions.items():
+            if last_position >= position:
+                self._last_positions[key] = last_position + 1
+        if self._first_project_position is not None and self._first_project_position >= position:
+            self._first_project_position += 1
+        self._index_operation(position, operation)
+
+    def _remove_operation(self, operation: Dict[str, Any]) -> None:
+        """操作を削除し、インデックスの位置をずらします"""
+        data_transforms = self._logical_table['DataTransforms']
+        position = next(
+            index for index, target in enumerate(data_transforms) if target is operation
+        )
+        del data_transforms[position]
+        self._unindex_operation(operation)
+        for key, last_position in list(self._last_positions.items()):
+            if last_position > position:
+                self._last_positions[key] = last_position - 1
+            elif last_position == position:
+                # 同じ種類の操作を削除した位置から遡って探します
+                previous = next(
+                    (
+                        index for index in range(position - 1, -1, -1)
+                        if data_transforms[index].get(key) is not None
+                    ),
+                    None,
+                )
+                if previous is None:
+                    del self._last_positions[key]
+                else:
+                    self._last_positions[key] = previous
+        if self._first_project_position is None or self._first_project_position < position:
+            return
+        if self._first_project_position > position:
+            self._first_project_position -= 1
+            return
+        self._first_project_position = next(
+            (
+                index for index in range(position, len(data_transforms))
+                if data_transforms[index].get('ProjectOperation') is not None
+            ),
+            None,
+        )
+
+    def _find_operations(self, key: str, column_name: str) -> Iterator[Dict[str, Any]]:
+        """指定されたカラム名を対象とする指定された種類の操作を順に返します"""
+        for operation_key, operation in self._column_operations.get(column_name, []):
+            if operation_key == key:
+                yield operation
+
+    def _insert_position(self, key: str) -> int:
+        """指定された種類の操作を挿入する位置を返します"""
+        return self._last_positions.get(key, self._before_project_operation_index()) + 1
+
     def _before_project_operation_index(self) -> int:
         """ProjectOperationのインデックスを取得します"""
-        for index, operation in enumerate(self._logical_table['DataTransforms']):
-            if operation.get('ProjectOperation') is not None:
-                return index - 1
-        return 0
+        if self._first_project_position is None:
+            return 0
+        return self._first_project_position - 1
+
+    def _rename_column_references(
+        self,
+        column_names: List[str],
+        new_column_name: str,
+    ) -> None:
+        """RenameColumnOperation以外の操作が参照しているカラム名を変更します"""
+        moved_operations: List[Tuple[str, Dict[str, Any]]] = []
+        moved_projects: List[Dict[str, Any]] = []
+        for column_name in dict.fromkeys(column_names):
+            if column_name == new_column_name:
+                continue
+            for key, operation in self._column_operations.pop(column_name, []):
+                operation[key]['ColumnName'] = new_column_name
+                moved_operations.append((key, operation))
+            for operation in self._projected.pop(column_name, []):
+                projected_columns = operation['ProjectOperation']['ProjectedColumns']
+                projected_columns[projected_columns.index(column_name)] = new_column_name
+                moved_projects.append(operation)
+        if moved_operations:
+            self._column_operations[new_column_name] = self._merge_by_position(
+                self._column_operations.get(new_column_name, []),
+                moved_operations,
+                lambda entry: entry[1],
+            )
+        if moved_projects:
+            self._projected[new_column_name] = self._merge_by_position(
+                self._projected.get(new_column_name, []),
+                moved_projects,
+                lambda entry: entry,
+            )
+
+    def _merge_by_position(self, current: List[Any], moved: List[Any], get_operation) -> List[Any]:
+        """インデックスのエントリをDataTransforms上の順序でマージします"""
+        if not current and len(set(id(get_operation(entry)) for entry in moved)) <= 1:
+            return moved
+        positions = {
+            id(operation): position
+            for position, operation in enumerate(self._logical_table['DataTransforms'])
+        }
+        return sorted(current + moved, key=lambda entry: positions[id(get_operation(entry))])
 
     def set_rename_column_operation(
         self,
@@ -130,20 +233,15 @@ class LogicalTable:
         logical_column_name: str
     ) -> None:
         """RenameColumnOperationを設定します"""
-        exits = False
-        last_rename_column_index = self._before_project_operation_index()
         old_column_name = physical_column_name
-        for index, operation in enumerate(self._logical_table['DataTransforms']):
-            if operation.get('RenameColumnOperation') is not None:
-                last_rename_column_index = index
-                if operation['RenameColumnOperation']['ColumnName'] == physical_column_name:
-                    exits = True
-                    old_column_name = operation['RenameColumnOperation']['NewColumnName']
-                    operation['RenameColumnOperation']['NewColumnName'] = logical_column_name
-                    break
-        if not exits:
-            self._logical_table['DataTransforms'].insert(
-                last_rename_column_index + 1,
+        renames = self._renames.get(physical_column_name)
+        if renames:
+            operation = renames[0]['RenameColumnOperation']
+            old_column_name = operation['NewColumnName']
+            operation['NewColumnName'] = logical_column_name
+        else:
+            self._insert_operation(
+                self._insert_position('RenameColumnOperation'),
                 {
                     'RenameColumnOperation': {
                         'ColumnName': physical_column_name,
@@ -151,21 +249,28 @@ class LogicalTable:
                     }
                 },
             )
-        for index, operation in enumerate(self._logical_table['DataTransforms']):
-            for key in operation.keys():
-                if key != 'RenameColumnOperation':
-                    if operation[key].get('ColumnName') in [
-                        physical_column_name,
-                        old_column_name,
-                    ]:
-                        operation[key]['ColumnName'] = logical_column_name
-                if key == 'ProjectOperation':
-                    for j, column_name in enumerate(operation[key]['ProjectedColumns']):
-                        if column_name in [
-                            physical_column_name,
-                            old_column_name,
-                        ]:
-                            operation[key]['ProjectedColumns'][j] = logical_column_name
+        self._rename_column_references(
+            [physical_column_name, old_column_name],
+            logical_column_name,
+        )
+
+    def remove_rename_column_operation(
+        self,
+        physical_column_name: str,
+    ) -> None:
+        """
+        RenameColumnOperationを削除します
+        論理カラム名を参照している操作は物理カラム名を参照するように戻します
+        """
+        renames = self._renames.get(physical_column_name)
+        if not renames:
+            return
+        old_column_name = renames[0]['RenameColumnOperation']['NewColumnName']
+        self._remove_operation(renames[0])
+        self._rename_column_references(
+            [old_column_name],
+            physical_column_name,
+        )
 
     def get_logical_column_name(
         self,
@@ -176,10 +281,9 @@ class LogicalTable:
         論理カラム名が設定されてない場合は、Noneが返ります。
         論理カラム名はRenameColoumnOperationによって設定されたカラム名です。
         """
-        for operation in self._logical_table['DataTransforms']:
-            if operation.get('RenameColumnOperation') is not None:
-                if operation['RenameColumnOperation']['ColumnName'] == physical_column_name:
-                    return operation['RenameColumnOperation']['NewColumnName']
+        renames = self._renames.get(physical_column_name)
+        if renames:
+            return renames[0]['RenameColumnOperation']['NewColumnName']
         return None
 
     def get_output_column_name(
@@ -199,12 +303,10 @@ class LogicalTable:
         物理カラム名から説明のタグを取得します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        for operation in self._logical_table['DataTransforms']:
-            if operation.get('TagColumnOperation') is not None:
-                if operation['TagColumnOperation']['ColumnName'] == target_column_name:
-                    for tag in operation['TagColumnOperation']['Tags']:
-                        if tag.get('ColumnDescription') is not None:
-                            return tag['ColumnDescription']['Text']
+        for operation in self._find_operations('TagColumnOperation', target_column_name):
+            for tag in operation['TagColumnOperation']['Tags']:
+                if tag.get('ColumnDescription') is not None:
+                    return tag['ColumnDescription']['Text']
         return None
 
     def remove_tag_column_description_operation(
@@ -215,18 +317,14 @@ class LogicalTable:
         TagColumnOperationのColumnDescriptionを削除します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        for index, operation in enumerate(self._logical_table['DataTransforms']):
-            if operation.get('TagColumnOperation') is not None:
-                last_tag_column_index = index
-                if operation['TagColumnOperation']['ColumnName'] != target_column_name:
-                    continue
-                for j, tag in enumerate(operation['TagColumnOperation']['Tags']):
-                    if tag.get('ColumnDescription') is not None:
-                        if len(operation['TagColumnOperation']['Tags']) == 1:
-                            self._logical_table['DataTransforms'].pop(index)
-                        else:
-                            operation['TagColumnOperation']['Tags'].pop(j)
-                        return
+        for operation in self._find_operations('TagColumnOperation', target_column_name):
+            for j, tag in enumerate(operation['TagColumnOperation']['Tags']):
+                if tag.get('ColumnDescription') is not None:
+                    if len(operation['TagColumnOperation']['Tags']) == 1:
+                        self._remove_operation(operation)
+                    else:
+                        operation['TagColumnOperation']['Tags'].pop(j)
+                    return
 
     def set_tag_column_description_operation(
         self,
@@ -240,37 +338,26 @@ class LogicalTable:
             self.remove_tag_column_description_operation(physical_column_name)
             return
         target_column_name = self.get_output_column_name(physical_column_name)
-        exits = False
-        last_tag_column_index = self._before_project_operation_index()
-        for index, operation in enumerate(self._logical_table['DataTransforms']):
-            if operation.get('TagColumnOperation') is not None:
-                last_tag_column_index = index
-                if operation['TagColumnOperation']['ColumnName'] != target_column_name:
-                    continue
-                for j, tag in enumerate(operation['TagColumnOperation']['Tags']):
-                    if tag.get('ColumnDescription') is not None:
-                        exits = True
-                        tag['ColumnDescription']['Text'] = description
-                        operation['TagColumnOperation']['Tags'][j] = tag
-                        break
-                if exits:
-                    break
-        if not exits:
-            self._logical_table['DataTransforms'].insert(
-                last_tag_column_index + 1,
-                {
-                    'TagColumnOperation': {
-                        'ColumnName': target_column_name,
-                        'Tags': [
-                            {
-                                'ColumnDescription': {
-                                    'Text': description
-                                }
+        for operation in self._find_operations('TagColumnOperation', target_column_name):
+            for tag in operation['TagColumnOperation']['Tags']:
+                if tag.get('ColumnDescription') is not None:
+                    tag['ColumnDescription']['Text'] = description
+                    return
+        self._insert_operation(
+            self._insert_position('TagColumnOperation'),
+            {
+                'TagColumnOperation': {
+                    'ColumnName': target_column_name,
+                    'Tags': [
+                        {
+                            'ColumnDescription': {
+                                'Text': description
                             }
-                        ]
-                    }
-                },
-            )
+                        }
+                    ]
+                }
+            },
+        )
 
     def remove_cast_column_type_operation(
         self,
@@ -280,11 +367,9 @@ class LogicalTable:
         CastColumnTypeOperationを削除します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        for index, operation in enumerate(self._logical_table['DataTransforms']):
-            if operation.get('CastColumnTypeOperation') is not None:
-                if operation['CastColumnTypeOperation']['ColumnName'] == target_column_name:
-                    del self._logical_table['DataTransforms'][index]
-                    break
+        for operation in self._find_operations('CastColumnTypeOperation', target_column_name):
+            self._remove_operation(operation)
+            break
 
     def get_cast_column_type(
         self,
@@ -294,10 +379,8 @@ class LogicalTable:
         物理カラム名からCastColumnTypeOperationのNewColumnTypeを取得します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        for operation in self._logical_table['DataTransforms']:
-            if operation.get('CastColumnTypeOperation') is not None:
-                if operation['CastColumnTypeOperation']['ColumnName'] == target_column_name:
-                    return operation['CastColumnTypeOperation']['NewColumnType']
+        for operation in self._find_operations('CastColumnTypeOperation', target_column_name):
+            return operation['CastColumnTypeOperation']['NewColumnType']
         return None
 
     def set_cast_column_type_operation(
@@ -309,25 +392,18 @@ class LogicalTable:
         CastColumnTypeOperationを設定します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        exits = False
-        last_cast_column_type_index = self._before_project_operation_index()
-        for index, operation in enumerate(self._logical_table['DataTransforms']):
-            if operation.get('CastColumnTypeOperation') is not None:
-                last_cast_column_type_index = index
-                if operation['CastColumnTypeOperation']['ColumnName'] == target_column_name:
-                    exits = True
-                    operation['CastColumnTypeOperation']['NewColumnType'] = column_type.upper()
-                    break
-        if not exits:
-            self._logical_table['DataTransforms'].insert(
-                last_cast_column_type_index + 1,
-                {
-                    'CastColumnTypeOperation': {
-                        'ColumnName': target_column_name,
-                        'NewColumnType': column_type.upper()
-                    }
-                },
-            )
+        for operation in self._find_operations('CastColumnTypeOperation', target_column_name):
+            operation['CastColumnTypeOperation']['NewColumnType'] = column_type.upper()
+            return
+        self._insert_operation(
+            self._insert_position('CastColumnTypeOperation'),
+            {
+                'CastColumnTypeOperation': {
+                    'ColumnName': target_column_name,
+                    'NewColumnType': column_type.upper()
+                }
+            },
+        )
 
     def get_tag_column_geographic_role(
         self,
@@ -337,12 +413,10 @@ class LogicalTable:
         物理カラム名から地理情報のタグを取得します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        for operation in self._logical_table['DataTransforms']:
-            if operation.get('TagColumnOperation') is not None:
-                if operation['TagColumnOperation']['ColumnName'] == target_column_name:
-                    for tag in operation['TagColumnOperation']['Tags']:
-                        if tag.get('ColumnGeographicRole') is not None:
-                            return tag['ColumnGeographicRole']
+        for operation in self._find_operations('TagColumnOperation', target_column_name):
+            for tag in operation['TagColumnOperation']['Tags']:
+                if tag.get('ColumnGeographicRole') is not None:
+                    return tag['ColumnGeographicRole']
         return None
 
     def set_tag_column_geographic_role_operation(
@@ -354,35 +428,24 @@ class LogicalTable:
         TagColumnOperationのColumnGeographicRoleを設定します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        exits = False
-        last_tag_column_index = self._before_project_operation_index()
-        for index, operation in enumerate(self._logical_table['DataTransforms']):
-            if operation.get('TagColumnOperation') is not None:
-                last_tag_column_index = index
-                if operation['TagColumnOperation']['ColumnName'] != target_column_name:
-                    continue
-                for j, tag in enumerate(operation['TagColumnOperation']['Tags']):
-                    if tag.get('ColumnGeographicRole') is not None:
-                        exits = True
-                        tag['ColumnGeographicRole'] = geographic_role.upper()
-                        operation['TagColumnOperation']['Tags'][j] = tag
-                        break
-                if exits:
-                    break
-        if not exits:
-            self._logical_table['DataTransforms'].insert(
-                last_tag_column_index + 1,
-                {
-                    'TagColumnOperation': {
-                        'ColumnName': target_column_name,
-                        'Tags': [
-                            {
-                                'ColumnGeographicRole': geographic_role.upper()
-                            }
-                        ]
-                    }
-                },
-            )
+        for operation in self._find_operations('TagColumnOperation', target_column_name):
+            for tag in operation['TagColumnOperation']['Tags']:
+                if tag.get('ColumnGeographicRole') is not None:
+                    tag['ColumnGeographicRole'] = geographic_role.upper()
+                    return
+        self._insert_operation(
+            self._insert_position('TagColumnOperation'),
+            {
+                'TagColumnOperation': {
+                    'ColumnName': target_column_name,
+                    'Tags': [
+                        {
+                            'ColumnGeographicRole': geographic_role.upper()
+                        }
+                    ]
+                }
+            },
+        )
 
     def add_to_projected_columns(
         self,
@@ -394,22 +457,25 @@ class LogicalTable:
         なかったら追加します。
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        for operation in self._logical_table['DataTransforms']:
-            if operation.get('ProjectOperation') is not None:
-                if target_column_name in operation['ProjectOperation']['ProjectedColumns']:
-                    return
-                operation['ProjectOperation']['ProjectedColumns'].append(
-                    target_column_name)
-                return
-        self._logical_table['DataTransforms'].append(
-            {
-                'ProjectOperation': {
-                    'ProjectedColumns': [
-                        target_column_name
-                    ]
-                }
-            }
-        )
+        data_transforms = self._logical_table['DataTransforms']
+        if self._first_project_position is None:
+            self._insert_operation(
+                len(data_transforms),
+                {
+                    'ProjectOperation': {
+                        'ProjectedColumns': [
+                            target_column_name
+                        ]
+                    }
+                },
+            )
+            return
+        operation = data_transforms[self._first_project_position]
+        projected = self._projected.setdefault(target_column_name, [])
+        if any(target is operation for target in projected):
+            return
+        operation['ProjectOperation']['ProjectedColumns'].append(target_column_name)
+        projected.insert(0, operation)
 
     def contains_projected_columns(
         self,
@@ -419,11 +485,7 @@ class LogicalTable:
         ProjectedColumnsにカラムが含まれているかどうかを返します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        for operation in self._logical_table['DataTransforms']:
-            if operation.get('ProjectOperation') is not None:
-                if target_column_name in operation['ProjectOperation']['ProjectedColumns']:
-                    return True
-        return False
+        return len(self._projected.get(target_column_name, [])) > 0
 
     def remove_from_projected_columns(
         self,
@@ -433,14 +495,33 @@ class LogicalTable:
         ProjectedColumnsからカラムを削除します
         """
         target_column_name = self.get_output_column_name(physical_column_name)
-        for operation in self._logical_table['DataTransforms']:
-            if operation.get('ProjectOperation') is not None:
-                if target_column_name in operation['ProjectOperation']['ProjectedColumns']:
-                    operation['ProjectOperation']['ProjectedColumns'].remove(
-                        target_column_name)
-                    if len(operation['ProjectOperation']['ProjectedColumns']) == 0:
-                        self._logical_table['DataTransforms'].remove(operation)
-                    return
+        projected = self._projected.get(target_column_name)
+        if not projected:
+            return
+        operation = projected.pop(0)
+        if not projected:
+            del self._projected[target_column_name]
+        operation['ProjectOperation']['ProjectedColumns'].remove(target_column_name)
+        if len(operation['ProjectOperation']['ProjectedColumns']) == 0:
+            self._remove_operation(operation)
+
+    def reconcile_columns(
+        self,
+        columns: List[ColumnState],
+        column_types: Dict[str, str],
+    ) -> None:
+        """
+        カラムのあるべき状態からDataTransformsを再構築します。
+        再構築の規則はDataTransformsReconcilerを参照してください。
+        """
+        reconciler = DataTransformsReconciler(
+            self._logical_table.get('DataTransforms', []),
+            self._renames,
+            self._last_positions,
+            self._first_project_position,
+        )
+        self._logical_table['DataTransforms'] = reconciler.reconcile(columns, column_types)
+        self._build_index()
 
     def set_alias(
         self,
@@ -452,74 +533,20 @@ class LogicalTable:
         self._logical_table['Alias'] = alias_name
 
 
-class FieldFolder:
-    """
-    DataSetのフィールドフォルダを表現するクラスです。
-    """
-
-    def __init__(self, field_folder_path: str, field_folders: Optional[Dict[str, Any]]) -> None:
-        self._field_folder_path = field_folder_path
-        self.description = field_folders.get('description')
-        self.columns = field_folders.get('columns', [])
-
-    @property
-    def field_folder_path(self) -> str:
-        """フィールドフォルダパス"""
-        return self._field_folder_path
-
-    def to_dict(self) -> Dict[str, Any]:
-        """属性を辞書に変換します"""
-        result = {}
-        if self.description is not None:
-            result['description'] = self.description
-        if self.columns is not None:
-            result['columns'] = self.columns
-        return result
-
-    def contains_column(
-            self,
-            column_name: str
-    ) -> bool:
-        """指定したカラム名を含むかどうかを返します"""
-        return column_name in self.columns
-
-    def remove_column(
-            self,
-            column_name: str
-    ) -> None:
-        """指定したカラム名を削除します"""
-        self.columns.remove(column_name)
-
-    def rename_column(
-        self,
-        old_column_name: str,
-        new_column_name: str
-    ) -> None:
-        """指定したカラム名を変更します"""
-        if old_column_name in self.columns:
-            self.columns.remove(old_column_name)
-            self.columns.append(new_column_name)
-
-    def add_column(
-            self,
-            column_name: str
-    ) -> None:
-        """指定したカラム名を追加します"""
-        if column_name not in self.columns:
-            self.columns.append(column_name)
-
-    @property
-    def column_count(self) -> int:
-        """カラム数"""
-        return len(self.columns)
-
-
 class DataSet:
     """
     QuickSightのDataSetを表現するクラスです。
     DataSetの操作インタフェースを提供します
     """
 
+    __slots__ = (
+        '_data_set',
+        '_physical_table_map',
+        '_logical_tabel_map',
+        '_column_field_folders',
+        '_field_folders',
+    )
+
     def __init__(self, data_set: Dict[str, Any]) -> None:
         self._data_set = data_set
         self._physical_table_map = {
@@ -530,8 +557,9 @@ class DataSet:
             k: LogicalTable(k, v)
             for k, v in self._data_set['LogicalTableMap'].items()
         }
+        self._column_field_folders: Dict[str, Dict[str, None]] = {}
         self._field_folders = {
-            k: FieldFolder(k, v)
+            k: FieldFolder(k, v, self._column_field_folders)
             for k, v in self._data_set['FieldFolders'].items()
         }
 
@@ -543,27 +571,40 @@ class DataSet:
         return self._data_set[key]
 
     def to_dict(self) -> Dict[str, Any]:
-        """DataSetの属性を辞書に変換します"""
-        self._data_set['PhysicalTableMap'] = {
-            k: v.to_dict()
-            for k, v in self._physical_table_map.items()
-        }
-        self._data_set['LogicalTableMap'] = {
-            k: v.to_dict()
-            for k, v in self._logical_tabel_map.items()
+        """
+        DataSetの属性を辞書に変換します。
+        新しい辞書を返し、元のDataSetは変更しません
+        """
+        return dict(self._items())
+
+    _excluded_keys = frozenset(['OutputColumns', 'LastUpdatedTime'])
+
+    def _items(self) -> Iterator[Tuple[str, Any]]:
+        """
+        元の辞書のキーの順で、テーブルとフィールドフォルダを現在の状態に置き換えた属性を返します。
+        テーブルの辞書はコピーせずに共有します
+        """
+        field_folders = self._field_folders_dict()
+        for key, value in self._data_set.items():
+            if key in self._excluded_keys:
+                continue
+            if key == 'PhysicalTableMap':
+                value = {k: v.to_dict() for k, v in self._physical_table_map.items()}
+            elif key == 'LogicalTableMap':
+                value = {k: v.to_dict() for k, v in self._logical_tabel_map.items()}
+            elif key == 'FieldFolders':
+                if len(field_folders) == 0:
+                    continue
+                value = field_folders
+            yield key, value
+
+    def _field_folders_dict(self) -> Dict[str, Any]:
+        """カラムを含むフィールドフォルダを辞書に変換します"""
+        return {
+            k.rstrip('/'): v.to_dict()
+            for k, v in self._field_folders.items()
+            if v.column_count > 0
         }
-        self._data_set['FieldFolders'] = {}
-        for k, v in self._field_folders.items():
-            if v.column_count > 0:
-                self._data_set['FieldFolders'][k.rstrip('/')] = v.to_dict()
-
-        if len(self._data_set['FieldFolders']) == 0:
-            del self._data_set['FieldFolders']
-        if 'OutputColumns' in self._data_set:
-            del self._data_set['OutputColumns']
-        if 'LastUpdatedTime' in self._data_set:
-            del self._data_set['LastUpdatedTime']
-        return self._data_set
 
     def to_json(self) -> str:
         """to_json returns JSON string of DataSet"""
@@ -624,12 +665,25 @@ class DataSet:
                 physical_column_name, logical_column_name
             )
             if old_output_column_name != logical_column_name:
-                for field_folder in self._field_folders.values():
-                    field_folder.rename_column(
-                        old_output_column_name, logical_column_name
-                    )
+                self._rename_in_field_folders(old_output_column_name, logical_column_name)
 
 
+    def remove_rename_column_operation(
+            self,
+            physical_table_id: str,
+            physical_column_name: str,
+    ) -> None:
+        """
+        指定された物理テーブルの指定された物理カラムのRenameColumnOperationを削除します
+        """
+        for logical_table in self.find_logical_by_physical(physical_table_id):
+            old_output_column_name = logical_table.get_output_column_name(
+                physical_column_name
+            )
+            logical_table.remove_rename_column_operation(physical_column_name)
+            if old_output_column_name != physical_column_name:
+                self._rename_in_field_folders(old_output_column_name, physical_column_name)
+
     def set_tag_column_description_operation(
             self,
             physical_table_id: str,
@@ -723,21 +777,62 @@ class DataSet:
         """
         指定された物理テーブルの指定された物理カラムを指定されたフィールドフォルダに追加します
         """
-        if field_folder_path not in self._field_folders:
-            self._field_folders[field_folder_path] = FieldFolder(
-                field_folder_path, {}
-            )
         self.add_to_projected_columns(physical_table_id, physical_column_name)
         for logical_table in self.find_logical_by_physical(physical_table_id):
             column_name = logical_table.get_output_column_name(
                 physical_column_name
             )
-            for field_folder in self._field_folders.values():
-                if field_folder.field_folder_path != field_folder_path:
-                    if field_folder.contains_column(column_name):
-                        field_folder.remove_column(column_name)
-                    continue
-                field_folder.add_column(column_name)
+            self._move_to_field_folder(column_name, field_folder_path)
+
+    def _move_to_field_folder(
+            self,
+            column_name: str,
+            field_folder_path: str
+    ) -> None:
+        """カラムを指定されたフィールドフォルダに移動します"""
+        if field_folder_path not in self._field_folders:
+            self._field_folders[field_folder_path] = FieldFolder(
+                field_folder_path, {}, self._column_field_folders,
+            )
+        for path in list(self._column_field_folders.get(column_name, {})):
+            if path != field_folder_path:
+                self._field_folders[path].remove_column(column_name)
+        self._field_folders[field_folder_path].add_column(column_name)
+
+    def _rename_in_field_folders(
+            self,
+            old_column_name: str,
+            new_column_name: str
+    ) -> None:
+        """フィールドフォルダ内のカラム名を変更します"""
+        for path in list(self._column_field_folders.get(old_column_name, {})):
+            self._field_folders[path].rename_column(old_column_name, new_column_name)
+
+    def reconcile_columns(
+            self,
+            physical_table_id: str,
+            columns: List[ColumnState],
+    ) -> None:
+        """
+        指定された物理テーブルに関連する論理テーブルを、カラムのあるべき状態に合わせます。
+        DataTransformsは論理テーブルごとに1回で再構築し、フィールドフォルダも合わせて更新します。
+        columnsは物理テーブルに存在するカラムだけを含む必要があります。
+        """
+        column_types = self._physical_table_map[physical_table_id].column_types
+        for logical_table in self.find_logical_by_physical(physical_table_id):
+            old_output_column_names = [
+                logical_table.get_output_column_name(column.physical_column_name)
+                for column in columns
+            ]
+            logical_table.reconcile_columns(columns, column_types)
+            for column, old_output_column_name in zip(columns, old_output_column_names):
+                column_name = logical_table.get_output_column_name(
+                    column.physical_column_name
+                )
+                if old_output_column_name != column_name:
+                    self._rename_in_field_folders(old_output_column_name, column_name)
+                if column.folder is not None:
+                    self._move_to_field_folder(column_name, column.folder)
 
     def find_relational_table(self) -> Iterator[PhysicalTable]:
         """
@@ -759,9 +854,14 @@ class DataSet:
             column_name = logical_table.get_output_column_name(
                 physical_column_name
             )
-            for field_folder in self._field_folders.values():
-                if field_folder.contains_column(column_name):
-                    return field_folder.field_folder_path
+            paths = self._column_field_folders.get(column_name)
+            if not paths:
+                continue
+            if len(paths) == 1:
+                return next(iter(paths))
+            for path in self._field_folders:
+                if path in paths:
+                    return path
         return None
 
     def set_alias(
@@ -787,9 +887,8 @@ class DataSet:
             column_name = logical_table.get_output_column_name(
                 physical_column_name
             )
-            for field_folder in self._field_folders.values():
-                if field_folder.contains_column(column_name):
-                    field_folder.remove_column(column_name)
+            for path in list(self._column_field_folders.get(column_name, {})):
+                self._field_folders[path].remove_column(column_name)
 
     def add_field_folder(
         self,
@@ -801,12 +900,12 @@ class DataSet:
         """
         if field_folder_path not in self._field_folders:
             self._field_folders[field_folder_path] = FieldFolder(
-                field_folder_path, {},
+                field_folder_path, {}, self._column_field_folders,
             )
         if description is not None:
             self._field_folders[field_folder_path].description = description
 
-    _update_data_set_input_keys = [
+    _update_data_set_input_keys = frozenset([
         'AwsAccountId',
         'DataSetId',
         'Name',
@@ -820,21 +919,23 @@ class DataSet:
         'ColumnLevelPermissionRules',
         'DataSetUsageConfiguration',
         'DatasetParameters',
-    ]
+    ])
 
     def generate_update_data_set_input(
         self,
         aws_account_id: str,
     ) -> Dict[str, Any]:
         """
-        UpdateDataSetのInputを生成します
+        UpdateDataSetのInputを生成します。
+        UpdateDataSetのキーだけを持つ新しい辞書を返し、元のDataSetは変更しません。
+        論理テーブルの辞書はDataSetと共有するので、以降の変更が反映されます
         """
-        update_data_set_input = self.to_dict()
+        update_data_set_input = {
+            key: value
+            for key, value in self._items()
+            if key in self._update_data_set_input_keys
+        }
         update_data_set_input['AwsAccountId'] = aws_account_id
-        keys = list(update_data_set_input.keys())
-        for key in keys:
-            if key not in self._update_data_set_input_keys:
-                del update_data_set_input[key]
         return update_data_set_input
 
     def physical_column_contains(
@@ -849,3 +950,18 @@ class DataSet:
         if physical_table is None:
             return False
         return physical_table.column_contains(physical_column_name)
+
+
+def list_data_set_ids(quicksight_client: Any, aws_account_id: str) -> List[str]:
+    """ListDataSetsをページングして、アカウントのすべてのDataSetIDを返します"""
+    data_set_ids: List[str] = []
+    kwargs = {'AwsAccountId': aws_account_id}
+    while True:
+        output = quicksight_client.list_data_sets(**kwargs)
+        data_set_ids.extend(
+            summary['DataSetId'] for summary in output.get('DataSetSummaries', [])
+        )
+        next_token = output.get('NextToken')
+        if not next_token:
+            return data_set_ids
+        kwargs['NextToken'] = next_token
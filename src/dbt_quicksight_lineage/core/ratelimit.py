@@ -0,0 +1,271 @@
+"""dbt_quicksight_lineage.core.ratelimit provides client-side rate limiting of QuickSight API"""
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+from dbt_quicksight_lineage.core import tracing
+logger = logging.getLogger()
+
+DEFAULT_DESCRIBE_RATE = 10.0
+DEFAULT_UPDATE_RATE = 2.0
+DEFAULT_MAX_RETRIES = 8
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 20.0
+
+THROTTLING_ERROR_CODES = frozenset([
+    'Throttling',
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+])
+TRANSIENT_ERROR_CODES = frozenset([
+    'InternalFailure',
+    'InternalFailureException',
+    'ServiceUnavailable',
+    'ServiceUnavailableException',
+])
+
+
+@dataclass(frozen=True)
+class RateAdjustment:
+    """
+    RateAdjustment configures AIMD of AdaptiveRateLimiter.
+    each success adds increase / rate, a throttle multiplies the rate by decrease
+    at most once per cooldown seconds, and the rate is kept over min_rate
+    (max_rate / 20 if not set)
+    """
+
+    increase: float = 0.5
+    decrease: float = 0.7
+    cooldown: float = 1.0
+    min_rate: Optional[float] = None
+
+
+@dataclass
+class Backoff:
+    """Backoff retries up to max_retries times with full jitter exponential backoff"""
+
+    max_retries: int = DEFAULT_MAX_RETRIES
+    base_delay: float = DEFAULT_BASE_DELAY
+    max_delay: float = DEFAULT_MAX_DELAY
+    sleep: Callable[[float], None] = time.sleep
+    rng: random.Random = field(default_factory=random.Random)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def delay(self, attempt: int) -> float:
+        """return jittered delay before the retry of attempt"""
+        with self._lock:
+            return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def wait(self, attempt: int) -> float:
+        """sleep before the retry of attempt, return slept seconds"""
+        delay = self.delay(attempt)
+        self.sleep(delay)
+        return delay
+
+
+def _error_code(ex: Exception) -> Optional[str]:
+    response = getattr(ex, 'response', None)
+    if not isinstance(response, dict):
+        return None
+    return response.get('Error', {}).get('Code')
+
+
+class TokenBucket:  # pylint: disable=too-many-instance-attributes
+    """
+    TokenBucket allows rate calls per second on average and burst calls at once.
+    acquire is thread safe, waiting callers reserve tokens in arrival order.
+    pylint counts the rate property as an attribute besides _rate
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f'rate must be positive: {rate}')
+        self._rate = rate
+        capacity: float = max(1.0, rate) if burst is None else burst
+        self.burst = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """tokens added per second"""
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate: float) -> None:
+        with self._lock:
+            self._refill()
+            self._rate = rate
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def acquire(self) -> float:
+        """take one token, wait until it is available. return waited seconds"""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class AdaptiveRateLimiter:
+    """
+    AdaptiveRateLimiter adjusts the rate of TokenBucket by AIMD as configured by RateAdjustment.
+    the rate grows by about increase per second while calls succeed.
+    calls are paced without burst, tokens saved while idle would be spent as a throttled burst
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        adjustment: Optional[RateAdjustment] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.max_rate = max_rate
+        self.adjustment = adjustment or RateAdjustment()
+        min_rate = self.adjustment.min_rate
+        self.min_rate = min_rate if min_rate is not None else max_rate / 20
+        self._clock = clock
+        self._bucket = TokenBucket(max_rate, burst=1.0, clock=clock, sleep=sleep)
+        self._lock = threading.Lock()
+        self._decreased_at: Optional[float] = None
+
+    @property
+    def rate(self) -> float:
+        """current rate"""
+        return self._bucket.rate
+
+    def acquire(self) -> float:
+        """take one token, wait until it is available. return waited seconds"""
+        return self._bucket.acquire()
+
+    def on_success(self) -> None:
+        """additive increase"""
+        with self._lock:
+            rate = self._bucket.rate
+            self._bucket.rate = min(self.max_rate, rate + self.adjustment.increase / rate)
+
+    def on_throttle(self) -> None:
+        """multiplicative decrease"""
+        with self._lock:
+            now = self._clock()
+            if self._decreased_at is not None \
+                    and now - self._decreased_at < self.adjustment.cooldown:
+                return
+            self._decreased_at = now
+            rate = max(self.min_rate, self._bucket.rate * self.adjustment.decrease)
+            logger.debug("throttled, decrease rate %.2f -> %.2f", self._bucket.rate, rate)
+            self._bucket.rate = rate
+
+
+class RateLimitedQuickSightClient:
+    """
+    RateLimitedQuickSightClient calls QuickSight API through AdaptiveRateLimiter.
+    describe and list calls share describe_limiter, update calls use update_limiter.
+    throttled and transient errors are retried by backoff
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        describe_limiter: AdaptiveRateLimiter,
+        update_limiter: AdaptiveRateLimiter,
+        backoff: Optional[Backoff] = None,
+    ) -> None:
+        self._client = client
+        self.describe_limiter = describe_limiter
+        self.update_limiter = update_limiter
+        self.backoff = backoff or Backoff()
+
+    @classmethod
+    def from_rates(
+        cls,
+        client: Any,
+        describe_rate: float = DEFAULT_DESCRIBE_RATE,
+        update_rate: float = DEFAULT_UPDATE_RATE,
+        **kwargs,
+    ) -> 'RateLimitedQuickSightClient':
+        """build RateLimitedQuickSightClient with max calls per second of describe and update"""
+        return cls(
+            client,
+            AdaptiveRateLimiter(describe_rate),
+            AdaptiveRateLimiter(update_rate),
+            **kwargs,
+        )
+
+    @classmethod
+    def from_boto3(
+        cls,
+        describe_rate: float = DEFAULT_DESCRIBE_RATE,
+        update_rate: float = DEFAULT_UPDATE_RATE,
+    ) -> 'RateLimitedQuickSightClient':
+        """build RateLimitedQuickSightClient on boto3 QuickSight client"""
+        # pylint: disable=import-outside-toplevel
+        import boto3
+        from botocore.config import Config
+        # throttling is retried by RateLimitedQuickSightClient instead of botocore
+        client = boto3.client(
+            'quicksight',
+            config=Config(retries={'mode': 'standard', 'max_attempts': 1}),
+        )
+        return cls.from_rates(client, describe_rate=describe_rate, update_rate=update_rate)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def describe_data_set(self, **kwargs) -> Dict[str, Any]:
+        """call DescribeDataSet with describe budget"""
+        return self._call(self.describe_limiter, self._client.describe_data_set, kwargs)
+
+    def list_data_sets(self, **kwargs) -> Dict[str, Any]:
+        """call ListDataSets with describe budget"""
+        return self._call(self.describe_limiter, self._client.list_data_sets, kwargs)
+
+    def update_data_set(self, **kwargs) -> Dict[str, Any]:
+        """call UpdateDataSet with update budget"""
+        return self._call(self.update_limiter, self._client.update_data_set, kwargs)
+
+    def _call(
+        self,
+        limiter: AdaptiveRateLimiter,
+        method: Callable[..., Dict[str, Any]],
+        kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            limiter.acquire()
+            try:
+                output = method(**kwargs)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                code = _error_code(ex)
+                if code not in THROTTLING_ERROR_CODES and code not in TRANSIENT_ERROR_CODES:
+                    raise
+                if attempt >= self.backoff.max_retries:
+                    raise
+                if code in THROTTLING_ERROR_CODES:
+                    limiter.on_throttle()
+                tracing.current_span().add_retry()
+                delay = self.backoff.wait(attempt)
+                logger.debug("%s, retried %d after %.2fs", code, attempt + 1, delay)
+                attempt += 1
+                continue
+            limiter.on_success()
+            return output
@@ -0,0 +1,319 @@
+"""このモジュールはカラムのあるべき状態から論理テーブルのDataTransformsを再構築するモジュールです。"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+RECONCILE_OPERATION_KEYS = [
+    'RenameColumnOperation',
+    'TagColumnOperation',
+    'CastColumnTypeOperation',
+]
+
+
+@dataclass(slots=True)
+class ColumnState:
+    """
+    物理カラムのあるべき状態を表現するクラスです。
+    Noneの項目は変更しません。descriptionが空文字の場合は説明のタグを削除します。
+    """
+
+    physical_column_name: str
+    field_name: Optional[str] = None
+    description: Optional[str] = None
+    geographic_role: Optional[str] = None
+    data_type: Optional[str] = None
+    hidden: bool = False
+    folder: Optional[str] = None
+
+    @property
+    def projected(self) -> bool:
+        """ProjectedColumnsに含めるかどうか。フォルダに入れるカラムは常に含めます"""
+        return not self.hidden or self.folder is not None
+
+
+@dataclass
+class _Changes:
+    """再構築で追加・削除する操作です"""
+
+    new_operations: Dict[str, List[Dict[str, Any]]] = field(
+        default_factory=lambda: {key: [] for key in RECONCILE_OPERATION_KEYS}
+    )
+    removed: Set[int] = field(default_factory=set)
+    new_projected_columns: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _ExistingOperations:
+    """出力カラム名で引けるようにした既存の操作です"""
+
+    tags: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    casts: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    projects: List[Tuple[Dict[str, Any], Set[str]]] = field(default_factory=list)
+    hidden: Dict[int, Set[str]] = field(default_factory=dict)
+
+
+class DataTransformsReconciler:  # pylint: disable=too-few-public-methods
+    """
+    カラムのあるべき状態からDataTransformsを再構築するクラスです。
+    既存の操作はその場で書き換え、新しい操作は同じ種類の最後の操作の後ろに、
+    同じ種類の操作がない場合はRename, Tag, Castの順でProjectOperationの前に置きます。
+    ProjectOperationがない場合は以前のAppと同じく先頭の操作の後ろに置きます。
+    隠すカラムをフォルダに入れる場合も以前のAppと同じくProjectedColumnsの末尾に移します。
+    CreateColumnsOperationやFilterOperationなど管理対象外の操作はそのままの位置に残します。
+    """
+
+    def __init__(
+        self,
+        data_transforms: List[Dict[str, Any]],
+        renames: Dict[str, List[Dict[str, Any]]],
+        last_positions: Dict[str, int],
+        first_project_position: Optional[int],
+    ) -> None:
+        self._data_transforms = data_transforms
+        self._renames = renames
+        self._last_positions = last_positions
+        self._first_project_position = first_project_position
+        self._changes = _Changes()
+
+    def reconcile(
+        self,
+        columns: List[ColumnState],
+        column_types: Dict[str, str],
+    ) -> List[Dict[str, Any]]:
+        """再構築したDataTransformsを返します"""
+        renamed, output_column_names = self._reconcile_renames(columns)
+        existing = self._scan(renamed)
+        for column, column_name in zip(columns, output_column_names):
+            _reconcile_tag(column, column_name, existing.tags.get(column_name, []), self._changes)
+            _reconcile_cast(
+                column,
+                column_name,
+                existing.casts.get(column_name, []),
+                self._changes,
+                column_types,
+            )
+            self._reconcile_projection(column, column_name, existing)
+        self._remove_hidden(existing)
+        data_transforms = self._emit()
+        if self._changes.new_projected_columns:
+            data_transforms.append({
+                'ProjectOperation': {
+                    'ProjectedColumns': self._changes.new_projected_columns,
+                },
+            })
+        return data_transforms
+
+    def _reconcile_renames(
+        self,
+        columns: List[ColumnState],
+    ) -> Tuple[Dict[str, str], List[str]]:
+        """
+        RenameColumnOperationをあるべき状態にします。
+        書き換えが必要なカラム名のマップと、各カラムの出力カラム名を返します
+        """
+        renamed: Dict[str, str] = {}
+        output_column_names: List[str] = []
+        for column in columns:
+            physical_column_name = column.physical_column_name
+            renames = self._renames.get(physical_column_name)
+            if column.field_name is None:
+                if renames:
+                    old_column_name = renames[0]['RenameColumnOperation']['NewColumnName']
+                    self._changes.removed.add(id(renames[0]))
+                    if old_column_name != physical_column_name:
+                        renamed[old_column_name] = physical_column_name
+                output_column_names.append(physical_column_name)
+                continue
+            old_column_name = physical_column_name
+            if renames:
+                operation = renames[0]['RenameColumnOperation']
+                old_column_name = operation['NewColumnName']
+                operation['NewColumnName'] = column.field_name
+            else:
+                self._changes.new_operations['RenameColumnOperation'].append({
+                    'RenameColumnOperation': {
+                        'ColumnName': physical_column_name,
+                        'NewColumnName': column.field_name,
+                    },
+                })
+            for column_name in (physical_column_name, old_column_name):
+                if column_name != column.field_name:
+                    renamed[column_name] = column.field_name
+            output_column_names.append(column.field_name)
+        return renamed, output_column_names
+
+    def _scan(self, renamed: Dict[str, str]) -> _ExistingOperations:
+        """参照しているカラム名を書き換えつつ、出力カラム名で操作を引けるようにします"""
+        existing = _ExistingOperations()
+        for operation in self._data_transforms:
+            if id(operation) in self._changes.removed:
+                continue
+            for key, value in operation.items():
+                if value is None or key == 'RenameColumnOperation':
+                    continue
+                if key == 'ProjectOperation':
+                    if renamed:
+                        value['ProjectedColumns'] = [
+                            renamed.get(column_name, column_name)
+                            for column_name in value['ProjectedColumns']
+                        ]
+                    existing.projects.append((operation, set(value['ProjectedColumns'])))
+                elif isinstance(value, dict) and value.get('ColumnName') is not None:
+                    column_name = renamed.get(value['ColumnName'], value['ColumnName'])
+                    value['ColumnName'] = column_name
+                    if key == 'TagColumnOperation':
+                        existing.tags.setdefault(column_name, []).append(operation)
+                    elif key == 'CastColumnTypeOperation':
+                        existing.casts.setdefault(column_name, []).append(operation)
+        return existing
+
+    def _reconcile_projection(
+        self,
+        column: ColumnState,
+        column_name: str,
+        existing: _ExistingOperations,
+    ) -> None:
+        """カラムをProjectedColumnsに含めるか、隠すカラムとして記録します"""
+        if column.projected:
+            if not existing.projects:
+                self._changes.new_projected_columns.append(column_name)
+            elif column_name not in existing.projects[0][1]:
+                existing.projects[0][0]['ProjectOperation']['ProjectedColumns'].append(column_name)
+                existing.projects[0][1].add(column_name)
+            elif column.hidden:
+                projected_columns = existing.projects[0][0]['ProjectOperation']['ProjectedColumns']
+                projected_columns.remove(column_name)
+                projected_columns.append(column_name)
+            return
+        for operation, projected_columns in existing.projects:
+            if column_name in projected_columns:
+                projected_columns.discard(column_name)
+                existing.hidden.setdefault(id(operation), set()).add(column_name)
+                return
+
+    def _remove_hidden(self, existing: _ExistingOperations) -> None:
+        """隠すカラムをProjectedColumnsから除き、空になったProjectOperationを削除します"""
+        for operation, projected_columns in existing.projects:
+            hidden = existing.hidden.get(id(operation))
+            if hidden is None:
+                continue
+            operation['ProjectOperation']['ProjectedColumns'] = [
+                column_name
+                for column_name in operation['ProjectOperation']['ProjectedColumns']
+                if column_name not in hidden
+            ]
+            if len(projected_columns) == 0:
+                self._changes.removed.add(id(operation))
+
+    def _emit(self) -> List[Dict[str, Any]]:
+        """既存の操作と新しい操作を1回の走査で並べます"""
+        after: Dict[int, List[Dict[str, Any]]] = {}
+        before_project: List[Dict[str, Any]] = []
+        for key in RECONCILE_OPERATION_KEYS:
+            new_operations = self._changes.new_operations[key]
+            if not new_operations:
+                continue
+            last_position = self._last_positions.get(key)
+            if last_position is None:
+                before_project.extend(new_operations)
+            else:
+                after.setdefault(last_position, []).extend(new_operations)
+        before_position = self._first_project_position
+        if before_position is None:
+            before_position = min(1, len(self._data_transforms))
+        result: List[Dict[str, Any]] = []
+        for position, operation in enumerate(self._data_transforms):
+            if position == before_position:
+                result.extend(before_project)
+            if id(operation) not in self._changes.removed:
+                result.append(operation)
+            result.extend(after.get(position, []))
+        if before_position == len(self._data_transforms):
+            result.extend(before_project)
+        return result
+
+
+def _reconcile_tag(
+    column: ColumnState,
+    column_name: str,
+    operations: List[Dict[str, Any]],
+    changes: _Changes,
+) -> None:
+    """TagColumnOperationのタグをあるべき状態にします。あるべき値がNoneの場合はタグを削除します"""
+    tags: List[Tuple[str, Any]] = []
+    if column.description is not None:
+        tags.append((
+            'ColumnDescription',
+            {'Text': column.description} if column.description != '' else None,
+        ))
+    if column.geographic_role is not None:
+        tags.append(('ColumnGeographicRole', column.geographic_role.upper()))
+    for tag_key, tag_value in tags:
+        if _update_tag(operations, changes, tag_key, tag_value) or tag_value is None:
+            continue
+        changes.new_operations['TagColumnOperation'].append({
+            'TagColumnOperation': {
+                'ColumnName': column_name,
+                'Tags': [
+                    {
+                        tag_key: tag_value,
+                    },
+                ],
+            },
+        })
+
+
+def _update_tag(
+    operations: List[Dict[str, Any]],
+    changes: _Changes,
+    tag_key: str,
+    tag_value: Any,
+) -> bool:
+    """既存のタグを書き換えます。タグがあった場合はTrueを返します"""
+    for operation in operations:
+        if id(operation) in changes.removed:
+            continue
+        tags = operation['TagColumnOperation']['Tags']
+        for j, tag in enumerate(tags):
+            if tag.get(tag_key) is None:
+                continue
+            if tag_value is None:
+                if len(tags) == 1:
+                    changes.removed.add(id(operation))
+                else:
+                    tags.pop(j)
+            elif isinstance(tag_value, dict):
+                tag[tag_key].update(tag_value)
+            else:
+                tag[tag_key] = tag_value
+            return True
+    return False
+
+
+def _reconcile_cast(
+    column: ColumnState,
+    column_name: str,
+    operations: List[Dict[str, Any]],
+    changes: _Changes,
+    column_types: Dict[str, str],
+) -> None:
+    """CastColumnTypeOperationをあるべき状態にします。物理カラムと同じ型の場合は削除します"""
+    if column.data_type is None:
+        return
+    column_type = column.data_type.upper()
+    physical_column_type = column_types[column.physical_column_name].upper()
+    for operation in operations:
+        if id(operation) in changes.removed:
+            continue
+        if column_type == physical_column_type:
+            changes.removed.add(id(operation))
+        else:
+            operation['CastColumnTypeOperation']['NewColumnType'] = column_type
+        return
+    if column_type == physical_column_type:
+        return
+    changes.new_operations['CastColumnTypeOperation'].append({
+        'CastColumnTypeOperation': {
+            'ColumnName': column_name,
+            'NewColumnType': column_type,
+        },
+    })
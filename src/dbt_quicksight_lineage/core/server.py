@@ -0,0 +1,310 @@
+"""dbt_quicksight_lineage.core.server serves App over local HTTP or Unix socket"""
+import hmac
+import http.server
+import json
+import logging
+import re
+import secrets
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote
+from dbt_quicksight_lineage.core.app import DEFAULT_MAX_WORKERS, App, UpdateDataSetResult
+from dbt_quicksight_lineage.core.dbt import ManifestLoader
+logger = logging.getLogger()
+
+# requests accepted while every pool worker is busy, more are answered with 503
+DEFAULT_MAX_QUEUED = 32
+
+_DATA_SET_PATH = re.compile(
+    r'^/data-sets/(?P<data_set_id>[^/]+)/(?P<action>plan|dry-run|update)$'
+)
+
+
+def generate_token() -> str:
+    """random token of the server, clients send it as `Authorization: Bearer <token>`"""
+    return secrets.token_urlsafe(32)
+
+
+class LineageService:
+    """
+    LineageService holds the resident App and handles requests of the server.
+    reload builds new App and swaps the reference,
+    requests in flight keep using the App they started with
+    """
+
+    def __init__(
+        self,
+        app: App,
+        loader: Optional[ManifestLoader] = None,
+        token: Optional[str] = None,
+    ) -> None:
+        self._app = app
+        self.loader = loader
+        self.token = generate_token() if token is None else token
+        self.loaded_at = time.time()
+        self._reload_lock = threading.Lock()
+
+    @property
+    def app(self) -> App:
+        """current App"""
+        return self._app
+
+    def health(self) -> Dict[str, Any]:
+        """status of the service"""
+        app = self._app
+        return {
+            'status': 'ok',
+            'aws_account_id': app.aws_account_id,
+            'models': len(app.model_index.models),
+            'data_sets': len(app.find_data_set_ids()),
+            'loaded_at': self.loaded_at,
+        }
+
+    def plan(self, data_set_id: str) -> Dict[str, Any]:
+        """describe the data set, return UpdateDataSet input and whether it changes the data set"""
+        app = self._app
+        data_set = app.describe_data_set(data_set_id)
+        update_data_set_input, changed = app.plan_update_data_set_changes(data_set)
+        return {
+            'data_set_id': data_set_id,
+            'changed': changed,
+            'update_data_set_input': update_data_set_input,
+        }
+
+    def update(
+        self,
+        data_set_id: str,
+        dry_run: bool = False,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """run update data set operation"""
+        result = self._app.run_update_data_set(data_set_id, dry_run=dry_run, force=force)
+        return result_to_dict(result)
+
+    def authorized(self, authorization: Optional[str]) -> bool:
+        """whether the Authorization header carries the token of the service"""
+        if authorization is None or not authorization.startswith('Bearer '):
+            return False
+        return hmac.compare_digest(authorization[len('Bearer '):], self.token)
+
+    def reload(self) -> Dict[str, Any]:
+        """reload the manifest and swap App, return data set ids whose referring models changed"""
+        if self.loader is None:
+            raise ValueError('manifest loader is not configured')
+        with self._reload_lock:
+            manifest = self.loader.load_manifest()
+            previous = self._app
+            app = previous.with_manifest(manifest)
+            changed_data_set_ids = app.model_index.changed_data_set_ids(previous.model_index)
+            self._app = app
+            self.loaded_at = time.time()
+        logger.info("manifest reloaded, %d DataSets changed", len(changed_data_set_ids))
+        return {'changed_data_set_ids': changed_data_set_ids}
+
+
+def result_to_dict(result: UpdateDataSetResult) -> Dict[str, Any]:
+    """JSON serializable form of UpdateDataSetResult"""
+    return {
+        'data_set_id': result.data_set_id,
+        'status': result.status,
+        'update_data_set_input': result.update_data_set_input,
+        'output': result.output,
+        'error': None if result.error is None else str(result.error),
+    }
+
+
+class LineageRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    LineageRequestHandler routes requests to LineageService.
+    every request must carry `Authorization: Bearer <token>` and no Origin header,
+    POST requests must be `Content-Type: application/json`, so browsers cannot forge them
+
+        GET  /health
+        GET  /data-sets
+        POST /data-sets/{id}/plan
+        POST /data-sets/{id}/dry-run   body: {"force": bool}
+        POST /data-sets/{id}/update    body: {"force": bool}
+        POST /reload
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # idle keep-alive connections must not hold pool workers forever
+    timeout = 30
+    server: Any
+    close_connection: bool
+
+    def setup(self) -> None:
+        super().setup()
+        self.close_connection = True
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """handle GET request"""
+        service: LineageService = self.server.service
+        rejected = self._reject(service)
+        if rejected is not None:
+            self._respond(*rejected)
+        elif self.path == '/health':
+            self._respond(200, service.health())
+        elif self.path == '/data-sets':
+            self._respond(200, {'data_set_ids': service.app.find_data_set_ids()})
+        else:
+            self._respond(404, {'error': f'not found: {self.path}'})
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """handle POST request"""
+        service: LineageService = self.server.service
+        status, body = self._reject(service) or self._dispatch_post(service)
+        self._respond(status, body)
+
+    def _reject(self, service: LineageService) -> Optional[Tuple[int, Dict[str, Any]]]:
+        rejected: Optional[Tuple[int, Dict[str, Any]]] = None
+        # any request sent by a browser carries Origin, the local API has no browser clients
+        if self.headers.get('Origin') is not None:
+            rejected = 403, {'error': 'cross-origin requests are not allowed'}
+        elif not service.authorized(self.headers.get('Authorization')):
+            rejected = 401, {'error': 'missing or invalid token'}
+        elif self.command == 'POST' and self.headers.get_content_type() != 'application/json':
+            rejected = 415, {'error': 'Content-Type must be application/json'}
+        if rejected is not None:
+            # the body is left unread, the connection cannot be reused
+            self.close_connection = True
+        return rejected
+
+    def _dispatch_post(self, service: LineageService) -> Tuple[int, Dict[str, Any]]:
+        try:
+            params = self._read_json()
+        except ValueError as ex:
+            return 400, {'error': f'invalid request body: {ex}'}
+        try:
+            if self.path == '/reload':
+                return 200, service.reload()
+            match = _DATA_SET_PATH.match(self.path)
+            if match is None:
+                return 404, {'error': f'not found: {self.path}'}
+            data_set_id = unquote(match.group('data_set_id'))
+            action = match.group('action')
+            if action == 'plan':
+                return 200, service.plan(data_set_id)
+            result = service.update(
+                data_set_id,
+                dry_run=action == 'dry-run',
+                force=bool(params.get('force', False)),
+            )
+            return 200, result
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.error("%s %s failed: %s", self.command, self.path, ex)
+            return 500, {'error': str(ex)}
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length == 0:
+            return {}
+        params = json.loads(self.rfile.read(length))
+        if not isinstance(params, dict):
+            raise ValueError('JSON object is expected')
+        return params
+
+    def _respond(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, default=str, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # client address of Unix socket is empty
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return 'unix'
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+class _PooledServerMixin:
+    """
+    handle each request in a thread pool instead of a thread per request.
+    at most max_workers + max_queued requests are held, the others are answered with 503
+    """
+
+    service: LineageService
+    _executor: ThreadPoolExecutor
+    _slots: threading.BoundedSemaphore
+
+    def _init_pool(self, max_workers: int, max_queued: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """submit the request to the pool, or answer 503 when the pool is full"""
+        # the slot is released when the pool finishes the request
+        if not self._slots.acquire(blocking=False):  # pylint: disable=consider-using-with
+            logger.warning("too many requests, rejected a connection")
+            self._reject_overloaded(request)
+            self.shutdown_request(request)  # type: ignore[attr-defined]
+            return
+        self._executor.submit(self._process_request_in_pool, request, client_address)
+
+    def _process_request_in_pool(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)  # type: ignore[attr-defined]
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handle_error(request, client_address)  # type: ignore[attr-defined]
+        finally:
+            self.shutdown_request(request)  # type: ignore[attr-defined]
+            self._slots.release()
+
+    @staticmethod
+    def _reject_overloaded(request: Any) -> None:
+        body = json.dumps({'error': 'too many requests in flight'}).encode('utf-8')
+        head = (
+            'HTTP/1.1 503 Service Unavailable\r\n'
+            'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n'
+        )
+        try:
+            request.sendall(head.encode('ascii') + body)
+        except OSError as ex:
+            logger.debug("failed to send 503: %s", ex)
+
+    def server_close(self) -> None:
+        """wait for requests in flight and close"""
+        super().server_close()  # type: ignore[misc]
+        self._executor.shutdown(wait=True)
+
+
+class LineageHTTPServer(_PooledServerMixin, http.server.HTTPServer):
+    """LineageHTTPServer serves LineageService over TCP"""
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        service: LineageService,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ) -> None:
+        self.service = service
+        self._init_pool(max_workers, max_queued)
+        super().__init__(address, LineageRequestHandler)
+
+
+class LineageUnixServer(_PooledServerMixin, socketserver.UnixStreamServer):
+    """LineageUnixServer serves LineageService over Unix socket"""
+
+    def __init__(
+        self,
+        socket_path: str,
+        service: LineageService,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ) -> None:
+        self.service = service
+        self._init_pool(max_workers, max_queued)
+        super().__init__(socket_path, LineageRequestHandler)
@@ -0,0 +1,228 @@
+"""dbt_quicksight_lineage.core.snapshot provides local snapshot store of QuickSight data sets"""
+import contextvars
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from dbt_quicksight_lineage.core.fileutil import atomic_write
+from dbt_quicksight_lineage.core.quicksight import list_data_set_ids
+logger = logging.getLogger()
+
+DEFAULT_EXPORT_MAX_WORKERS = 8
+
+_INDEX_FILE = 'index.json'
+_OBJECTS_DIR = 'objects'
+_OBJECT_SUFFIX = '.json.gz'
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, lambda f: f.write(data))
+
+
+def aws_account_id_from_arn(arn: str) -> str:
+    """return AWS account id of QuickSight ARN"""
+    parts = arn.split(':')
+    if len(parts) < 6 or parts[0] != 'arn' or not parts[4]:
+        raise ValueError(f'invalid ARN: {arn}')
+    return parts[4]
+
+
+class SnapshotStore:
+    """
+    SnapshotStore keeps DataSet definitions of DescribeDataSet as gzip compressed JSON.
+    objects are addressed by sha256 of their canonical JSON, so unchanged data sets are
+    stored once. index.json maps AWS account id and data set id to the object
+    """
+
+    def __init__(self, snapshot_dir: str) -> None:
+        self.snapshot_dir = snapshot_dir
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.snapshot_dir, _OBJECTS_DIR, digest[:2], digest + _OBJECT_SUFFIX)
+
+    def load_index(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        return {aws_account_id: {data_set_id: entry}},
+        entry has digest, Name and LastUpdatedTime
+        """
+        try:
+            with open(os.path.join(self.snapshot_dir, _INDEX_FILE), encoding='utf-8') as f:
+                return json.load(f)['accounts']
+        except FileNotFoundError:
+            return {}
+
+    def put_object(self, data_set: Dict[str, Any]) -> str:
+        """store DataSet definition and return its digest"""
+        data = json.dumps(
+            data_set,
+            sort_keys=True,
+            separators=(',', ':'),
+            ensure_ascii=False,
+            default=_json_default,
+        ).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            # mtime=0 keeps the compressed bytes deterministic
+            _write_atomic(path, gzip.compress(data, mtime=0))
+        return digest
+
+    def get_object(self, digest: str) -> Dict[str, Any]:
+        """return DataSet definition of the digest"""
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return json.loads(f.read().decode('utf-8'))
+
+    def put(self, data_sets: List[Dict[str, Any]]) -> Dict[str, str]:
+        """store DataSet definitions and add them to index, return {data_set_id: digest}"""
+        entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        digests: Dict[str, str] = {}
+        for data_set in data_sets:
+            data_set_id = data_set['DataSetId']
+            digest = self.put_object(data_set)
+            digests[data_set_id] = digest
+            last_updated_time = json.dumps(data_set.get('LastUpdatedTime'), default=_json_default)
+            entries.setdefault(aws_account_id_from_arn(data_set['Arn']), {})[data_set_id] = {
+                'digest': digest,
+                'Name': data_set.get('Name'),
+                'LastUpdatedTime': json.loads(last_updated_time),
+            }
+        with self._lock:
+            index = self.load_index()
+            for aws_account_id, account_entries in entries.items():
+                index.setdefault(aws_account_id, {}).update(account_entries)
+            _write_atomic(
+                os.path.join(self.snapshot_dir, _INDEX_FILE),
+                json.dumps({'accounts': index}, indent=2, sort_keys=True).encode('utf-8'),
+            )
+        return digests
+
+    def default_aws_account_id(self) -> str:
+        """return the AWS account id if the snapshot has exactly one account"""
+        accounts = list(self.load_index())
+        if len(accounts) != 1:
+            raise ValueError(
+                f'snapshot {self.snapshot_dir} has {len(accounts)} AWS accounts, expected one')
+        return accounts[0]
+
+
+class SnapshotQuickSightClient:
+    """
+    SnapshotQuickSightClient serves DescribeDataSet and ListDataSets from SnapshotStore
+    in place of boto3 QuickSight client. it is read only, UpdateDataSet is not supported
+    """
+
+    def __init__(self, store: SnapshotStore) -> None:
+        self.store = store
+        self._index = store.load_index()
+
+    def describe_data_set(
+        self,
+        AwsAccountId: str,  # pylint: disable=invalid-name
+        DataSetId: str,  # pylint: disable=invalid-name
+    ) -> Dict[str, Any]:
+        """return DescribeDataSet output from the snapshot"""
+        entry = self._index.get(AwsAccountId, {}).get(DataSetId)
+        if entry is None:
+            raise ValueError(f'data set {DataSetId} of {AwsAccountId} is not found in snapshot')
+        return {'Status': 200, 'DataSet': self.store.get_object(entry['digest'])}
+
+    def list_data_sets(
+        self,
+        AwsAccountId: str,  # pylint: disable=invalid-name
+        NextToken: Optional[str] = None,  # pylint: disable=invalid-name,unused-argument
+    ) -> Dict[str, Any]:
+        """return ListDataSets output of all data sets in the snapshot, in one page"""
+        return {
+            'Status': 200,
+            'DataSetSummaries': [
+                {
+                    'DataSetId': data_set_id,
+                    'Name': entry.get('Name'),
+                    'LastUpdatedTime': entry.get('LastUpdatedTime'),
+                }
+                for data_set_id, entry in sorted(self._index.get(AwsAccountId, {}).items())
+            ],
+        }
+
+    def update_data_set(self, **kwargs) -> Dict[str, Any]:
+        """UpdateDataSet is not supported on snapshot"""
+        raise ValueError(f'cannot update data set {kwargs.get("DataSetId")}: snapshot is read only')
+
+
+@dataclass
+class ExportResult:
+    """ExportResult is the result of export operation"""
+
+    data_set_ids: List[str]
+    digests: Dict[str, str]
+    errors: Dict[str, Exception]
+
+
+def export_data_sets(
+    quicksight_client: Any,
+    aws_account_id: str,
+    store: SnapshotStore,
+    data_set_ids: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_EXPORT_MAX_WORKERS,
+) -> ExportResult:
+    """
+    describe data sets concurrently and store them into SnapshotStore.
+    all data sets of the account are exported if data_set_ids is None.
+    failure of one data set does not abort the others
+    """
+    if data_set_ids is None:
+        data_set_ids = list_data_set_ids(quicksight_client, aws_account_id)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                quicksight_client.describe_data_set,
+                AwsAccountId=aws_account_id,
+                DataSetId=data_set_id,
+            )
+            for data_set_id in data_set_ids
+        ]
+    data_sets = []
+    errors: Dict[str, Exception] = {}
+    for data_set_id, future in zip(data_set_ids, futures):
+        try:
+            output = future.result()
+            if output.get('Status') != 200:
+                raise ValueError(f'describe data set failed status: {output.get("Status")}')
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.error("export DataSet %s failed: %s", data_set_id, ex)
+            errors[data_set_id] = ex
+            continue
+        data_sets.append(output['DataSet'])
+    digests = store.put(data_sets)
+    return ExportResult(data_set_ids=data_set_ids, digests=digests, errors=errors)
+
+
+def import_describe_data_set_outputs(store: SnapshotStore, paths: List[str]) -> Dict[str, str]:
+    """
+    store DescribeDataSet outputs saved as JSON files (e.g. by aws quicksight describe-data-set),
+    a file may also contain DataSet only. return {data_set_id: digest}
+    """
+    data_sets = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            output = json.load(f)
+        data_set = output.get('DataSet', output)
+        if 'DataSetId' not in data_set or 'Arn' not in data_set:
+            raise ValueError(f'{path} is not DescribeDataSet output')
+        data_sets.append(data_set)
+    return store.put(data_sets)
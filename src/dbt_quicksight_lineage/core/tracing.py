@@ -0,0 +1,147 @@
+"""dbt_quicksight_lineage.core.tracing emits structured trace spans as NDJSON"""
+import contextvars
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, TextIO
+
+SPAN_MANIFEST_LOAD = 'manifest.load'
+SPAN_DESCRIBE_DATA_SET = 'quicksight.describe_data_set'
+SPAN_UPDATE_DATA_SET = 'quicksight.update_data_set'
+SPAN_MODIFY_LOGICAL_TABLE = 'app.modify_logical_table'
+
+
+def payload_size(payload: Any) -> int:
+    """size in bytes of payload serialized as JSON"""
+    return len(json.dumps(payload, default=str).encode('utf-8'))
+
+
+class _NoopSpan:
+    """span returned while tracing is off, every method does nothing"""
+
+    recording = False
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set(self, **attributes: Any) -> None:
+        """do nothing"""
+
+    def set_payload_size(self, payload: Any) -> None:
+        """do nothing"""
+
+    def add_retry(self) -> None:
+        """do nothing"""
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar(
+    'dbt_quicksight_lineage_current_span', default=None)
+
+
+class Span:
+    """
+    Span measures the block of with statement and is emitted by Tracer on exit.
+    while entered, it is the current span of the context, asyncio.to_thread inherits it
+    """
+
+    recording = True
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id: Optional[str] = None
+        self.attributes = attributes
+        self._started_at = 0.0
+        self._token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> 'Span':
+        parent = _current_span.get()
+        if parent is not None:
+            self.parent_id = parent.span_id
+        self._token = _current_span.set(self)
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        duration = time.perf_counter() - self._started_at
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        record: Dict[str, Any] = {
+            'trace_id': self._tracer.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            # wall clock start, derived so that start + duration is the exit time
+            'start': time.time() - duration,
+            'duration': duration,
+            'status': 'ok' if exc_type is None else 'error',
+        }
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        record.update(
+            (key, value) for key, value in self.attributes.items() if value is not None
+        )
+        self._tracer.emit(record)
+
+    def set(self, **attributes: Any) -> None:
+        """set attributes of the span"""
+        self.attributes.update(attributes)
+
+    def set_payload_size(self, payload: Any) -> None:
+        """set payload_size attribute to the JSON size of payload"""
+        self.attributes['payload_size'] = payload_size(payload)
+
+    def add_retry(self) -> None:
+        """count up retries attribute"""
+        self.attributes['retries'] = self.attributes.get('retries', 0) + 1
+
+
+class Tracer:
+    """Tracer writes finished spans to stream, one JSON object per line. it is thread safe"""
+
+    def __init__(self, stream: TextIO, trace_id: Optional[str] = None) -> None:
+        self._stream = stream
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        """new span, use it with with statement"""
+        return Span(self, name, attributes)
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        """write a span record"""
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + '\n')
+
+
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """set the Tracer used by span, None turns tracing off"""
+    global _tracer  # pylint: disable=global-statement
+    _tracer = tracer
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """new span of the Tracer, or a shared no-op span if tracing is off"""
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_SPAN
+    return tracer.span(name, **attributes)
+
+
+def current_span() -> Any:
+    """the innermost entered span of the context, or a no-op span"""
+    current = _current_span.get()
+    if current is None:
+        return _NOOP_SPAN
+    return current
@@ -0,0 +1,154 @@
+"""dbt_quicksight_lineage.core.watch keeps App resident and updates data sets on manifest changes"""
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from dbt_quicksight_lineage.core.app import DEFAULT_MAX_WORKERS, App, UpdateDataSetResult
+from dbt_quicksight_lineage.core.dbt import ManifestLoader
+logger = logging.getLogger()
+
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_DEBOUNCE = 2.0
+
+
+@dataclass
+class FileWatcher:
+    """
+    FileWatcher polls mtime and size of files.
+    the file list is recomputed on each poll, so added and removed files are detected
+    """
+
+    list_paths: Callable[[], Iterable[str]]
+    interval: float = DEFAULT_POLL_INTERVAL
+    debounce: float = DEFAULT_DEBOUNCE
+    clock: Callable[[], float] = time.monotonic
+    sleep: Callable[[float], None] = time.sleep
+    _stats: Dict[str, Tuple[int, int]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._stats = self._stat_all()
+
+    def _stat_all(self) -> Dict[str, Tuple[int, int]]:
+        stats = {}
+        for path in self.list_paths():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def poll(self) -> Set[str]:
+        """return paths added, removed or modified since the last poll"""
+        stats = self._stat_all()
+        changed = {
+            path for path in stats.keys() | self._stats.keys()
+            if stats.get(path) != self._stats.get(path)
+        }
+        self._stats = stats
+        return changed
+
+    def wait(self) -> Set[str]:
+        """
+        block until files change and then stay unchanged for debounce seconds,
+        so that one dbt run writing many files is reported as one batch
+        """
+        changed: Set[str] = set()
+        last_changed_at = 0.0
+        while True:
+            self.sleep(self.interval)
+            found = self.poll()
+            now = self.clock()
+            if found:
+                logger.debug("changed: %s", sorted(found))
+                changed |= found
+                last_changed_at = now
+            elif changed and now - last_changed_at >= self.debounce:
+                return changed
+
+
+@dataclass
+class WatchBatch:
+    """WatchBatch is the result of one reload and update"""
+
+    changed_paths: Set[str]
+    reloaded: bool = False
+    data_set_ids: List[str] = field(default_factory=list)
+    retried_data_set_ids: List[str] = field(default_factory=list)
+    results: List[UpdateDataSetResult] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+
+@dataclass
+class ManifestWatcher:
+    """
+    ManifestWatcher keeps App and its QuickSight client resident.
+    when the inputs of ManifestLoader change, the manifest is reloaded and
+    only the data sets whose referring models changed are updated.
+    changes which keep ManifestLoader.cache_key, e.g. saving a file as is, skip the reload.
+    otherwise each batch costs a full load, a dbt parse without manifest_path
+    unless the manifest cache of the loader has the inputs.
+    data sets failed to update are retried in the next batch
+    """
+
+    app: App
+    loader: ManifestLoader
+    file_watcher: Optional[FileWatcher] = None
+    dry_run: bool = False
+    max_workers: int = DEFAULT_MAX_WORKERS
+    failed_data_set_ids: List[str] = field(default_factory=list)
+    _cache_key: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.file_watcher is None:
+            self.file_watcher = FileWatcher(self.loader.input_paths)
+        self._cache_key = self.loader.cache_key()
+
+    def run_once(self) -> WatchBatch:
+        """wait for changes, then reload the manifest and update affected data sets"""
+        assert self.file_watcher is not None
+        batch = WatchBatch(changed_paths=self.file_watcher.wait())
+        changed_data_set_ids: List[str] = []
+        try:
+            cache_key = self.loader.cache_key()
+            manifest = None if cache_key == self._cache_key else self.loader.load_manifest()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            # e.g. manifest.json is being written or the project has errors,
+            # wait for the next change
+            logger.warning("cannot reload manifest: %s", ex)
+            batch.error = ex
+            return batch
+        if manifest is None:
+            logger.info("inputs of the manifest are unchanged, skip reload")
+        else:
+            changed_data_set_ids = self.app.reload_manifest(manifest)
+            self._cache_key = cache_key
+            batch.reloaded = True
+        # data set ids no longer referred by the manifest are not retried
+        retryable = set(self.app.find_data_set_ids()) - set(changed_data_set_ids)
+        batch.retried_data_set_ids = [
+            data_set_id for data_set_id in self.failed_data_set_ids if data_set_id in retryable
+        ]
+        batch.data_set_ids = changed_data_set_ids + batch.retried_data_set_ids
+        if batch.data_set_ids:
+            batch.results = self.app.update_data_sets(
+                batch.data_set_ids,
+                dry_run=self.dry_run,
+                max_workers=self.max_workers,
+            )
+        self.failed_data_set_ids = [
+            result.data_set_id for result in batch.results if not result.succeeded
+        ]
+        return batch
+
+    def run(
+        self,
+        on_batch: Callable[[WatchBatch], None] = lambda batch: None,
+        max_batches: Optional[int] = None,
+    ) -> None:
+        """run batches until interrupted, or max_batches times"""
+        count = 0
+        while max_batches is None or count < max_batches:
+            on_batch(self.run_once())
+            count += 1
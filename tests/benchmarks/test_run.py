@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)
+
+
+class TestBenchmarks:
+    def test_run_tiny(self, tmp_path):
+        output_path = tmp_path / 'results.json'
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks', '--preset', 'tiny', '--repeat', '1',
+             '--output', str(output_path)],
+            cwd=ROOT_DIR,
+            check=True,
+            capture_output=True,
+        )
+        with open(output_path, encoding='utf-8') as f:
+            report = json.load(f)
+        assert report['params']['preset'] == 'tiny'
+        names = [result['name'] for result in report['results']]
+        assert names == [
+            'import.cli',
+            'manifest_loader.load_manifest.json',
+            'manifest_loader.load_manifest.slim',
+            'manifest_loader.load_manifest.cached',
+            'app.detect_modify_target',
+            'app.modify_logical_table',
+            'data_set.to_dict',
+            'data_set.generate_update_data_set_input',
+            'app.update_schema_yaml',
+            'app.update_data_sets.dry_run',
+        ]
+        for result in report['results']:
+            assert len(result['times']) == 1
+            assert result['min'] >= 0
+        assert report['results'][-1]['peak_memory'] > 0
@@ -0,0 +1,140 @@
+import pytest
+import subprocess
+import sys
+
+HEAVY_MODULES = ['dbt', 'boto3', 'botocore', 'ruamel', 'asyncio']
+
+CHECK_SCRIPT = """
+import sys
+from click.testing import CliRunner
+from dbt_quicksight_lineage.cli.main import dbt_quicksight_lineage
+for args in {args!r}:
+    result = CliRunner().invoke(dbt_quicksight_lineage, args)
+    assert result.exit_code == 0, result.output
+heavy = sorted(
+    name for name in sys.modules
+    if name.split('.')[0] in {heavy!r}
+)
+print(','.join(heavy))
+"""
+
+
+def top_imports(stderr, n=10):
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    return '\n'.join(f'{us:>10} us  {name}' for us, name in rows[:n])
+
+
+class TestImport:
+    @pytest.mark.parametrize('args', [
+        [],
+        [['--help']],
+        [['--version']],
+        [['init', '--help']],
+        [['update-data-set', '--help']],
+    ])
+    def test_heavy_modules_are_not_imported(self, args):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             CHECK_SCRIPT.format(args=args, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imported = proc.stdout.strip()
+        assert imported == '', (
+            f'heavy modules imported: {imported}\n'
+            f'slowest imports:\n{top_imports(proc.stderr)}'
+        )
+
+
+class TestProfile:
+    def test_profile(self, tmp_path):
+        import pstats
+        from click.testing import CliRunner
+        from dbt_quicksight_lineage.cli.main import dbt_quicksight_lineage
+        profile_path = tmp_path / 'run.prof'
+        result = CliRunner().invoke(
+            dbt_quicksight_lineage, ['--profile', str(profile_path), 'init', '--help'])
+        assert result.exit_code == 0, result.output
+        pstats.Stats(str(profile_path))
+        phases = (tmp_path / 'run.prof.phases.txt').read_text()
+        assert phases.splitlines()[0].split() == ['phase', 'calls', 'total(s)', 'mean(ms)']
+
+    def test_trace(self, tmp_path):
+        import json
+        from click.testing import CliRunner
+        from dbt_quicksight_lineage.cli.main import dbt_quicksight_lineage
+        trace_path = tmp_path / 'trace.ndjson'
+        for _ in range(2):
+            result = CliRunner().invoke(
+                dbt_quicksight_lineage, ['--trace', str(trace_path), 'init', '--help'])
+            assert result.exit_code == 0, result.output
+        spans = [json.loads(line) for line in trace_path.read_text().splitlines()]
+        assert [span['name'] for span in spans] == ['cli.init', 'cli.init']
+        assert spans[0]['trace_id'] != spans[1]['trace_id']
+
+
+class TestOptions:
+    @pytest.mark.parametrize('command', ['init', 'update-data-set'])
+    def test_stacked_requires_options(self, command):
+        from click.testing import CliRunner
+        from dbt_quicksight_lineage.cli.main import dbt_quicksight_lineage
+        result = CliRunner().invoke(dbt_quicksight_lineage, [command, '--help'])
+        assert result.exit_code == 0, result.output
+        for option in ['--manifest-path', '--project-dir', '--slim-manifest', '--describe-rate', '--describe-cache-dir']:
+            assert option in result.output
+
+
+class TestSnapshot:
+    def test_import_and_offline_update_data_set(self, tmp_path):
+        import json
+        from click.testing import CliRunner
+        from dbt_quicksight_lineage.cli.main import dbt_quicksight_lineage
+        snapshot_dir = str(tmp_path / 'snapshot')
+        result = CliRunner().invoke(
+            dbt_quicksight_lineage, ['import', '--snapshot-dir', snapshot_dir, 'tests/data/modified_data_set.json'])
+        assert result.exit_code == 0, result.output
+        result = CliRunner().invoke(dbt_quicksight_lineage, [
+            'update-data-set', '--snapshot-dir', snapshot_dir, '--manifest-path', 'tests/data/manifest.json',
+            '--profiles-dir', 'tests/data',
+            '--data-set-id', '00000000-0000-0000-0000-000000000000', '--dry-run', '--force',
+        ])
+        assert result.exit_code == 0, result.output
+        assert 'dry run' in result.output
+        result = CliRunner().invoke(dbt_quicksight_lineage, [
+            'update-data-set', '--snapshot-dir', snapshot_dir, '--manifest-path', 'tests/data/manifest.json',
+            '--profiles-dir', 'tests/data',
+            '--data-set-id', '00000000-0000-0000-0000-000000000000', '--force',
+        ])
+        assert result.exit_code == 2
+        assert '--dry-run' in result.output
+
+    def test_offline_update_data_set_pipeline(self, tmp_path):
+        from click.testing import CliRunner
+        from dbt_quicksight_lineage.cli.main import dbt_quicksight_lineage
+        snapshot_dir = str(tmp_path / 'snapshot')
+        result = CliRunner().invoke(
+            dbt_quicksight_lineage, ['import', '--snapshot-dir', snapshot_dir, 'tests/data/modified_data_set.json'])
+        assert result.exit_code == 0, result.output
+        args = [
+            'update-data-set', '--snapshot-dir', snapshot_dir, '--manifest-path', 'tests/data/manifest.json',
+            '--profiles-dir', 'tests/data', '--all', '--dry-run', '--force',
+        ]
+        threaded = CliRunner(mix_stderr=False).invoke(dbt_quicksight_lineage, args)
+        pipelined = CliRunner(mix_stderr=False).invoke(dbt_quicksight_lineage, args + ['--pipeline'])
+        # the other data set of the manifest is not in the snapshot
+        assert threaded.exit_code == pipelined.exit_code == 1
+        assert 'dry_run: 00000000-0000-0000-0000-000000000000' in pipelined.output
+        assert pipelined.output == threaded.output
+        result = CliRunner().invoke(dbt_quicksight_lineage, args[:-3] + [
+            '--data-set-id', '00000000-0000-0000-0000-000000000000', '--dry-run', '--pipeline',
+        ])
+        assert result.exit_code == 2
+        assert '--pipeline requires --all' in result.output
@@ -0,0 +1,119 @@
+import pytest
+import copy
+import json
+
+MODIFIED_DATA_SET_PATH = 'tests/data/modified_data_set.json'
+FIRST_PHYSICAL_TABLE_ID = '12345678-9abc-def0-1234-56789abcdef0'
+FIRST_LOGICAL_TABLE_ID = '23456781-9abc-def0-1234-56789abcdef0'
+
+
+class FakeClock:
+    """clock and sleep which advance only when sleeping, running actions scheduled with at()"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.actions = []
+
+    def __call__(self):
+        return self.now
+
+    def at(self, when, action):
+        self.actions.append((when, action))
+        self.actions.sort(key=lambda scheduled: scheduled[0])
+
+    def sleep(self, seconds):
+        self.now += seconds
+        while self.actions and self.actions[0][0] <= self.now:
+            self.actions.pop(0)[1]()
+
+
+class FakeClientError(Exception):
+    """botocore ClientError look-alike carrying only the error code"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {'Error': {'Code': code}}
+
+
+class FakeQuickSightClient:
+    """
+    in-memory QuickSight client.
+    without data_sets every DataSetId describes tests/data/modified_data_set.json
+    """
+
+    def __init__(self, data_sets=None, listed_ids=None, page_size=2, failures=0):
+        self.data_sets = data_sets
+        self.listed_ids = listed_ids if listed_ids is not None else list(data_sets or [])
+        self.page_size = page_size
+        self.failures = failures
+        self.described = []
+        self.updated = []
+        self.list_calls = []
+
+    def list_data_sets(self, AwsAccountId, NextToken=None):
+        self.list_calls.append(NextToken)
+        start = int(NextToken or 0)
+        end = start + self.page_size
+        response = {
+            'Status': 200,
+            'DataSetSummaries': [
+                {'DataSetId': data_set_id} for data_set_id in self.listed_ids[start:end]
+            ],
+        }
+        if end < len(self.listed_ids):
+            response['NextToken'] = str(end)
+        return response
+
+    def describe_data_set(self, AwsAccountId, DataSetId):
+        self.described.append(DataSetId)
+        if self.failures > 0:
+            self.failures -= 1
+            raise ValueError('describe failed')
+        if self.data_sets is None:
+            return {'Status': 200, 'DataSet': load_modified_data_set()}
+        if DataSetId not in self.data_sets:
+            raise ValueError(f'data set {DataSetId} is not found')
+        return {'Status': 200, 'DataSet': copy.deepcopy(self.data_sets[DataSetId])}
+
+    def update_data_set(self, **kwargs):
+        self.updated.append(kwargs['DataSetId'])
+        return {'Status': 200, 'DataSetId': kwargs['DataSetId']}
+
+
+def load_modified_data_set():
+    with open(MODIFIED_DATA_SET_PATH, 'r') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def client_error():
+    return FakeClientError
+
+
+@pytest.fixture
+def fake_quicksight_client():
+    return FakeQuickSightClient
+
+
+@pytest.fixture
+def modified_data_set():
+    return load_modified_data_set()
+
+
+@pytest.fixture
+def two_table_data_set(modified_data_set):
+    """modified data set with a second logical table built on my_second_dbt_model"""
+    data_set = copy.deepcopy(modified_data_set)
+    second_table = copy.deepcopy(data_set['PhysicalTableMap'][FIRST_PHYSICAL_TABLE_ID])
+    second_table['RelationalTable']['Name'] = 'my_second_dbt_model'
+    data_set['PhysicalTableMap']['second-physical-table'] = second_table
+    second_logical_table = copy.deepcopy(data_set['LogicalTableMap'][FIRST_LOGICAL_TABLE_ID])
+    second_logical_table['Alias'] = 'My Second DBT Model'
+    second_logical_table['Source']['PhysicalTableId'] = 'second-physical-table'
+    data_set['LogicalTableMap']['second-logical-table'] = second_logical_table
+    return data_set
@@ -8,6 +8,7 @@ import filecmp
 from moto import mock_quicksight, mock_sts
 from mock import patch
 from dbt_quicksight_lineage.core.quicksight import DataSet
+from dbt_quicksight_lineage.core.dbt import ModelRecord, SlimManifest
 from dbt_quicksight_lineage.core import (
     ManifestLoader,
     App,
@@ -319,3 +320,264 @@ class TestApp:
         )
         assert filecmp.cmp('tests/data/models/example/schema.yml',
                            'tests/data/expected_schema.yml')
+
+    def test_init_writes_each_schema_file_once(
+        self,
+        example_manifest,
+        tmp_path,
+        fake_quicksight_client,
+        two_table_data_set,
+    ):
+        data_set_id = '00000000-0000-0000-0000-000000000000'
+        app = App(
+            quicksight_client=fake_quicksight_client({data_set_id: two_table_data_set}),
+            manifest=example_manifest,
+            aws_account_id='123456789012',
+        )
+        expected_dir = tmp_path / 'expected'
+        actual_dir = tmp_path / 'actual'
+        for project_dir in (expected_dir, actual_dir):
+            (project_dir / 'models' / 'example').mkdir(parents=True)
+            shutil.copyfile('tests/data/schema.yml', project_dir / 'models' / 'example' / 'schema.yml')
+        data_set = DataSet(json.loads(json.dumps(two_table_data_set)))
+        for physical_table_id, node_id in [
+            ('12345678-9abc-def0-1234-56789abcdef0', 'model.test_project.my_first_dbt_model'),
+            ('second-physical-table', 'model.test_project.my_second_dbt_model'),
+        ]:
+            app._update_schema_yaml(
+                data_set, physical_table_id, example_manifest.nodes[node_id], str(expected_dir))
+
+        from ruamel.yaml import YAML
+        with patch.object(YAML, 'load', autospec=True, side_effect=YAML.load) as load, \
+                patch.object(YAML, 'dump', autospec=True, side_effect=YAML.dump) as dump:
+            app.init(data_set_id, project_dir=str(actual_dir))
+        assert load.call_count == 1
+        assert dump.call_count == 1
+        assert filecmp.cmp(actual_dir / 'models' / 'example' / 'schema.yml',
+                           expected_dir / 'models' / 'example' / 'schema.yml', shallow=False)
+        assert os.listdir(actual_dir / 'models' / 'example') == ['schema.yml']
+        schema_yaml = (actual_dir / 'models' / 'example' / 'schema.yml').read_text()
+        assert 'My First DBT Model' in schema_yaml
+        assert 'My Second DBT Model' in schema_yaml
+
+    def test_init_skips_unchanged_schema_file(
+        self,
+        example_manifest,
+        tmp_path,
+        fake_quicksight_client,
+    ):
+        app = App(
+            quicksight_client=fake_quicksight_client(),
+            manifest=example_manifest,
+            aws_account_id='123456789012',
+        )
+        schema_file_path = tmp_path / 'models' / 'example' / 'schema.yml'
+        schema_file_path.parent.mkdir(parents=True)
+        shutil.copyfile('tests/data/schema.yml', schema_file_path)
+        data_set_id = '00000000-0000-0000-0000-000000000000'
+        results = app.init(data_set_id, project_dir=str(tmp_path))
+        assert [(result.path, result.status) for result in results] == [
+            (str(schema_file_path), 'updated'),
+        ]
+        assert filecmp.cmp(schema_file_path, 'tests/data/expected_schema.yml', shallow=False)
+        os.utime(schema_file_path, ns=(0, 0))
+        results = app.init(data_set_id, project_dir=str(tmp_path))
+        assert [(result.path, result.status) for result in results] == [
+            (str(schema_file_path), 'unchanged'),
+        ]
+        assert os.stat(schema_file_path).st_mtime_ns == 0
+
+    def test_init_all(
+        self,
+        example_manifest,
+        tmp_path,
+        fake_quicksight_client,
+        modified_data_set,
+        two_table_data_set,
+    ):
+        first = modified_data_set
+        second = two_table_data_set
+        second['DataSetId'] = 'second-data-set'
+        client = fake_quicksight_client(
+            {first['DataSetId']: first, second['DataSetId']: second},
+            listed_ids=[first['DataSetId'], 'broken-data-set', second['DataSetId']],
+        )
+        app = App(
+            quicksight_client=client,
+            manifest=example_manifest,
+            aws_account_id='123456789012',
+        )
+        schema_file_path = tmp_path / 'models' / 'example' / 'schema.yml'
+        schema_file_path.parent.mkdir(parents=True)
+        shutil.copyfile('tests/data/schema.yml', schema_file_path)
+        from ruamel.yaml import YAML
+        with patch.object(YAML, 'load', autospec=True, side_effect=YAML.load) as load:
+            result = app.init_all(project_dir=str(tmp_path), max_workers=2)
+        assert client.list_calls == [None, '2']
+        assert result.data_set_ids == [first['DataSetId'], 'broken-data-set', second['DataSetId']]
+        assert list(result.errors) == ['broken-data-set']
+        assert [(r.path, r.status, r.models) for r in result.schema_files] == [
+            (str(schema_file_path), 'updated', 2),
+        ]
+        assert load.call_count == 1
+        schema = YAML().load(schema_file_path.read_text())
+        models = {model['name']: model for model in schema['models']}
+        assert [
+            reference['id'] for reference in models['my_first_dbt_model']['meta']['quicksight']['data_sets']
+        ] == [first['DataSetId'], second['DataSetId']]
+        assert [
+            reference['id'] for reference in models['my_second_dbt_model']['meta']['quicksight']['data_sets']
+        ] == [second['DataSetId']]
+
+    def test_merge_schema(self, tmp_path):
+        from dbt_quicksight_lineage.core.app import _write_schema_patches
+        schema_file_path = tmp_path / 'schema.yml'
+        schema_file_path.write_text(
+            'version: 2\n'
+            '\n'
+            'models:\n'
+            '  # first model\n'
+            '  - name: a\n'
+            '    description: \'model a\'\n'
+            '    columns:\n'
+            '      - name: y\n'
+            '        meta:\n'
+            '          owner: "someone"  # kept\n'
+            '      - name: x\n'
+            '  - name: b\n'
+            '    columns:\n'
+            '      - name: x\n'
+        )
+        _write_schema_patches(str(schema_file_path), [
+            {'models': [{
+                'name': 'b',
+                'meta': {'quicksight': {'logical_table_name': 'B'}},
+                'columns': [{'name': 'x', 'description': 'x of b', 'meta': {'quicksight': {'hidden': True}}}],
+            }]},
+            {'models': [{
+                'name': 'a',
+                'meta': {'quicksight': {'logical_table_name': 'A'}},
+                'columns': [
+                    {'name': 'x', 'meta': {'quicksight': {'field_name': 'X'}}},
+                    {'name': 'y', 'description': 'y of a', 'meta': {'quicksight': {'field_name': 'Y'}}},
+                    {'name': 'z', 'meta': {'quicksight': {'field_name': 'Z'}}},
+                ],
+            }]},
+        ])
+        assert schema_file_path.read_text() == (
+            'version: 2\n'
+            '\n'
+            'models:\n'
+            '  # first model\n'
+            '  - name: a\n'
+            '    description: \'model a\'\n'
+            '    meta:\n'
+            '      quicksight:\n'
+            '        logical_table_name: A\n'
+            '    columns:\n'
+            '      - name: y\n'
+            '        meta:\n'
+            '          owner: "someone"  # kept\n'
+            '          quicksight:\n'
+            '            field_name: Y\n'
+            '        description: y of a\n'
+            '      - name: x\n'
+            '        meta:\n'
+            '          quicksight:\n'
+            '            field_name: X\n'
+            '  - name: b\n'
+            '    meta:\n'
+            '      quicksight:\n'
+            '        logical_table_name: B\n'
+            '    columns:\n'
+            '      - name: x\n'
+            '        meta:\n'
+            '          quicksight:\n'
+            '            hidden: true\n'
+            '        description: x of b\n'
+        )
+
+    def test_find_data_set_ids(self, example_manifest, mock_quicksight_client):
+        app = App(
+            quicksight_client=mock_quicksight_client,
+            manifest=example_manifest
+        )
+        assert app.find_data_set_ids() == [
+            '00000000-0000-0000-0000-000000000000',
+            '11111111-1111-1111-1111-111111111111',
+        ]
+
+    def test_keep_model_records(self, example_manifest, mock_quicksight_client):
+        app = App(
+            quicksight_client=mock_quicksight_client,
+            manifest=example_manifest
+        )
+        assert isinstance(app.manifest, SlimManifest)
+        assert all(isinstance(node, ModelRecord) for node in app.model_index.models)
+        assert not hasattr(app.model_index.models[0], '__dict__')
+        assert [node.unique_id for node in app.model_index.models] == [
+            node.unique_id for node in example_manifest.nodes.values()
+            if node.resource_type == 'model' and node.language == 'sql'
+        ]
+
+    @patch('botocore.client.BaseClient._make_api_call', new=mock_make_api_call)
+    def test_update_data_sets_dry_run(
+        self,
+        example_manifest,
+        mock_quicksight_client,
+    ):
+        app = App(
+            quicksight_client=mock_quicksight_client,
+            manifest=example_manifest
+        )
+        results = app.update_data_sets(
+            app.find_data_set_ids(),
+            dry_run=True,
+            max_workers=2,
+        )
+        with open('tests/data/modified_data_set.json') as f:
+            modified_data_set = DataSet(json.load(f))
+        assert [result.data_set_id for result in results] == app.find_data_set_ids()
+        assert all(result.status == 'dry_run' for result in results)
+        assert results[0].update_data_set_input == modified_data_set.generate_update_data_set_input(
+            '123456789012'
+        )
+
+    def test_update_data_sets_continue_on_failure(self, example_manifest):
+        class FailingQuickSightClient:
+            def describe_data_set(self, AwsAccountId, DataSetId):
+                if DataSetId == '11111111-1111-1111-1111-111111111111':
+                    raise RuntimeError('describe failed')
+                with open('tests/data/describe_data_set_output.json', 'r') as f:
+                    return json.load(f)
+
+            def update_data_set(self, **kwargs):
+                return {'Status': 200}
+
+        app = App(
+            quicksight_client=FailingQuickSightClient(),
+            manifest=example_manifest,
+            aws_account_id='123456789012',
+        )
+        results = app.update_data_sets(app.find_data_set_ids())
+        assert [(result.data_set_id, result.status) for result in results] == [
+            ('00000000-0000-0000-0000-000000000000', 'updated'),
+            ('11111111-1111-1111-1111-111111111111', 'failed'),
+        ]
+        assert isinstance(results[1].error, RuntimeError)
+
+    def test_update_data_sets_skip_unchanged(self, example_manifest, fake_quicksight_client):
+        client = fake_quicksight_client()
+        app = App(
+            quicksight_client=client,
+            manifest=example_manifest,
+            aws_account_id='123456789012',
+        )
+        data_set_id = '00000000-0000-0000-0000-000000000000'
+        results = app.update_data_sets([data_set_id])
+        assert results[0].status == 'unchanged'
+        assert results[0].succeeded
+        assert client.updated == []
+        results = app.update_data_sets([data_set_id], force=True)
+        assert results[0].status == 'updated'
+        assert client.updated == [data_set_id]
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+import pytest
+from dbt_quicksight_lineage.core.quicksight import DataSet
+from dbt_quicksight_lineage.core import (
+    ManifestLoader,
+    AsyncApp,
+)
+from dbt_quicksight_lineage.core.async_app import PipelineOptions
+
+
+@pytest.fixture(scope='class')
+def example_manifest():
+    loader = ManifestLoader(
+        manifest_path='tests/data/manifest.json',
+    )
+    return loader.load_manifest()
+
+
+class LocalAsyncQuickSightClient:
+    def __init__(self, slow_update_data_set_ids=(), failed_data_set_ids=()):
+        self.slow_update_data_set_ids = slow_update_data_set_ids
+        self.failed_data_set_ids = failed_data_set_ids
+        self.events = []
+
+    async def describe_data_set(self, AwsAccountId, DataSetId):
+        await asyncio.sleep(0)
+        self.events.append(('describe', DataSetId))
+        if DataSetId in self.failed_data_set_ids:
+            raise RuntimeError('describe failed')
+        with open('tests/data/describe_data_set_output.json', 'r') as f:
+            output = json.load(f)
+        output['DataSet']['DataSetId'] = DataSetId
+        return output
+
+    async def update_data_set(self, **kwargs):
+        if kwargs['DataSetId'] in self.slow_update_data_set_ids:
+            await asyncio.sleep(0.1)
+        self.events.append(('update', kwargs['DataSetId']))
+        return {'Status': 200, 'DataSetId': kwargs['DataSetId']}
+
+
+class TestAsyncApp:
+    def test_update_data_sets(self, example_manifest):
+        client = LocalAsyncQuickSightClient(
+            slow_update_data_set_ids=['data-set-0'],
+            failed_data_set_ids=['data-set-3'],
+        )
+        app = AsyncApp(
+            manifest=example_manifest,
+            quicksight_client=client,
+            aws_account_id='123456789012',
+            options=PipelineOptions(queue_size=1, describe_concurrency=2, update_concurrency=2),
+        )
+        data_set_ids = [f'data-set-{i}' for i in range(6)]
+        results = asyncio.run(app.update_data_sets(data_set_ids, force=True))
+        assert [(result.data_set_id, result.status) for result in results] == [
+            ('data-set-0', 'updated'),
+            ('data-set-1', 'updated'),
+            ('data-set-2', 'updated'),
+            ('data-set-3', 'failed'),
+            ('data-set-4', 'updated'),
+            ('data-set-5', 'updated'),
+        ]
+        assert results[0].output == {'Status': 200, 'DataSetId': 'data-set-0'}
+        # slow update of data-set-0 does not block describes of the others
+        assert client.events[-1] == ('update', 'data-set-0')
+        describes = [event for event in client.events if event[0] == 'describe']
+        assert len(describes) == 6
+
+    def test_update_data_sets_dry_run(self, example_manifest):
+        client = LocalAsyncQuickSightClient()
+        app = AsyncApp(
+            manifest=example_manifest,
+            quicksight_client=client,
+            aws_account_id='123456789012',
+        )
+        results = asyncio.run(app.update_data_sets(
+            ['00000000-0000-0000-0000-000000000000'],
+            dry_run=True,
+        ))
+        with open('tests/data/modified_data_set.json') as f:
+            modified_data_set = DataSet(json.load(f))
+        assert results[0].status == 'dry_run'
+        assert results[0].update_data_set_input == modified_data_set.generate_update_data_set_input(
+            '123456789012'
+        )
+        assert all(event[0] == 'describe' for event in client.events)
+
+    def test_update_data_sets_unchanged(self, example_manifest):
+        client = LocalAsyncQuickSightClient()
+        app = AsyncApp(
+            manifest=example_manifest,
+            quicksight_client=client,
+            aws_account_id='123456789012',
+        )
+        results = asyncio.run(app.update_data_sets(['data-set-0']))
+        assert results[0].status == 'unchanged'
+        assert results[0].succeeded
+        assert client.events == [('describe', 'data-set-0')]
+
+    def test_plan_in_thread(self, example_manifest):
+        client = LocalAsyncQuickSightClient()
+        app = AsyncApp(
+            manifest=example_manifest,
+            quicksight_client=client,
+            aws_account_id='123456789012',
+        )
+        plan_threads = []
+        plan_update_data_set_changes = app.app.plan_update_data_set_changes
+
+        def record_thread(data_set):
+            plan_threads.append(threading.get_ident())
+            return plan_update_data_set_changes(data_set)
+
+        app.app.plan_update_data_set_changes = record_thread
+        results = asyncio.run(app.update_data_sets(['data-set-0', 'data-set-1'], dry_run=True))
+        assert [result.status for result in results] == ['unchanged', 'unchanged']
+        assert len(plan_threads) == 2
+        assert threading.get_ident() not in plan_threads
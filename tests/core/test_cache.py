@@ -0,0 +1,156 @@
+import pytest
+import datetime
+import json
+import os
+import threading
+from dbt_quicksight_lineage.core.cache import (
+    CachingQuickSightClient,
+    DescribeDataSetCache,
+)
+
+AWS_ACCOUNT_ID = '123456789012'
+
+
+class CountingQuickSightClient:
+    def __init__(self, data_set_ids, page_size=2):
+        self.last_updated_times = {
+            data_set_id: datetime.datetime(2023, 7, 1, tzinfo=datetime.timezone.utc)
+            for data_set_id in data_set_ids
+        }
+        self.page_size = page_size
+        self.calls = []
+
+    def describe_data_set(self, AwsAccountId, DataSetId):
+        self.calls.append(('describe', DataSetId))
+        with open('tests/data/describe_data_set_output.json', 'r') as f:
+            output = json.load(f)
+        output['DataSet']['DataSetId'] = DataSetId
+        output['DataSet']['LastUpdatedTime'] = self.last_updated_times[DataSetId]
+        return output
+
+    def list_data_sets(self, AwsAccountId, NextToken=None):
+        self.calls.append(('list', NextToken))
+        data_set_ids = list(self.last_updated_times)
+        start = int(NextToken or 0)
+        end = start + self.page_size
+        output = {
+            'Status': 200,
+            'DataSetSummaries': [
+                {'DataSetId': data_set_id, 'LastUpdatedTime': self.last_updated_times[data_set_id]}
+                for data_set_id in data_set_ids[start:end]
+            ],
+        }
+        if end < len(data_set_ids):
+            output['NextToken'] = str(end)
+        return output
+
+    def update_data_set(self, **kwargs):
+        self.calls.append(('update', kwargs['DataSetId']))
+        self.last_updated_times[kwargs['DataSetId']] += datetime.timedelta(minutes=1)
+        return {'Status': 200}
+
+
+class TestDescribeDataSetCache:
+    def test_ttl(self, tmp_path, clock):
+        cache = DescribeDataSetCache(str(tmp_path), ttl=60, clock=clock)
+        assert cache.get(AWS_ACCOUNT_ID, 'a') is None
+        cache.put(AWS_ACCOUNT_ID, 'a', {'Status': 200})
+        clock.now += 60
+        assert cache.get(AWS_ACCOUNT_ID, 'a') == {'Status': 200}
+        assert cache.get('210987654321', 'a') is None
+        clock.now += 1
+        assert cache.get(AWS_ACCOUNT_ID, 'a') is None
+        assert os.listdir(tmp_path) == []
+
+    def test_evict_least_recently_used(self, tmp_path, clock):
+        cache = DescribeDataSetCache(str(tmp_path), clock=clock)
+        payload = {'Status': 200, 'DataSet': {'Name': 'x' * 1000}}
+        for data_set_id in ['a', 'b', 'c']:
+            clock.now += 1
+            cache.put(AWS_ACCOUNT_ID, data_set_id, payload)
+        clock.now += 1
+        assert cache.get(AWS_ACCOUNT_ID, 'a') is not None
+        entry_size = os.path.getsize(cache._path(AWS_ACCOUNT_ID, 'a'))
+        cache.max_bytes = entry_size * 3
+        clock.now += 1
+        cache.put(AWS_ACCOUNT_ID, 'd', payload)
+        assert cache.get(AWS_ACCOUNT_ID, 'b') is None
+        for data_set_id in ['a', 'c', 'd']:
+            assert cache.get(AWS_ACCOUNT_ID, data_set_id) is not None
+
+    def test_broken_entry(self, tmp_path):
+        cache = DescribeDataSetCache(str(tmp_path))
+        with open(cache._path(AWS_ACCOUNT_ID, 'a'), 'wb') as f:
+            f.write(b'broken')
+        assert cache.get(AWS_ACCOUNT_ID, 'a') is None
+
+
+class TestCachingQuickSightClient:
+    def test_describe_data_set(self, tmp_path):
+        client = CountingQuickSightClient(['a', 'b', 'c'])
+        output = CachingQuickSightClient(client, DescribeDataSetCache(str(tmp_path))).describe_data_set(
+            AwsAccountId=AWS_ACCOUNT_ID,
+            DataSetId='c',
+        )
+        assert output['DataSet']['DataSetId'] == 'c'
+
+        client.calls = []
+        caching_client = CachingQuickSightClient(client, DescribeDataSetCache(str(tmp_path)))
+        cached = caching_client.describe_data_set(AwsAccountId=AWS_ACCOUNT_ID, DataSetId='c')
+        assert cached == output
+        # ListDataSets is read only until the data set is found
+        assert client.calls == [('list', None), ('list', '2')]
+
+        client.calls = []
+        caching_client.update_data_set(AwsAccountId=AWS_ACCOUNT_ID, DataSetId='c')
+        output = caching_client.describe_data_set(AwsAccountId=AWS_ACCOUNT_ID, DataSetId='c')
+        assert client.calls == [('update', 'c'), ('describe', 'c')]
+        assert output['DataSet']['LastUpdatedTime'] == client.last_updated_times['c']
+
+    def test_describe_data_set_updated_elsewhere(self, tmp_path):
+        client = CountingQuickSightClient(['a'])
+        CachingQuickSightClient(client, DescribeDataSetCache(str(tmp_path))).describe_data_set(
+            AwsAccountId=AWS_ACCOUNT_ID,
+            DataSetId='a',
+        )
+        client.last_updated_times['a'] += datetime.timedelta(minutes=1)
+        client.calls = []
+        caching_client = CachingQuickSightClient(client, DescribeDataSetCache(str(tmp_path)))
+        output = caching_client.describe_data_set(AwsAccountId=AWS_ACCOUNT_ID, DataSetId='a')
+        assert client.calls == [('list', None), ('describe', 'a')]
+        assert output['DataSet']['LastUpdatedTime'] == client.last_updated_times['a']
+
+    def test_describe_data_set_while_listing(self, tmp_path):
+        client = CountingQuickSightClient(['a', 'b', 'c'])
+        cache = DescribeDataSetCache(str(tmp_path))
+        warm_client = CachingQuickSightClient(client, cache)
+        for data_set_id in ['a', 'c']:
+            warm_client.describe_data_set(AwsAccountId=AWS_ACCOUNT_ID, DataSetId=data_set_id)
+
+        reading = threading.Event()
+        release = threading.Event()
+        released = []
+        list_data_sets = client.list_data_sets
+
+        def slow_list_data_sets(**kwargs):
+            if kwargs.get('NextToken') is not None:
+                reading.set()
+                released.append(release.wait(timeout=1))
+            return list_data_sets(**kwargs)
+
+        client.list_data_sets = slow_list_data_sets
+        client.calls = []
+        caching_client = CachingQuickSightClient(client, cache)
+        caching_client.describe_data_set(AwsAccountId=AWS_ACCOUNT_ID, DataSetId='a')
+        thread = threading.Thread(
+            target=caching_client.describe_data_set,
+            kwargs={'AwsAccountId': AWS_ACCOUNT_ID, 'DataSetId': 'c'},
+        )
+        thread.start()
+        assert reading.wait(timeout=5)
+        # 'a' is in the first page, so it does not wait for the second page being read
+        caching_client.describe_data_set(AwsAccountId=AWS_ACCOUNT_ID, DataSetId='a')
+        release.set()
+        thread.join()
+        assert client.calls == [('list', None), ('list', '2')]
+        assert released == [True]
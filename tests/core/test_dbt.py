@@ -1,7 +1,21 @@
 import pytest
+import io
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+from mock import patch
 from dbt_quicksight_lineage.core import (
     ManifestLoader,
 )
+from dbt_quicksight_lineage.core.dbt import (
+    MANIFEST_CACHE_VERSION,
+    ManifestCache,
+    ModelIndex,
+    SlimManifest,
+    read_slim_manifest,
+)
 
 
 class TestManifestLoader:
@@ -134,3 +148,242 @@ class TestManifestLoader:
         loader = ManifestLoader('tests/data/invalid')
         with pytest.raises(ValueError):
             loader.load_manifest()
+
+
+    def test_load_from_json_with_cache(self, tmp_path):
+        manifest_path = tmp_path / 'manifest.json'
+        shutil.copy('tests/data/manifest.json', manifest_path)
+        cache_dir = tmp_path / 'cache'
+        loader = ManifestLoader(
+            manifest_path=str(manifest_path),
+            cache=ManifestCache(str(cache_dir)),
+        )
+        expected = loader.load_manifest()
+        assert os.listdir(cache_dir) == [f'{loader.cache_key()}.pickle']
+        with patch.object(ManifestLoader, '_load_from_json', side_effect=AssertionError('not cached')):
+            actual = loader.load_manifest()
+        assert actual.nodes.keys() == expected.nodes.keys()
+        assert actual.nodes['model.test_project.my_first_dbt_model'].meta == \
+            expected.nodes['model.test_project.my_first_dbt_model'].meta
+
+        key = loader.cache_key()
+        with open(manifest_path, 'a', encoding='utf-8') as f:
+            f.write('\n')
+        assert loader.cache_key() != key
+
+    def test_cache_key_of_project(self, tmp_path):
+        project_dir = tmp_path / 'test_project'
+        shutil.copytree('tests/data/test_project', project_dir)
+        loader = ManifestLoader(
+            project_dir=str(project_dir),
+            profiles_dir=str(project_dir),
+            target='dev',
+        )
+        key = loader.cache_key()
+        (project_dir / 'target' / 'run_results.json').write_text('{}')
+        assert loader.cache_key() == key
+        loader.cli_vars = {'foo': 'bar'}
+        assert loader.cache_key() != key
+        loader.cli_vars = None
+        (project_dir / 'models' / 'example' / 'my_first_dbt_model.sql').write_text('select 1 as id')
+        assert loader.cache_key() != key
+
+    def test_cache_key_of_project_env(self, tmp_path, monkeypatch):
+        project_dir = tmp_path / 'test_project'
+        shutil.copytree('tests/data/test_project', project_dir)
+        loader = ManifestLoader(project_dir=str(project_dir), profiles_dir=str(project_dir))
+        monkeypatch.delenv('DBT_SCHEMA', raising=False)
+        key = loader.cache_key()
+        monkeypatch.setenv('DBT_QUICKSIGHT_LINEAGE_TRACE', 'trace.ndjson')
+        assert loader.cache_key() == key
+        monkeypatch.setenv('DBT_SCHEMA', 'other')
+        assert loader.cache_key() != key
+
+    def test_cache_key_of_project_output_paths(self, tmp_path):
+        project_dir = tmp_path / 'test_project'
+        shutil.copytree('tests/data/test_project', project_dir)
+        with open(project_dir / 'dbt_project.yml', 'a', encoding='utf-8') as f:
+            f.write('target-path: build/target\npackages-install-path: packages\n')
+        loader = ManifestLoader(project_dir=str(project_dir), profiles_dir=str(project_dir))
+        key = loader.cache_key()
+        (project_dir / 'build' / 'target').mkdir(parents=True)
+        (project_dir / 'build' / 'target' / 'manifest.json').write_text('{}')
+        (project_dir / 'packages').mkdir()
+        (project_dir / 'packages' / 'package.yml').write_text('name: package')
+        assert loader.cache_key() == key
+        (project_dir / 'build' / 'other.sql').write_text('select 1')
+        assert loader.cache_key() != key
+
+    def test_cache_eviction(self, tmp_path):
+        cache_dir = tmp_path / 'cache'
+        keys = []
+        for i in range(3):
+            manifest_path = tmp_path / f'manifest{i}.json'
+            shutil.copy('tests/data/manifest.json', manifest_path)
+            with open(manifest_path, 'a', encoding='utf-8') as f:
+                f.write('\n' * i)
+            loader = ManifestLoader(
+                manifest_path=str(manifest_path),
+                cache=ManifestCache(str(cache_dir), max_entries=2),
+                slim=True,
+            )
+            loader.load_manifest()
+            keys.append(loader.cache_key())
+            os.utime(cache_dir / f'{keys[-1]}.pickle', (i, i))
+        assert sorted(os.listdir(cache_dir)) == sorted(f'{key}.pickle' for key in keys[1:])
+
+    def test_input_paths(self, tmp_path):
+        project_dir = tmp_path / 'test_project'
+        shutil.copytree('tests/data/test_project', project_dir)
+        (project_dir / 'target').mkdir(exist_ok=True)
+        (project_dir / 'target' / 'manifest.json').write_text('{}')
+        loader = ManifestLoader(project_dir=str(project_dir), profiles_dir=str(project_dir))
+        paths = [os.path.relpath(path, project_dir) for path in loader.input_paths()]
+        assert os.path.join('models', 'example', 'schema.yml') in paths
+        assert 'profiles.yml' in paths
+        assert not any(path.startswith('target') for path in paths)
+        loader = ManifestLoader(manifest_path='tests/data/manifest.json')
+        assert loader.input_paths() == ['tests/data/manifest.json']
+
+    def test_cache_header(self, tmp_path):
+        loader = ManifestLoader(
+            manifest_path='tests/data/manifest.json',
+            cache=ManifestCache(str(tmp_path)),
+            slim=True,
+        )
+        cache_path = tmp_path / f'{loader.cache_key()}.pickle'
+        loader.load_manifest()
+        assert cache_path.read_bytes().startswith(
+            f'dbt-quicksight-lineage manifest cache {MANIFEST_CACHE_VERSION} {loader.cache_key()}\n'.encode())
+        # an entry without the header is not unpickled
+        cache_path.write_bytes(pickle.dumps(loader.load_manifest()))
+        with patch('pickle.load', side_effect=AssertionError('unpickled')):
+            manifest = loader.load_manifest()
+        assert 'model.test_project.my_second_dbt_model' in manifest.nodes
+
+    def test_load_with_broken_cache(self, tmp_path):
+        loader = ManifestLoader(
+            manifest_path='tests/data/manifest.json',
+            cache=ManifestCache(str(tmp_path)),
+        )
+        (tmp_path / f'{loader.cache_key()}.pickle').write_bytes(b'broken')
+        manifest = loader.load_manifest()
+        assert 'model.test_project.my_first_dbt_model' in manifest.nodes
+
+
+class TestSlimManifest:
+    def test_read_slim_manifest(self):
+        full = ManifestLoader(manifest_path='tests/data/manifest.json').load_manifest()
+        expected = SlimManifest.from_manifest(full)
+        for chunk_size in [1, 7, 64, 1024 * 1024]:
+            with open('tests/data/manifest.json', encoding='utf-8') as f:
+                actual = read_slim_manifest(f, chunk_size=chunk_size)
+            assert actual == expected
+        assert list(expected.nodes) == [
+            'model.test_project.my_first_dbt_model',
+            'model.test_project.my_second_dbt_model',
+        ]
+        record = expected.nodes['model.test_project.my_first_dbt_model']
+        assert record.alias == 'my_first_dbt_model'
+        assert record.language == 'sql'
+        assert record.patch_path == 'test_project://models/example/schema.yml'
+        assert record.columns['id'].meta == {
+            'quicksight': {
+                'field_name': 'ID',
+                'folder': 'Key/',
+            },
+        }
+
+    def test_read_slim_manifest_quicksight_only(self):
+        manifest = read_slim_manifest(io.StringIO(
+            '{"metadata": {"generated_at": 1688.125}, "nodes": {'
+            '"model.p.a": {"unique_id": "model.p.a", "name": "a", "resource_type": "model",'
+            ' "language": "sql", "schema": "public", "alias": "a", "meta": {"quicksight": {}}},'
+            '"model.p.b": {"unique_id": "model.p.b", "name": "b", "resource_type": "model",'
+            ' "language": "sql", "schema": "public", "alias": "b", "meta": {}},'
+            '"seed.p.c": {"unique_id": "seed.p.c", "name": "c", "resource_type": "seed",'
+            ' "schema": "public", "alias": "c", "meta": {"quicksight": {}}}'
+            '}, "macros": {"macro.p.m": {"macro_sql": "{{ }}"}}}'
+        ), quicksight_only=True, chunk_size=5)
+        assert list(manifest.nodes) == ['model.p.a']
+
+    def test_read_slim_manifest_broken(self):
+        with pytest.raises(ValueError):
+            read_slim_manifest(io.StringIO('{"nodes": {"model.p.a": {'), chunk_size=4)
+
+    def test_app_without_dbt(self):
+        script = """
+import json, sys
+from dbt_quicksight_lineage.core import ManifestLoader, App
+from dbt_quicksight_lineage.core.quicksight import DataSet
+manifest = ManifestLoader(manifest_path='tests/data/manifest.json', slim=True, quicksight_only=True).load_manifest()
+app = App(manifest=manifest, quicksight_client=object(), aws_account_id='123456789012')
+with open('tests/data/describe_data_set_output.json') as f:
+    data_set = DataSet(json.load(f)['DataSet'])
+with open('tests/data/modified_data_set.json') as f:
+    expected = DataSet(json.load(f)).generate_update_data_set_input('123456789012')
+assert app.plan_update_data_set(data_set) == expected
+assert 'dbt' not in sys.modules, sorted(sys.modules)
+"""
+        subprocess.run([sys.executable, '-c', script], check=True)
+
+
+class TestModelIndex:
+    def test_lookup(self):
+        loader = ManifestLoader(
+            manifest_path='tests/data/manifest.json',
+        )
+        index = ModelIndex.from_manifest(loader.load_manifest())
+        assert set(node.unique_id for node in index.models) == set([
+            'model.test_project.my_first_dbt_model',
+            'model.test_project.my_second_dbt_model',
+        ])
+        assert [
+            node.unique_id for node in index.find_by_relation('public', 'my_first_dbt_model')
+        ] == ['model.test_project.my_first_dbt_model']
+        assert index.find_by_relation('public', 'not_exists') == []
+        assert index.data_set_ids == [
+            '00000000-0000-0000-0000-000000000000',
+            '11111111-1111-1111-1111-111111111111',
+        ]
+        assert [
+            node.unique_id for node in index.find_by_data_set(
+                '11111111-1111-1111-1111-111111111111',
+                'arn:aws:quicksight:ap-northeast-1:123456789012:datasource/11111111-1111-1111-1111-111111111111',
+            )
+        ] == [
+            'model.test_project.my_first_dbt_model',
+            'model.test_project.my_second_dbt_model',
+        ]
+        assert list(index.find_by_data_set(
+            '11111111-1111-1111-1111-111111111111',
+            'arn:aws:quicksight:ap-northeast-1:123456789012:datasource/00000000-0000-0000-0000-000000000000',
+        )) == []
+
+    def test_changed_data_set_ids(self, tmp_path):
+        import json
+        full = ModelIndex.from_manifest(ManifestLoader(manifest_path='tests/data/manifest.json').load_manifest())
+        slim = ModelIndex.from_manifest(
+            ManifestLoader(manifest_path='tests/data/manifest.json', slim=True, quicksight_only=True).load_manifest())
+        assert full.changed_data_set_ids(slim) == []
+
+        def changed(modify):
+            with open('tests/data/manifest.json', encoding='utf-8') as f:
+                manifest = json.load(f)
+            modify(manifest['nodes'])
+            path = tmp_path / 'manifest.json'
+            path.write_text(json.dumps(manifest))
+            current = ModelIndex.from_manifest(ManifestLoader(manifest_path=str(path), slim=True).load_manifest())
+            return current.changed_data_set_ids(full)
+
+        first = 'model.test_project.my_first_dbt_model'
+        second = 'model.test_project.my_second_dbt_model'
+        assert changed(lambda nodes: nodes[second]['columns']['id'].update(description='changed')) == [
+            '11111111-1111-1111-1111-111111111111',
+        ]
+        assert changed(lambda nodes: nodes[first].update(alias='changed')) == [
+            '00000000-0000-0000-0000-000000000000',
+            '11111111-1111-1111-1111-111111111111',
+        ]
+        assert changed(lambda nodes: nodes[second]['columns']['id']['meta'].update(owner='someone')) == []
+        assert changed(lambda nodes: nodes[second].update(description='not used')) == []
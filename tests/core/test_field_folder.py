@@ -0,0 +1,23 @@
+import pytest
+from dbt_quicksight_lineage.core.field_folder import FieldFolder
+
+
+class TestFieldFolder:
+    def test_columns(self):
+        column_index = {}
+        folder = FieldFolder('Key', {'columns': ['id', 'id', 'geo']}, column_index)
+        assert folder.columns == ('id', 'geo')
+        assert column_index == {'id': {'Key': None}, 'geo': {'Key': None}}
+        with pytest.raises(AttributeError):
+            folder.columns.append('rate')
+        folder.add_column('rate')
+        folder.rename_column('geo', 'Geometry')
+        assert folder.to_dict() == {'columns': ['id', 'rate', 'Geometry']}
+        assert 'geo' not in column_index
+
+    def test_remove_missing_column(self):
+        folder = FieldFolder('Key', {'columns': ['id']})
+        with pytest.raises(ValueError):
+            folder.remove_column('geo')
+        folder.remove_column('id')
+        assert folder.column_count == 0
@@ -0,0 +1,28 @@
+import pytest
+import os
+import stat
+from dbt_quicksight_lineage.core.fileutil import atomic_write
+
+
+class TestAtomicWrite:
+    def test_replace(self, tmp_path):
+        path = tmp_path / 'schema.yml'
+        path.write_text('old')
+        os.chmod(path, 0o640)
+        atomic_write(str(path), lambda f: f.write(b'new'), copy_mode=True)
+        assert path.read_text() == 'new'
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+        assert os.listdir(tmp_path) == ['schema.yml']
+
+    def test_failure_keeps_old_content(self, tmp_path):
+        path = tmp_path / 'schema.yml'
+        path.write_text('old')
+
+        def write(f):
+            f.write(b'partial')
+            raise ValueError('write failed')
+
+        with pytest.raises(ValueError):
+            atomic_write(str(path), write)
+        assert path.read_text() == 'old'
+        assert os.listdir(tmp_path) == ['schema.yml']
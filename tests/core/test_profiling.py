@@ -0,0 +1,48 @@
+import pytest
+from dbt_quicksight_lineage.core import App, ManifestLoader, profiling
+
+
+@pytest.fixture
+def phase_timer():
+    timer = profiling.PhaseTimer()
+    profiling.set_phase_timer(timer)
+    yield timer
+    profiling.set_phase_timer(None)
+
+
+class TestPhaseTimer:
+    def test_phase(self):
+        timer = profiling.PhaseTimer()
+        for _ in range(3):
+            with timer.phase('describe'):
+                pass
+        with pytest.raises(RuntimeError):
+            with timer.phase('update'):
+                raise RuntimeError('failed')
+        rows = timer.rows()
+        assert [(name, calls) for name, calls, _ in rows] == [('describe', 3), ('update', 1)]
+        assert all(total >= 0 for _, _, total in rows)
+        table = timer.format_table().splitlines()
+        assert table[0].split() == ['phase', 'calls', 'total(s)', 'mean(ms)']
+        assert table[1].startswith('describe')
+        assert table[-1].startswith('elapsed')
+
+    def test_phase_without_timer(self):
+        with profiling.phase(profiling.PHASE_DESCRIBE):
+            pass
+
+    def test_update_data_set_phases(self, phase_timer, fake_quicksight_client):
+        app = App(
+            quicksight_client=fake_quicksight_client(),
+            manifest=ManifestLoader(manifest_path='tests/data/manifest.json').load_manifest(),
+            aws_account_id='123456789012',
+        )
+        app.run_update_data_set('00000000-0000-0000-0000-000000000000', force=True)
+        calls = {name: calls for name, calls, _ in phase_timer.rows()}
+        assert calls == {
+            profiling.PHASE_DESCRIBE: 1,
+            profiling.PHASE_INPUT_GENERATION: 2,
+            profiling.PHASE_MODEL_MATCHING: 1,
+            profiling.PHASE_LOGICAL_TABLE_MODIFICATION: 1,
+            profiling.PHASE_UPDATE: 1,
+        }
@@ -2,7 +2,7 @@ import pytest
 import logging
 import json
 import os
-from dbt_quicksight_lineage.core.quicksight import DataSet
+from dbt_quicksight_lineage.core.quicksight import ColumnState, DataSet, LogicalTable
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger()
 
@@ -24,7 +24,25 @@ class TestDataSet:
     physical_table_id:str = '12345678-9abc-def0-1234-56789abcdef0'
 
     def test_no_modify(self, source_data_set_dict):
-        assert source_data_set_dict == DataSet(source_data_set_dict).to_dict()
+        expected = {
+            key: value for key, value in source_data_set_dict.items()
+            if key not in ('OutputColumns', 'LastUpdatedTime')
+        }
+        assert expected == DataSet(source_data_set_dict).to_dict()
+
+    def test_generate_update_data_set_input_has_no_side_effects(self, source_data_set_dict):
+        source = json.loads(json.dumps(source_data_set_dict))
+        data_set = DataSet(source_data_set_dict)
+        first = data_set.generate_update_data_set_input('123456789012')
+        assert source_data_set_dict == source
+        assert first is not source_data_set_dict
+        assert first['AwsAccountId'] == '123456789012'
+        assert 'OutputColumns' not in first
+        assert 'LastUpdatedTime' not in first
+        assert set(first) <= set(source) | {'AwsAccountId'}
+        assert first == data_set.generate_update_data_set_input('123456789012')
+        assert json.loads(data_set.to_json()) == data_set.to_dict()
+        assert source_data_set_dict == source
 
     def test_set_rename_operation_not_exits(self, source_data_set_dict):
         data_set = DataSet(source_data_set_dict)
@@ -215,3 +233,162 @@ class TestDataSet:
             "tests/data/fixture/test_add_to_field_folder_same_folder_same_field.golden.json",
             data_set.to_dict(),
         )
+
+    def test_remove_rename_column_operation(self, source_data_set_dict):
+        data_set = DataSet(source_data_set_dict)
+        data_set.remove_rename_column_operation(
+            physical_table_id=self.physical_table_id,
+            physical_column_name='id',
+        )
+        actual = data_set.to_dict()
+        logical_table = actual['LogicalTableMap']['23456781-9abc-def0-1234-56789abcdef0']
+        assert logical_table['DataTransforms'][0] == {
+            'CastColumnTypeOperation': {
+                'ColumnName': 'rate',
+                'NewColumnType': 'BOOLEAN',
+            },
+        }
+        assert logical_table['DataTransforms'][1]['TagColumnOperation']['ColumnName'] == 'id'
+        assert logical_table['DataTransforms'][-1] == {
+            'ProjectOperation': {
+                'ProjectedColumns': ['id', 'geo'],
+            },
+        }
+        assert actual['FieldFolders']['Key']['columns'] == ['id']
+
+    def test_logical_table_index_consistency(self, source_data_set_dict):
+        data_set = DataSet(source_data_set_dict)
+        logical_table = data_set.logical_table_map['23456781-9abc-def0-1234-56789abcdef0']
+        logical_table.set_rename_column_operation('geo', 'Geometry')
+        logical_table.set_tag_column_description_operation('geo', 'City name')
+        logical_table.set_cast_column_type_operation('geo', 'string')
+        logical_table.set_rename_column_operation('id', 'RowId')
+        logical_table.remove_from_projected_columns('id')
+        logical_table.remove_tag_column_description_operation('id')
+        assert logical_table.get_logical_column_name('geo') == 'Geometry'
+        assert logical_table.get_tag_column_geographic_role('geo') == 'STATE'
+        assert logical_table.get_tag_column_description('geo') == 'City name'
+        assert logical_table.get_cast_column_type('geo') == 'STRING'
+        assert logical_table.get_tag_column_description('id') is None
+        assert not logical_table.contains_projected_columns('id')
+        assert logical_table.contains_projected_columns('geo')
+        logical_table.set_cast_column_type_operation('geo', 'integer')
+        assert [
+            list(operation.keys())[0] for operation in logical_table['DataTransforms']
+        ] == [
+            'RenameColumnOperation',
+            'RenameColumnOperation',
+            'CastColumnTypeOperation',
+            'CastColumnTypeOperation',
+            'TagColumnOperation',
+            'TagColumnOperation',
+            'ProjectOperation',
+        ]
+        assert logical_table['DataTransforms'][3] == {
+            'CastColumnTypeOperation': {
+                'ColumnName': 'Geometry',
+                'NewColumnType': 'INTEGER',
+            },
+        }
+
+    def test_remove_operation_shifts_index(self, source_data_set_dict):
+        data_set = DataSet(source_data_set_dict)
+        logical_table_id = '23456781-9abc-def0-1234-56789abcdef0'
+        logical_table = data_set.logical_table_map[logical_table_id]
+        logical_table.remove_cast_column_type_operation('rate')
+        logical_table.remove_rename_column_operation('id')
+        logical_table.remove_from_projected_columns('id')
+        logical_table.remove_from_projected_columns('geo')
+        logical_table.remove_tag_column_description_operation('id')
+        rebuilt = LogicalTable(logical_table_id, logical_table.to_dict())
+        for name in LogicalTable.__slots__[2:]:
+            assert getattr(logical_table, name) == getattr(rebuilt, name), name
+
+    def test_reconcile_columns(self, source_data_set_dict):
+        logical_table_dict = source_data_set_dict['LogicalTableMap']['23456781-9abc-def0-1234-56789abcdef0']
+        logical_table_dict['DataTransforms'].insert(2, {
+            'FilterOperation': {
+                'ConditionExpression': 'ID > 0',
+            },
+        })
+        data_set = DataSet(source_data_set_dict)
+        data_set.reconcile_columns(
+            self.physical_table_id,
+            [
+                ColumnState(physical_column_name='id', field_name='RowId', description=''),
+                ColumnState(physical_column_name='geo', field_name='Geometry', description='City name',
+                            geographic_role='city', folder='Dimensions'),
+                ColumnState(physical_column_name='rate', data_type='decimal', hidden=True),
+                ColumnState(physical_column_name='updated_at', data_type='string'),
+            ],
+        )
+        actual = data_set.to_dict()
+        assert actual['LogicalTableMap']['23456781-9abc-def0-1234-56789abcdef0']['DataTransforms'] == [
+            {'RenameColumnOperation': {'ColumnName': 'id', 'NewColumnName': 'RowId'}},
+            {'RenameColumnOperation': {'ColumnName': 'geo', 'NewColumnName': 'Geometry'}},
+            {'CastColumnTypeOperation': {'ColumnName': 'updated_at', 'NewColumnType': 'STRING'}},
+            {'FilterOperation': {'ConditionExpression': 'ID > 0'}},
+            {'TagColumnOperation': {'ColumnName': 'Geometry', 'Tags': [{'ColumnGeographicRole': 'CITY'}]}},
+            {'TagColumnOperation': {'ColumnName': 'Geometry', 'Tags': [{'ColumnDescription': {'Text': 'City name'}}]}},
+            {'ProjectOperation': {'ProjectedColumns': ['RowId', 'Geometry', 'updated_at']}},
+        ]
+        assert actual['FieldFolders'] == {
+            'Key': {'description': 'this is key folder', 'columns': ['RowId']},
+            'Dimensions': {'columns': ['Geometry']},
+        }
+
+    def test_reconcile_columns_without_project_operation(self, source_data_set_dict):
+        logical_table_dict = source_data_set_dict['LogicalTableMap']['23456781-9abc-def0-1234-56789abcdef0']
+        logical_table_dict['DataTransforms'] = [
+            {'FilterOperation': {'ConditionExpression': 'ID > 0'}},
+            {'CastColumnTypeOperation': {'ColumnName': 'rate', 'NewColumnType': 'BOOLEAN'}},
+        ]
+        data_set = DataSet(source_data_set_dict)
+        data_set.reconcile_columns(
+            self.physical_table_id,
+            [ColumnState(physical_column_name='id', field_name='RowId', description='Row id')],
+        )
+        actual = data_set.to_dict()
+        # new operations go after the first operation, as App did before the reconciler
+        assert actual['LogicalTableMap']['23456781-9abc-def0-1234-56789abcdef0']['DataTransforms'] == [
+            {'FilterOperation': {'ConditionExpression': 'ID > 0'}},
+            {'RenameColumnOperation': {'ColumnName': 'id', 'NewColumnName': 'RowId'}},
+            {'TagColumnOperation': {'ColumnName': 'RowId', 'Tags': [{'ColumnDescription': {'Text': 'Row id'}}]}},
+            {'CastColumnTypeOperation': {'ColumnName': 'rate', 'NewColumnType': 'BOOLEAN'}},
+            {'ProjectOperation': {'ProjectedColumns': ['RowId']}},
+        ]
+
+    def test_reconcile_hidden_column_in_folder(self, source_data_set_dict):
+        data_set = DataSet(source_data_set_dict)
+        data_set.reconcile_columns(
+            self.physical_table_id,
+            [
+                ColumnState(physical_column_name='id', field_name='ID', hidden=True, folder='Key'),
+                ColumnState(physical_column_name='geo'),
+            ],
+        )
+        actual = data_set.to_dict()
+        # a hidden column kept for its folder moves to the end, as App did before the reconciler
+        assert actual['LogicalTableMap']['23456781-9abc-def0-1234-56789abcdef0']['DataTransforms'][-1] == {
+            'ProjectOperation': {'ProjectedColumns': ['geo', 'ID']},
+        }
+        assert actual['FieldFolders']['Key']['columns'] == ['ID']
+
+    def test_field_folder_column_index(self, source_data_set_dict):
+        data_set = DataSet(source_data_set_dict)
+        assert data_set.get_field_folder_path(self.physical_table_id, 'id') == 'Key'
+        data_set.add_to_field_folder(
+            physical_table_id=self.physical_table_id,
+            physical_column_name='id',
+            field_folder_path='Dimensions',
+        )
+        data_set.add_to_field_folder(
+            physical_table_id=self.physical_table_id,
+            physical_column_name='id',
+            field_folder_path='Dimensions',
+        )
+        assert data_set.get_field_folder_path(self.physical_table_id, 'id') == 'Dimensions'
+        assert data_set.to_dict()['FieldFolders']['Dimensions']['columns'] == ['ID']
+        data_set.remove_from_field_folder(self.physical_table_id, 'id')
+        assert data_set.get_field_folder_path(self.physical_table_id, 'id') is None
+        assert 'Key' not in data_set.to_dict().get('FieldFolders', {})
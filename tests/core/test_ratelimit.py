@@ -0,0 +1,140 @@
+import pytest
+import collections
+import random
+from dbt_quicksight_lineage.core.ratelimit import (
+    AdaptiveRateLimiter,
+    Backoff,
+    RateAdjustment,
+    RateLimitedQuickSightClient,
+    TokenBucket,
+)
+
+
+class ThrottlingQuickSightClient:
+    """allows quota calls in any 1 second window, and throttles the others"""
+
+    def __init__(self, clock, client_error, quota):
+        self.clock = clock
+        self.client_error = client_error
+        self.quota = quota
+        self.window = collections.deque()
+        self.succeeded = 0
+        self.throttled = 0
+
+    def describe_data_set(self, AwsAccountId, DataSetId):
+        now = self.clock()
+        while self.window and self.window[0] <= now - 1:
+            self.window.popleft()
+        if len(self.window) >= self.quota:
+            self.throttled += 1
+            raise self.client_error('ThrottlingException')
+        self.window.append(now)
+        self.succeeded += 1
+        return {'Status': 200}
+
+    update_data_set = describe_data_set
+
+
+def new_client(clock, client, describe_rate, update_rate=1.0, **kwargs):
+    return RateLimitedQuickSightClient(
+        client,
+        AdaptiveRateLimiter(describe_rate, clock=clock, sleep=clock.sleep),
+        AdaptiveRateLimiter(update_rate, clock=clock, sleep=clock.sleep),
+        Backoff(sleep=clock.sleep, rng=random.Random(1), **kwargs),
+    )
+
+
+class TestTokenBucket:
+    def test_acquire(self, clock):
+        bucket = TokenBucket(4.0, burst=2.0, clock=clock, sleep=clock.sleep)
+        waits = [bucket.acquire() for _ in range(6)]
+        assert waits == [0.0, 0.0, 0.25, 0.25, 0.25, 0.25]
+        assert clock.now == 1.0
+
+
+class TestAdaptiveRateLimiter:
+    def test_adjustment(self, clock):
+        limiter = AdaptiveRateLimiter(
+            10.0,
+            RateAdjustment(decrease=0.5, cooldown=1.0, min_rate=4.0),
+            clock=clock,
+            sleep=clock.sleep,
+        )
+        limiter.on_throttle()
+        limiter.on_throttle()
+        assert limiter.rate == 5.0
+        clock.now = 1.0
+        limiter.on_throttle()
+        assert limiter.rate == 4.0
+
+
+class TestBackoff:
+    def test_delay(self):
+        backoff = Backoff(base_delay=1.0, max_delay=3.0, rng=random.Random(1))
+        assert all(0 <= backoff.delay(attempt) <= min(3.0, 2 ** attempt) for attempt in range(5))
+
+
+class TestRateLimitedQuickSightClient:
+    @pytest.mark.parametrize('describe_rate, quota, expected_ratio', [
+        (5.0, 10, 0.99),
+        (20.0, 5, 0.75),
+        (50.0, 5, 0.75),
+    ])
+    def test_throughput(self, describe_rate, quota, expected_ratio, clock, client_error):
+        fake = ThrottlingQuickSightClient(clock, client_error, quota)
+        client = new_client(clock, fake, describe_rate)
+        for i in range(1000):
+            client.describe_data_set(AwsAccountId='123456789012', DataSetId=str(i))
+        throughput = fake.succeeded / clock.now
+        assert throughput >= min(describe_rate, quota) * expected_ratio
+        assert throughput <= min(describe_rate, quota) * 1.01
+        assert fake.throttled < fake.succeeded * 0.15
+
+    def test_separate_budgets(self, clock, client_error):
+        fake = ThrottlingQuickSightClient(clock, client_error, 100)
+        client = new_client(clock, fake, describe_rate=10.0, update_rate=2.0)
+        for _ in range(20):
+            client.describe_data_set(AwsAccountId='123456789012', DataSetId='a')
+        describe_elapsed = clock.now
+        for _ in range(4):
+            client.update_data_set(AwsAccountId='123456789012', DataSetId='a')
+        assert describe_elapsed == pytest.approx(1.9)
+        assert clock.now - describe_elapsed == pytest.approx(1.5)
+
+    def test_give_up(self, clock, client_error):
+
+        class AlwaysThrottled:
+            calls = 0
+
+            def describe_data_set(self, **kwargs):
+                self.calls += 1
+                raise client_error('ThrottlingException')
+
+        fake = AlwaysThrottled()
+        client = new_client(clock, fake, describe_rate=10.0, max_retries=3)
+        with pytest.raises(client_error):
+            client.describe_data_set(AwsAccountId='123456789012', DataSetId='a')
+        assert fake.calls == 4
+        assert client.describe_limiter.rate < 10.0
+
+    def test_not_retry_other_errors(self, clock, client_error):
+
+        class NotFound:
+            calls = 0
+
+            def describe_data_set(self, **kwargs):
+                self.calls += 1
+                raise client_error('ResourceNotFoundException')
+
+        fake = NotFound()
+        client = new_client(clock, fake, describe_rate=10.0)
+        with pytest.raises(client_error):
+            client.describe_data_set(AwsAccountId='123456789012', DataSetId='a')
+        assert fake.calls == 1
+
+    def test_from_boto3(self, monkeypatch):
+        monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+        client = RateLimitedQuickSightClient.from_boto3(describe_rate=5.0, update_rate=1.0)
+        assert client.describe_limiter.max_rate == 5.0
+        assert client.update_limiter.max_rate == 1.0
+        assert client.meta.service_model.service_name == 'quicksight'
@@ -0,0 +1,187 @@
+import pytest
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+from dbt_quicksight_lineage.core import App, ManifestLoader
+from dbt_quicksight_lineage.core.server import LineageHTTPServer, LineageService, LineageUnixServer
+
+DATA_SET_ID = '11111111-1111-1111-1111-111111111111'
+TOKEN = 'test-token'
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path):
+        super().__init__('localhost')
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def request(conn, method, path, body=None, headers=None):
+    if headers is None:
+        headers = {'Authorization': f'Bearer {TOKEN}', 'Content-Type': 'application/json'}
+    conn.request(method, path, body=None if body is None else json.dumps(body), headers=headers)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    with open('tests/data/manifest.json', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest_path = tmp_path / 'manifest.json'
+    manifest_path.write_text(json.dumps(manifest))
+    os.utime(manifest_path, (1, 1))
+    return manifest, manifest_path
+
+
+def start(server):
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    return thread
+
+
+def stop(server, thread):
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+class TestLineageHTTPServer:
+    def test_endpoints(self, manifest, fake_quicksight_client, modified_data_set):
+        manifest, manifest_path = manifest
+        client = fake_quicksight_client({DATA_SET_ID: modified_data_set})
+        loader = ManifestLoader(manifest_path=str(manifest_path), slim=True, quicksight_only=True)
+        app = App(manifest=loader.load_manifest(), quicksight_client=client, aws_account_id='123456789012')
+        server = LineageHTTPServer(('127.0.0.1', 0), LineageService(app, loader, token=TOKEN), max_workers=2)
+        thread = start(server)
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+        try:
+            status, body = request(conn, 'GET', '/health')
+            assert status == 200
+            assert body['status'] == 'ok'
+            assert body['aws_account_id'] == '123456789012'
+            assert body['data_sets'] == len(app.find_data_set_ids())
+
+            assert request(conn, 'GET', '/data-sets') == (200, {'data_set_ids': app.find_data_set_ids()})
+
+            status, body = request(conn, 'POST', f'/data-sets/{DATA_SET_ID}/plan')
+            assert status == 200
+            assert body['data_set_id'] == DATA_SET_ID
+            assert 'LogicalTableMap' in body['update_data_set_input']
+
+            status, body = request(conn, 'POST', f'/data-sets/{DATA_SET_ID}/dry-run', {'force': True})
+            assert status == 200
+            assert body['status'] == 'dry_run'
+            assert body['error'] is None
+            assert client.updated == []
+
+            status, body = request(conn, 'POST', f'/data-sets/{DATA_SET_ID}/update', {'force': True})
+            assert status == 200
+            assert body['status'] == 'updated'
+            assert len(client.updated) == 1
+
+            status, body = request(conn, 'POST', '/data-sets/unknown/plan')
+            assert status == 500
+            assert 'unknown' in body['error']
+            assert request(conn, 'GET', '/unknown')[0] == 404
+            assert request(conn, 'POST', '/reload', [])[0] == 400
+
+            previous = server.service.app
+            assert request(conn, 'POST', '/reload') == (200, {'changed_data_set_ids': []})
+            manifest['nodes']['model.test_project.my_second_dbt_model']['columns']['id']['description'] = 'changed'
+            manifest_path.write_text(json.dumps(manifest))
+            assert request(conn, 'POST', '/reload') == (200, {'changed_data_set_ids': [DATA_SET_ID]})
+            assert server.service.app is not previous
+            assert server.service.app.quicksight_client is client
+        finally:
+            conn.close()
+            stop(server, thread)
+
+    def test_reject(self, fake_quicksight_client, modified_data_set):
+        client = fake_quicksight_client({DATA_SET_ID: modified_data_set})
+        loader = ManifestLoader(manifest_path='tests/data/manifest.json', slim=True, quicksight_only=True)
+        app = App(manifest=loader.load_manifest(), quicksight_client=client, aws_account_id='123456789012')
+        server = LineageHTTPServer(('127.0.0.1', 0), LineageService(app, loader, token=TOKEN))
+        thread = start(server)
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+        path = f'/data-sets/{DATA_SET_ID}/update'
+        authorization = f'Bearer {TOKEN}'
+        try:
+            assert request(conn, 'POST', path, headers={})[0] == 401
+            assert request(conn, 'GET', '/health', headers={'Authorization': 'Bearer wrong'})[0] == 401
+            assert request(conn, 'POST', path, headers={'Authorization': authorization})[0] == 415
+            assert request(conn, 'POST', path, {}, headers={
+                'Authorization': authorization,
+                'Content-Type': 'text/plain',
+            })[0] == 415
+            assert request(conn, 'POST', path, {}, headers={
+                'Authorization': authorization,
+                'Content-Type': 'application/json',
+                'Origin': 'http://example.com',
+            })[0] == 403
+            assert client.updated == []
+        finally:
+            conn.close()
+            stop(server, thread)
+
+    def test_reject_overloaded(self, fake_quicksight_client, modified_data_set):
+        client = fake_quicksight_client({DATA_SET_ID: modified_data_set})
+        loader = ManifestLoader(manifest_path='tests/data/manifest.json', slim=True, quicksight_only=True)
+        app = App(manifest=loader.load_manifest(), quicksight_client=client, aws_account_id='123456789012')
+        service = LineageService(app, loader, token=TOKEN)
+        server = LineageHTTPServer(('127.0.0.1', 0), service, max_workers=1, max_queued=0)
+        thread = start(server)
+        port = server.server_address[1]
+        # holds the only worker, waiting for a request line which never comes
+        idle = socket.create_connection(('127.0.0.1', port))
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        try:
+            status, body = request(conn, 'GET', '/health')
+            assert status == 503
+            assert body == {'error': 'too many requests in flight'}
+            conn.close()
+            idle.close()
+            deadline = time.monotonic() + 5
+            while status == 503 and time.monotonic() < deadline:
+                conn = http.client.HTTPConnection('127.0.0.1', port)
+                status = request(conn, 'GET', '/health')[0]
+                conn.close()
+            assert status == 200
+        finally:
+            idle.close()
+            conn.close()
+            stop(server, thread)
+
+
+class TestLineageService:
+    def test_token(self):
+        service = LineageService(None)
+        assert len(service.token) >= 32
+        assert service.token != LineageService(None).token
+        assert service.authorized(f'Bearer {service.token}')
+        assert not service.authorized(service.token)
+        assert not service.authorized(None)
+
+
+class TestLineageUnixServer:
+    def test_health(self, tmp_path, fake_quicksight_client, modified_data_set):
+        client = fake_quicksight_client({DATA_SET_ID: modified_data_set})
+        loader = ManifestLoader(manifest_path='tests/data/manifest.json', slim=True, quicksight_only=True)
+        app = App(manifest=loader.load_manifest(), quicksight_client=client, aws_account_id='123456789012')
+        socket_path = str(tmp_path / 'lineage.sock')
+        server = LineageUnixServer(socket_path, LineageService(app, loader, token=TOKEN))
+        thread = start(server)
+        conn = UnixHTTPConnection(socket_path)
+        try:
+            status, body = request(conn, 'GET', '/health')
+            assert status == 200
+            assert body['models'] == len(app.model_index.models)
+        finally:
+            conn.close()
+            stop(server, thread)
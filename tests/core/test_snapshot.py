@@ -0,0 +1,74 @@
+import pytest
+import datetime
+import json
+import os
+from dbt_quicksight_lineage.core import App, ManifestLoader
+from dbt_quicksight_lineage.core.snapshot import (
+    SnapshotQuickSightClient,
+    SnapshotStore,
+    export_data_sets,
+    import_describe_data_set_outputs,
+)
+
+DATA_SET_ID = '00000000-0000-0000-0000-000000000000'
+AWS_ACCOUNT_ID = '123456789012'
+
+
+def load_data_set():
+    with open('tests/data/modified_data_set.json', 'r') as f:
+        return json.load(f)
+
+
+class TestSnapshotStore:
+    def test_content_addressed(self, tmp_path):
+        store = SnapshotStore(str(tmp_path))
+        data_set = load_data_set()
+        data_set['LastUpdatedTime'] = datetime.datetime(2023, 7, 1, tzinfo=datetime.timezone.utc)
+        other = dict(data_set, DataSetId='other', Arn=data_set['Arn'].replace(DATA_SET_ID, 'other'))
+        digests = store.put([data_set, other])
+        assert digests[DATA_SET_ID] != digests['other']
+        assert store.put([data_set]) == {DATA_SET_ID: digests[DATA_SET_ID]}
+        objects = [name for _, _, names in os.walk(tmp_path / 'objects') for name in names]
+        assert len(objects) == 2
+        assert store.get_object(digests[DATA_SET_ID])['LastUpdatedTime'] == '2023-07-01T00:00:00+00:00'
+        index = store.load_index()
+        assert sorted(index[AWS_ACCOUNT_ID]) == [DATA_SET_ID, 'other']
+        assert index[AWS_ACCOUNT_ID][DATA_SET_ID]['LastUpdatedTime'] == '2023-07-01T00:00:00+00:00'
+        assert store.default_aws_account_id() == AWS_ACCOUNT_ID
+
+    def test_export_and_offline_app(self, tmp_path, fake_quicksight_client):
+        store = SnapshotStore(str(tmp_path))
+        fake = fake_quicksight_client(
+            {DATA_SET_ID: load_data_set()}, listed_ids=[DATA_SET_ID, 'broken'], page_size=1)
+        result = export_data_sets(fake, AWS_ACCOUNT_ID, store, max_workers=2)
+        assert result.data_set_ids == [DATA_SET_ID, 'broken']
+        assert list(result.digests) == [DATA_SET_ID]
+        assert list(result.errors) == ['broken']
+
+        client = SnapshotQuickSightClient(store)
+        assert [s['DataSetId'] for s in client.list_data_sets(AwsAccountId=AWS_ACCOUNT_ID)['DataSetSummaries']] == [
+            DATA_SET_ID]
+        app = App(
+            manifest=ManifestLoader(manifest_path='tests/data/manifest.json').load_manifest(),
+            quicksight_client=client,
+            aws_account_id=AWS_ACCOUNT_ID,
+        )
+        assert app.list_data_set_ids() == [DATA_SET_ID]
+        result = app.run_update_data_set(DATA_SET_ID, dry_run=True, force=True)
+        assert result.status == 'dry_run'
+        with pytest.raises(ValueError):
+            app.run_update_data_set(DATA_SET_ID, force=True)
+        with pytest.raises(ValueError):
+            app.describe_data_set('missing')
+
+    def test_import(self, tmp_path):
+        output_path = tmp_path / 'describe.json'
+        output_path.write_text(json.dumps({'Status': 200, 'DataSet': load_data_set()}))
+        store = SnapshotStore(str(tmp_path / 'snapshot'))
+        digests = import_describe_data_set_outputs(store, [str(output_path)])
+        assert list(digests) == [DATA_SET_ID]
+        output = SnapshotQuickSightClient(store).describe_data_set(
+            AwsAccountId=AWS_ACCOUNT_ID, DataSetId=DATA_SET_ID)
+        assert output['DataSet'] == load_data_set()
+        with pytest.raises(ValueError):
+            import_describe_data_set_outputs(store, ['tests/data/manifest.json'])
@@ -0,0 +1,113 @@
+import pytest
+import io
+import json
+import random
+from dbt_quicksight_lineage.core import App, ManifestLoader, tracing
+from dbt_quicksight_lineage.core.ratelimit import (
+    AdaptiveRateLimiter,
+    Backoff,
+    RateLimitedQuickSightClient,
+)
+
+
+@pytest.fixture
+def trace_stream():
+    stream = io.StringIO()
+    tracing.set_tracer(tracing.Tracer(stream, trace_id='trace'))
+    yield stream
+    tracing.set_tracer(None)
+
+
+def read_spans(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class FlakyQuickSightClient:
+    def __init__(self, client_error=None, throttles=0):
+        self.client_error = client_error
+        self.throttles = throttles
+
+    def describe_data_set(self, AwsAccountId, DataSetId):
+        if self.throttles > 0:
+            self.throttles -= 1
+            raise self.client_error('ThrottlingException')
+        with open('tests/data/modified_data_set.json', 'r') as f:
+            return {'Status': 200, 'DataSet': json.load(f)}
+
+    def update_data_set(self, **kwargs):
+        return {'Status': 200}
+
+
+class TestTracing:
+    def test_span(self, trace_stream):
+        with tracing.span('outer', data_set_id='a') as outer:
+            with tracing.span('inner') as inner:
+                inner.set(physical_table_id='b')
+                tracing.current_span().add_retry()
+        with pytest.raises(RuntimeError):
+            with tracing.span('failed'):
+                raise RuntimeError('failed')
+        spans = read_spans(trace_stream)
+        assert [span['name'] for span in spans] == ['inner', 'outer', 'failed']
+        assert spans[0]['parent_id'] == outer.span_id
+        assert spans[0]['physical_table_id'] == 'b'
+        assert spans[0]['retries'] == 1
+        assert spans[1]['parent_id'] is None
+        assert spans[1]['data_set_id'] == 'a'
+        assert spans[2]['status'] == 'error'
+        assert spans[2]['error'] == 'RuntimeError'
+        assert all(span['trace_id'] == 'trace' for span in spans)
+        assert all(span['duration'] >= 0 for span in spans)
+
+    def test_noop_span(self):
+        with tracing.span('noop', data_set_id='a') as span:
+            assert not span.recording
+            span.set(physical_table_id='b')
+            span.set_payload_size({'a': 1})
+            tracing.current_span().add_retry()
+
+    def test_update_data_set_spans(self, trace_stream, clock, client_error):
+        client = RateLimitedQuickSightClient(
+            FlakyQuickSightClient(client_error, throttles=2),
+            AdaptiveRateLimiter(10.0, clock=clock, sleep=clock.sleep),
+            AdaptiveRateLimiter(10.0, clock=clock, sleep=clock.sleep),
+            Backoff(sleep=clock.sleep, rng=random.Random(1)),
+        )
+        app = App(
+            quicksight_client=client,
+            manifest=ManifestLoader(manifest_path='tests/data/manifest.json').load_manifest(),
+            aws_account_id='123456789012',
+        )
+        data_set_id = '00000000-0000-0000-0000-000000000000'
+        app.run_update_data_set(data_set_id, force=True)
+        spans = read_spans(trace_stream)
+        assert [span['name'] for span in spans] == [
+            tracing.SPAN_MANIFEST_LOAD,
+            tracing.SPAN_DESCRIBE_DATA_SET,
+            tracing.SPAN_MODIFY_LOGICAL_TABLE,
+            tracing.SPAN_UPDATE_DATA_SET,
+        ]
+        manifest_load, describe, modify, update = spans
+        assert manifest_load['nodes'] > 0
+        assert describe['data_set_id'] == data_set_id
+        assert describe['retries'] == 2
+        assert describe['payload_size'] > 0
+        assert modify['data_set_id'] == data_set_id
+        assert modify['physical_table_id']
+        assert modify['model_unique_id'].startswith('model.')
+        assert update['retries'] == 0
+        assert update['payload_size'] > 0
+
+    def test_worker_spans_have_parent(self, trace_stream):
+        app = App(
+            quicksight_client=FlakyQuickSightClient(),
+            manifest=ManifestLoader(manifest_path='tests/data/manifest.json').load_manifest(),
+            aws_account_id='123456789012',
+        )
+        data_set_id = '00000000-0000-0000-0000-000000000000'
+        with tracing.span('update_data_sets') as parent:
+            app.update_data_sets([data_set_id], dry_run=True, max_workers=2)
+        spans = read_spans(trace_stream)
+        describe = [span for span in spans if span['name'] == tracing.SPAN_DESCRIBE_DATA_SET]
+        assert len(describe) == 1
+        assert describe[0]['parent_id'] == parent.span_id
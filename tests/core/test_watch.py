@@ -0,0 +1,107 @@
+import pytest
+import json
+import os
+from dbt_quicksight_lineage.core import App, ManifestLoader
+from dbt_quicksight_lineage.core.watch import FileWatcher, ManifestWatcher
+
+
+def touch(path, mtime):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    os.utime(path, (mtime, mtime))
+
+
+class TestFileWatcher:
+    def test_debounce(self, tmp_path, clock):
+        a, b = str(tmp_path / 'a'), str(tmp_path / 'b')
+        touch(a, 1)
+        clock.at(1.0, lambda: touch(a, 2))
+        clock.at(1.5, lambda: touch(b, 2))
+        clock.at(2.5, lambda: touch(a, 3))
+        clock.at(10.0, lambda: os.remove(b))
+        watcher = FileWatcher(
+            lambda: [a, b], interval=0.5, debounce=2.0, clock=clock, sleep=clock.sleep)
+        assert watcher.wait() == {a, b}
+        assert clock.now == 4.5
+        assert watcher.wait() == {b}
+        assert clock.now == 12.0
+
+
+class TestManifestWatcher:
+    def test_run_once(self, tmp_path, clock, fake_quicksight_client):
+        with open('tests/data/manifest.json', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest_path = tmp_path / 'manifest.json'
+        manifest_path.write_text(json.dumps(manifest))
+        os.utime(manifest_path, (1, 1))
+
+        def rebuild():
+            manifest['nodes']['model.test_project.my_second_dbt_model']['columns']['id']['description'] = 'changed'
+            manifest_path.write_text(json.dumps(manifest))
+
+        def break_manifest():
+            manifest_path.write_text('{"nodes": ')
+
+        client = fake_quicksight_client()
+        loader = ManifestLoader(manifest_path=str(manifest_path), slim=True, quicksight_only=True)
+        app = App(manifest=loader.load_manifest(), quicksight_client=client, aws_account_id='123456789012')
+        clock.at(1.0, rebuild)
+        clock.at(5.0, break_manifest)
+        watcher = ManifestWatcher(
+            app,
+            loader,
+            file_watcher=FileWatcher(loader.input_paths, interval=0.5, debounce=1.0, clock=clock, sleep=clock.sleep),
+            dry_run=True,
+        )
+        batch = watcher.run_once()
+        assert batch.changed_paths == {str(manifest_path)}
+        assert batch.data_set_ids == ['11111111-1111-1111-1111-111111111111']
+        assert [result.data_set_id for result in batch.results] == batch.data_set_ids
+        assert client.described == batch.data_set_ids
+        batch = watcher.run_once()
+        assert isinstance(batch.error, ValueError)
+        assert batch.data_set_ids == []
+
+    def test_retry_failed(self, tmp_path, clock, fake_quicksight_client):
+        with open('tests/data/manifest.json', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest_path = tmp_path / 'manifest.json'
+        manifest_path.write_text(json.dumps(manifest))
+        os.utime(manifest_path, (1, 1))
+
+        def rebuild():
+            manifest['nodes']['model.test_project.my_second_dbt_model']['columns']['id']['description'] = 'changed'
+            manifest_path.write_text(json.dumps(manifest))
+
+        def touch_manifest():
+            manifest_path.write_text(json.dumps(manifest, indent=2))
+
+        loader = ManifestLoader(manifest_path=str(manifest_path), slim=True, quicksight_only=True)
+        app = App(
+            manifest=loader.load_manifest(),
+            quicksight_client=fake_quicksight_client(failures=1),
+            aws_account_id='123456789012',
+        )
+        clock.at(1.0, rebuild)
+        clock.at(5.0, touch_manifest)
+        clock.at(10.0, touch_manifest)
+        watcher = ManifestWatcher(
+            app,
+            loader,
+            file_watcher=FileWatcher(loader.input_paths, interval=0.5, debounce=1.0, clock=clock, sleep=clock.sleep),
+            dry_run=True,
+        )
+        data_set_id = '11111111-1111-1111-1111-111111111111'
+        batch = watcher.run_once()
+        assert [result.status for result in batch.results] == ['failed']
+        assert watcher.failed_data_set_ids == [data_set_id]
+        batch = watcher.run_once()
+        assert batch.reloaded
+        assert batch.retried_data_set_ids == [data_set_id]
+        assert batch.data_set_ids == [data_set_id]
+        assert [result.error for result in batch.results] == [None]
+        assert watcher.failed_data_set_ids == []
+        batch = watcher.run_once()
+        assert batch.changed_paths == {str(manifest_path)}
+        assert not batch.reloaded
+        assert batch.data_set_ids == []